@@ -0,0 +1,270 @@
+"""
+Server-side conversation state for the chat agent.
+Each session keeps the filters parsed from its recent user turns (one delta per
+turn, so a new message is parsed on its own instead of re-parsing the history),
+the last few messages for the LLM prompt, and the last candidate pool. A
+refinement that only narrows the filters ("something shorter") is answered by
+filtering that pool locally instead of another recommendation pass.
+
+Two tiers, like the recommendation cache: an in-process LRU with a sliding TTL,
+and an optional shared SQLite file (CHAT_SESSION_PATH) so any worker can pick
+up a session.
+"""
+import json
+import os
+import re
+import sqlite3
+import statistics
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from app.core.config import (
+    CHAT_SESSION_MIN_POOL,
+    CHAT_SESSION_PATH,
+    CHAT_SESSION_SIZE,
+    CHAT_SESSION_TTL,
+    CHAT_SESSION_TURNS,
+)
+from app.core.monitoring import CHAT_SESSION_REQUESTS
+
+HISTORY_MESSAGES = 3  # messages shown to the LLM ("Last 3 chat messages")
+SHORTER = re.compile(r"\bshorter\b")
+BETTER_RATED = re.compile(r"\b(?:better|higher)[ -]rated\b")
+UPPER_BOUNDS = ("max_runtime", "max_score")
+LOWER_BOUNDS = ("min_score",)
+
+
+def merge_filters(turns: list[dict]) -> dict:
+    """Genres accumulate across turns; every other filter takes its latest value."""
+    merged = {"genres": [], "max_runtime": None, "min_year": None, "language": None, "min_score": None, "max_score": None}
+    for delta in turns:
+        for genre in delta.get("genres") or []:
+            if genre not in merged["genres"]:
+                merged["genres"].append(genre)
+        for name, value in delta.items():
+            if name != "genres" and value is not None:
+                merged[name] = value
+    return merged
+
+
+def matches_filters(movie: dict, filters: dict) -> bool:
+    """The recommenders' filter semantics on a candidate dict (missing values never match a bound)."""
+    if filters.get("genres") and not set(filters["genres"]) & set(movie.get("genres") or []):
+        return False
+    if filters.get("language") and movie.get("language") != filters["language"]:
+        return False
+    runtime, score = movie.get("runtime"), movie.get("audience_score")
+    if filters.get("max_runtime") and (runtime is None or runtime > filters["max_runtime"]):
+        return False
+    if filters.get("min_score") and (score is None or score < filters["min_score"]):
+        return False
+    if filters.get("max_score") and (score is None or score > filters["max_score"]):
+        return False
+    return True
+
+
+def _narrows(old: dict, new: dict) -> bool:
+    """True if every movie matching `new` also matches `old` (checkable on candidate dicts)."""
+    if new.get("min_year") != old.get("min_year"):
+        return False  # candidates carry no release year
+    if old.get("genres") and (not new.get("genres") or set(new["genres"]) - set(old["genres"])):
+        return False
+    if old.get("language") and new.get("language") != old["language"]:
+        return False
+    for name in UPPER_BOUNDS:
+        if old.get(name) and not (new.get(name) and new[name] <= old[name]):
+            return False
+    for name in LOWER_BOUNDS:
+        if old.get(name) and not (new.get(name) and new[name] >= old[name]):
+            return False
+    return True
+
+
+class ConversationState:
+    def __init__(self, session_id: str, user_id: int):
+        self.session_id = session_id
+        self.user_id = user_id
+        self.turns: list[dict] = []       # filter delta per recent user message
+        self.history: list[dict] = []     # recent {"role", "content"} messages
+        self.filters = merge_filters([])
+        self.pool: list[dict] = []
+        self.pool_filters: dict | None = None
+        self.pool_exact = False
+
+    # ─── Turns ────────────────────────────────────────────────
+    def apply(self, message: str, delta: dict) -> dict:
+        """Folds the new message's filters into the session and returns the merged filters."""
+        delta = dict(delta)
+        msg_lower = message.lower()
+        # Relative refinements are measured against what was shown last time
+        runtimes = [m["runtime"] for m in self.pool if m.get("runtime")]
+        if SHORTER.search(msg_lower) and runtimes:
+            delta["max_runtime"] = int(statistics.median(runtimes))
+        scores = [m["audience_score"] for m in self.pool if m.get("audience_score")]
+        if BETTER_RATED.search(msg_lower) and scores:
+            delta["min_score"] = round(statistics.median(scores), 1)
+
+        self.turns = (self.turns + [delta])[-CHAT_SESSION_TURNS:]
+        self.filters = merge_filters(self.turns)
+        return self.filters
+
+    def refine(self, filters: dict) -> dict:
+        """Adopts filters completed elsewhere (the LLM intent parser) into the latest turn."""
+        changed = {name: value for name, value in filters.items() if value != self.filters.get(name)}
+        if self.turns:
+            self.turns[-1] = {**self.turns[-1], **changed}
+        self.filters = merge_filters(self.turns)
+        return self.filters
+
+    def context_text(self, message: str) -> str:
+        """Recent user messages plus the new one, for the LLM intent parser."""
+        earlier = " ".join(m.get("content", "") for m in self.history if m.get("role") == "user")
+        return earlier + " " + message
+
+    def formatted_history(self) -> str:
+        if not self.history:
+            return ""
+        lines = [f"{m.get('role').capitalize()}: {m.get('content')}" for m in self.history]
+        return "\nRecent History:\n" + "\n".join(lines) + "\n"
+
+    def record_turn(self, message: str, reply: str):
+        self.history = (self.history + [
+            {"role": "user", "content": message},
+            {"role": "assistant", "content": reply},
+        ])[-HISTORY_MESSAGES:]
+
+    # ─── Candidate pool ───────────────────────────────────────
+    def reusable_pool(self, filters: dict) -> list[dict] | None:
+        """The last pool narrowed to `filters`, if that is a valid answer for them."""
+        if not self.pool or not self.pool_exact or self.pool_filters is None:
+            return None
+        if not _narrows(self.pool_filters, filters):
+            return None
+        local = [m for m in self.pool if matches_filters(m, filters)]
+        return local if len(local) >= CHAT_SESSION_MIN_POOL else None
+
+    def remember_pool(self, filters: dict, candidates: list[dict], exact: bool):
+        self.pool, self.pool_filters, self.pool_exact = candidates, dict(filters), exact
+
+    # ─── Serialization ────────────────────────────────────────
+    def to_dict(self) -> dict:
+        return {
+            "session_id": self.session_id, "user_id": self.user_id, "turns": self.turns,
+            "history": self.history, "pool": self.pool, "pool_filters": self.pool_filters,
+            "pool_exact": self.pool_exact,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ConversationState":
+        state = cls(data["session_id"], data["user_id"])
+        state.turns = data["turns"]
+        state.history = data["history"]
+        state.filters = merge_filters(state.turns)
+        state.pool = data["pool"]
+        state.pool_filters = data["pool_filters"]
+        state.pool_exact = data["pool_exact"]
+        return state
+
+
+class SQLiteSessions:
+    """Shared tier; one connection per thread, WAL so readers don't block the writer."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS chat_sessions ("
+            "session_id TEXT PRIMARY KEY, expires_at REAL NOT NULL, value TEXT NOT NULL)"
+        )
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+        return conn
+
+    def get(self, session_id: str, now: float) -> str | None:
+        row = self._conn().execute(
+            "SELECT value FROM chat_sessions WHERE session_id = ? AND expires_at > ?", (session_id, now)
+        ).fetchone()
+        return row[0] if row else None
+
+    def set(self, session_id: str, expires_at: float, value: str):
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO chat_sessions (session_id, expires_at, value) VALUES (?, ?, ?)",
+            (session_id, expires_at, value)
+        )
+        conn.execute("DELETE FROM chat_sessions WHERE expires_at <= ?", (time.time(),))
+        conn.commit()
+
+
+class ConversationStore:
+    def __init__(self, ttl: float, max_size: int, shared_path: str | None = None):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.entries: OrderedDict = OrderedDict()  # session_id -> (expires_at, serialized state)
+        self.shared = SQLiteSessions(shared_path) if shared_path else None
+        self.lock = threading.Lock()
+
+    def get(self, session_id: str) -> ConversationState | None:
+        """A private copy of the session, or None if it is unknown or expired."""
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(session_id)
+            if entry is not None and entry[0] <= now:
+                del self.entries[session_id]
+                entry = None
+            if entry is not None:
+                self.entries.move_to_end(session_id)
+        value = entry[1] if entry is not None else None
+        if value is None and self.shared is not None:
+            value = self.shared.get(session_id, now)
+        return ConversationState.from_dict(json.loads(value)) if value is not None else None
+
+    def save(self, state: ConversationState):
+        expires_at = time.time() + self.ttl
+        value = json.dumps(state.to_dict())
+        with self.lock:
+            self.entries[state.session_id] = (expires_at, value)
+            self.entries.move_to_end(state.session_id)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+        if self.shared is not None:
+            self.shared.set(state.session_id, expires_at, value)
+
+    def open(self, session_id: str | None, user_id: int, chat_history: list[dict] | None = None, parse=None) -> ConversationState:
+        """
+        The stored session for this user, or a new one. A new session is seeded from
+        the client's chat_history (the pre-session protocol) by parsing each user
+        message once with `parse`.
+        """
+        state = self.get(session_id) if session_id else None
+        if state is not None and state.user_id == user_id:
+            CHAT_SESSION_REQUESTS.labels(result="hit").inc()
+            return state
+
+        CHAT_SESSION_REQUESTS.labels(result="new" if not session_id else "miss").inc()
+        state = ConversationState(uuid.uuid4().hex, user_id)
+        recent = (chat_history or [])[-HISTORY_MESSAGES:]
+        state.history = [{"role": m.get("role"), "content": m.get("content", "")} for m in recent]
+        if parse is not None:
+            for m in recent:
+                if m.get("role") == "user":
+                    state.apply(m.get("content", ""), parse(m.get("content", "")))
+        return state
+
+
+conversation_store = ConversationStore(
+    ttl=CHAT_SESSION_TTL,
+    max_size=CHAT_SESSION_SIZE,
+    shared_path=CHAT_SESSION_PATH or None
+)
@@ -1,8 +1,38 @@
-from typing import Dict, Any
-from app.agents.recommendation_agent import run_recommendation_agent
+import contextvars
+import hashlib
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Dict, Any, Iterator
+from app.agents.recommendation_agent import run_recommendation_agent, format_agent_response
 from app.agents.llm_wrapper import format_conversational_response
 from app.agents.intent_parser import extract_intent
+from app.agents.intent_normalizer import normalize_genres
+from app.agents.intent_schema import RecommendationIntent
 from app.ml.recommender_interface import get_hybrid_recommendations
+from app.agents.llm_cache import llm_response_cache, make_key as make_llm_cache_key
+from app.agents.conversation_store import ConversationState, conversation_store
+from app.core.config import (
+    CHAT_CONCURRENT_MODE,
+    CHAT_INTENT_WAIT_SECONDS,
+    CHAT_LATENCY_BUDGET_SECONDS,
+    CHAT_WORKERS,
+)
+from app.core.monitoring import CHAT_DEADLINE_MISSES, CHAT_RESPONSES, CHAT_SESSION_REQUESTS, CHAT_SPECULATION
+
+CHAT_MODEL = "llama-3.3-70b-versatile"
+
+# Background work for the concurrent mode. LLM calls (intent extraction, formatting) keep
+# running past a missed deadline, so they get their own pool and retrieval work (the
+# trending fallback) never queues behind them. Tasks never wait on tasks of their own pool.
+_llm_pool = ThreadPoolExecutor(max_workers=CHAT_WORKERS, thread_name_prefix="chat-llm")
+_retrieval_pool = ThreadPoolExecutor(max_workers=CHAT_WORKERS, thread_name_prefix="chat-retrieval")
+
+
+def _submit(pool: ThreadPoolExecutor, fn, *args, **kwargs):
+    """Runs fn on `pool` inside a copy of the caller's context (unit of work, Server-Timing)."""
+    return pool.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
 
 def run_conversational_agent(user_id: int, message: str, genres: list[str] | None = None, top_n: int = 10) -> Dict[str, Any]:
     """
@@ -11,167 +41,421 @@ def run_conversational_agent(user_id: int, message: str, genres: list[str] | Non
     """
     return run_recommendation_agent(user_id, message, genres=genres, top_n=top_n)
 
-def run_conversational_agent_llm(user_id: int, message: str, chat_history: list[dict[str, str]] | None = None) -> Dict[str, Any]:
+def run_conversational_agent_llm(
+    user_id: int,
+    message: str,
+    chat_history: list[dict[str, str]] | None = None,
+    session_id: str | None = None
+) -> Dict[str, Any]:
     """
     Single-pass Conversational Agent (Simplified Architecture).
     1. Parses user message for hard filters (genres, runtime, etc.).
     2. Fetches exactly 10 personalized recommendations meeting those filters.
     3. LLM formats the response and asks a follow-up.
+    With CHAT_CONCURRENT_MODE the same steps run through _run_concurrent instead.
+
+    Conversation state lives server-side under the returned session_id: pass it back
+    and only the new message is parsed (chat_history is only read to seed a new session).
+    The reply's "source" says how it was produced: llm, deadline_fallback,
+    error_fallback, no_candidates or unavailable.
     """
-    import json
-    from app.agents.groq_client import get_groq_client, GROQ_MODEL
+    from app.agents.nlp_parser import parse_user_filters
+
+    state = conversation_store.open(session_id, user_id, chat_history, parse=parse_user_filters)
+    reply = _run_turn(user_id, message, state)
+    CHAT_RESPONSES.labels(source=reply["source"]).inc()
+    state.record_turn(message, reply["reply"])
+    conversation_store.save(state)
+    return {**reply, "session_id": state.session_id}
+
+
+def _run_turn(user_id: int, message: str, state: ConversationState) -> Dict[str, Any]:
     from app.agents.nlp_parser import parse_user_filters
     
     try:
-        # 1. Parse rules from message (incorporating history context)
-        history_lines = []
-        if chat_history:
-            # User specified "Last 3 chat messages"
-            history_lines = [msg for msg in chat_history[-3:]]
-        
-        # Text for the NLP parser to extract filters from previous context + current
-        history_text_for_parser = " ".join([m.get("content", "") for m in history_lines if m.get("role") == "user"])
-        full_context = history_text_for_parser + " " + message
-        filters = parse_user_filters(full_context)
+        # 1. Parse rules from the new message and merge them with the session's earlier turns
+        filters = state.apply(message, parse_user_filters(message))
         print(f"DEBUG: Filters extracted: {filters}")
-        
-        # Text for the LLM prompt to see context
-        formatted_history = ""
-        if history_lines:
-            lines = [f"{m.get('role').capitalize()}: {m.get('content')}" for m in history_lines]
-            formatted_history = "\nRecent History:\n" + "\n".join(lines) + "\n"
+
+        if CHAT_CONCURRENT_MODE:
+            return _run_concurrent(user_id, message, state, filters)
         
         # 2. Get a STRICT candidate pool of 10 movies matching the parsed filters
-        raw_candidates = get_hybrid_recommendations(
-            user_id=user_id, 
-            top_n=10,
-            genres=filters.get("genres"),
-            max_runtime=filters.get("max_runtime"),
-            min_score=filters.get("min_score"),
-            max_score=filters.get("max_score"),
-            language=filters.get("language"),
-            min_year=filters.get("min_year")
-        )
-        
-        # 2b. Smart Fallback if no exact matches found
-        has_exact_matches = True
-        if not raw_candidates:
-            has_exact_matches = False
-            # Fallback to a MIX of personalized and trending to ensure diversity
-            # 1. Fetch 5 personalized picks based on taste
-            taste_candidates = get_hybrid_recommendations(user_id=user_id, top_n=5)
-            
-            # 2. Fetch 5 globally trending movies (Popularity-based) to break genre bias
-            trending_candidates = get_hybrid_recommendations(user_id=user_id, top_n=5, preferred_strategy="popularity-based")
-            
-            raw_candidates = taste_candidates + trending_candidates
-            import random
-            random.shuffle(raw_candidates)
-        
-        # CRITICAL: Normalize keys: ensure 'movie_id' exists across ALL strategies
-        candidates = []
-        for rec in raw_candidates:
-            # Re-map 'id' to 'movie_id' if needed
-            mid = rec.get("movie_id") or rec.get("id")
-            if mid:
-                rec["movie_id"] = mid
-                candidates.append(rec)
-        
+        candidates, has_exact_matches = _retrieve_candidates(user_id, filters, state=state)
         if not candidates:
-            # Absolute failure (no ratings at all, etc.)
+            return _no_candidates_reply()
+
+        # 3. LLM Task: Format Response Only (No logic/filtering)
+        prompt = _build_prompt(message, state.formatted_history(), candidates, has_exact_matches)
+        data = llm_response_cache.get_or_compute(
+            _llm_cache_key(filters, candidates, has_exact_matches, prompt), lambda: _call_llm(prompt)
+        )
+        return _llm_reply(data, candidates)
+
+    except Exception as e:
+        print(f"⚠️ [Conversational Agent Logic Error]: {e}")
+        # Final fallback to deterministic if the LLM crashes or anything else goes wrong
+        try:
+            deterministic_result = run_conversational_agent(user_id, message, top_n=5)
+            return {
+                "reply": f"I had a little trouble understanding that, but here are some general recommendations: {deterministic_result['response']}",
+                "movies": deterministic_result["recommendations"],
+                "follow_up": "Want to try searching for something else?",
+                "source": "error_fallback"
+            }
+        except Exception as nested_e:
+            print(f"⚠️ [Conversational Agent Double Fallback Failed]: {nested_e}")
             return {
-                "reply": "I'm having a hard time finding movies for you! Try rating a few favorites first so I can learn your taste.",
+                "reply": "I'm experiencing some technical difficulties! Please try again in a moment.",
                 "movies": [],
-                "follow_up": "Want to try searching for something else?"
+                "follow_up": "Try searching by genre like 'comedy' or 'drama'?",
+                "source": "unavailable"
             }
 
-        # Prepare candidate string for LLM
-        candidate_lines = []
-        for c in candidates:
-            # Explicitly include the audience score so the LLM knows it is respecting the "below 6" filter
-            line = f"ID: {c['movie_id']} | Title: {c['title']} | Genres: {', '.join(c.get('genres', []))} | Runtime: {c.get('runtime')}m | Rating: {c.get('audience_score')}/10"
-            candidate_lines.append(line)
+
+def stream_conversational_agent_llm(
+    user_id: int,
+    message: str,
+    chat_history: list[dict[str, str]] | None = None,
+    session_id: str | None = None
+) -> Iterator[tuple[str, dict]]:
+    """
+    Streaming variant of run_conversational_agent_llm.
+    Candidates are retrieved before this returns, so a response can start at DB latency;
+    the iterator then yields ("movies", ...) with all the candidate cards and the
+    session_id, ("token", ...) events as the LLM writes the narrative, and ("done", ...)
+    with the full reply and its source (llm, error_fallback, no_candidates), counted in
+    CHAT_RESPONSES like the JSON path.
+    If the LLM fails before its first token, the deterministic agent's text is sent instead.
+    """
+    from app.agents.nlp_parser import parse_user_filters
+
+    state = conversation_store.open(session_id, user_id, chat_history, parse=parse_user_filters)
+    filters = state.apply(message, parse_user_filters(message))
+    retrieval_failed = False
+    try:
+        candidates, has_exact_matches = _retrieve_candidates(user_id, filters, parallel=CHAT_CONCURRENT_MODE, state=state)
+    except Exception as e:
+        print(f"⚠️ [Conversational Agent Stream Error]: {e}")
+        candidates, has_exact_matches, retrieval_failed = [], False, True
+    return _stream_events(message, state, candidates, has_exact_matches, retrieval_failed)
+
+
+def _stream_events(
+    message: str,
+    state: ConversationState,
+    candidates: list[dict],
+    has_exact_matches: bool,
+    retrieval_failed: bool = False
+) -> Iterator[tuple[str, dict]]:
+    parts = []
+    try:
+        yield "movies", {"movies": candidates, "exact_matches": has_exact_matches, "session_id": state.session_id}
+        if not candidates:
+            reply = _no_candidates_reply()
+            source = "error_fallback" if retrieval_failed else reply["source"]
+            parts.append(reply["reply"])
+            yield "token", {"text": reply["reply"]}
+            CHAT_RESPONSES.labels(source=source).inc()
+            yield "done", {"reply": reply["reply"], "follow_up": reply["follow_up"], "source": source}
+            return
+
+        prompt = _build_prompt(message, state.formatted_history(), candidates, has_exact_matches, streaming=True)
+        source = "llm"
+        try:
+            for text in _stream_llm(prompt):
+                parts.append(text)
+                yield "token", {"text": text}
+        except Exception as e:
+            print(f"⚠️ [Conversational Agent Stream Error]: {e}")
+            source = "error_fallback"
+            if not parts:
+                text = format_agent_response(candidates[:5])["response"]
+                parts.append(text)
+                yield "token", {"text": text}
+        CHAT_RESPONSES.labels(source=source).inc()
+        yield "done", {"reply": "".join(parts), "source": source}
+    finally:
+        # Also when the client disconnects mid-stream: keep whatever was said
+        state.record_turn(message, "".join(parts))
+        conversation_store.save(state)
+
+
+def _run_concurrent(user_id: int, message: str, state: ConversationState, filters: dict) -> Dict[str, Any]:
+    """
+    Concurrent orchestration of the same pipeline:
+    - extract_intent runs on the LLM pool while candidates are retrieved and the LLM
+      formatting call is started speculatively on the regex filters; both are redone
+      only if the intent adds filters the regex parser missed.
+    - The personalized and trending fallbacks are fetched in parallel (trending only
+      until the deadline).
+    - The answer is awaited until CHAT_LATENCY_BUDGET_SECONDS have passed; past that the
+      deterministic agent's answer for the same candidates is returned (the LLM call
+      keeps running and still fills the LLM cache).
+    """
+    started = time.monotonic()
+    deadline = started + CHAT_LATENCY_BUDGET_SECONDS
+    formatted_history = state.formatted_history()
+    intent_future = _submit(_llm_pool, extract_intent, state.context_text(message))
+
+    candidates, has_exact_matches = _retrieve_candidates(user_id, filters, parallel=True, state=state, deadline=deadline)
+    llm_future = _start_llm(message, formatted_history, filters, candidates, has_exact_matches)
+
+    try:
+        intent_deadline = min(started + CHAT_INTENT_WAIT_SECONDS, deadline)
+        intent = intent_future.result(timeout=max(0.0, intent_deadline - time.monotonic()))
+    except FutureTimeout:
+        CHAT_DEADLINE_MISSES.labels(stage="intent").inc()
+        CHAT_SPECULATION.labels(result="intent_timeout").inc()
+        intent = None
+
+    merged = _merge_intent(filters, intent) if intent is not None else filters
+    if merged != filters:
+        CHAT_SPECULATION.labels(result="discarded").inc()
+        filters = state.refine(merged)
+        candidates, has_exact_matches = _retrieve_candidates(user_id, filters, parallel=True, state=state, deadline=deadline)
+        llm_future = _start_llm(message, formatted_history, filters, candidates, has_exact_matches)
+    elif intent is not None:
+        CHAT_SPECULATION.labels(result="used").inc()
+
+    if llm_future is None:
+        return _no_candidates_reply()
+
+    try:
+        data = llm_future.result(timeout=max(0.0, deadline - time.monotonic()))
+    except FutureTimeout:
+        CHAT_DEADLINE_MISSES.labels(stage="llm").inc()
+        print(f"⚠️ [Conversational Agent] LLM missed the {CHAT_LATENCY_BUDGET_SECONDS}s budget, answering deterministically")
+        deterministic_result = format_agent_response(candidates[:5])
+        return {
+            "reply": deterministic_result["response"],
+            "movies": deterministic_result["recommendations"],
+            "follow_up": "Want me to narrow it down further?",
+            "source": "deadline_fallback"
+        }
+    return _llm_reply(data, candidates)
+
+
+def _start_llm(message: str, formatted_history: str, filters: dict, candidates: list[dict], has_exact_matches: bool):
+    """Submits the (cached) LLM formatting call for these candidates; None when there are none."""
+    if not candidates:
+        return None
+    prompt = _build_prompt(message, formatted_history, candidates, has_exact_matches)
+    return _submit(
+        _llm_pool,
+        llm_response_cache.get_or_compute,
+        _llm_cache_key(filters, candidates, has_exact_matches, prompt),
+        lambda: _call_llm(prompt)
+    )
+
+
+# ─── Pipeline steps ───────────────────────────────────────────
+def _merge_intent(filters: dict, intent: RecommendationIntent) -> dict:
+    """Fills the filters the regex parser left empty from the LLM intent; never overrides them."""
+    merged = dict(filters)
+    if not merged.get("genres") and intent.genres:
+        merged["genres"] = normalize_genres(intent.genres)
+    if merged.get("max_runtime") is None and intent.max_runtime:
+        merged["max_runtime"] = intent.max_runtime
+    if merged.get("min_score") is None and intent.min_score:
+        merged["min_score"] = intent.min_score
+    if merged.get("language") is None and intent.language and len(intent.language) == 2:
+        merged["language"] = intent.language.lower()
+    return merged
+
+
+def _retrieve_candidates(
+    user_id: int,
+    filters: dict,
+    parallel: bool = False,
+    state: ConversationState | None = None,
+    deadline: float | None = None
+) -> tuple[list[dict], bool]:
+    """
+    Candidate pool for the filters and whether it matched them exactly (else the taste/trending mix).
+    With a session, a refinement of its last pool is answered locally and the new pool is remembered.
+    With `parallel` the trending half of the fallback is fetched alongside the personalized half;
+    past `deadline` (time.monotonic()) it is left out.
+    """
+    if state is not None and state.pool:
+        local = state.reusable_pool(filters)
+        CHAT_SESSION_REQUESTS.labels(result="pool_reused" if local is not None else "pool_refetched").inc()
+        if local is not None:
+            state.remember_pool(filters, local, True)
+            return local, True
+
+    raw_candidates = get_hybrid_recommendations(
+        user_id=user_id, 
+        top_n=10,
+        genres=filters.get("genres"),
+        max_runtime=filters.get("max_runtime"),
+        min_score=filters.get("min_score"),
+        max_score=filters.get("max_score"),
+        language=filters.get("language"),
+        min_year=filters.get("min_year")
+    )
+    
+    # 2b. Smart Fallback if no exact matches found
+    has_exact_matches = True
+    if not raw_candidates:
+        has_exact_matches = False
+        # Fallback to a MIX of personalized and trending to ensure diversity
+        # Trending = 5 globally popular movies (Popularity-based) to break genre bias
+        trending_future = _submit(_retrieval_pool, get_hybrid_recommendations, user_id=user_id, top_n=5, preferred_strategy="popularity-based") if parallel else None
+
+        # 5 personalized picks based on taste
+        taste_candidates = get_hybrid_recommendations(user_id=user_id, top_n=5)
         
-        candidate_text = "\n".join(candidate_lines)
-        print(f"DEBUG: Prompt preparation complete.")
+        if trending_future is not None:
+            try:
+                timeout = max(0.0, deadline - time.monotonic()) if deadline is not None else None
+                trending_candidates = trending_future.result(timeout=timeout)
+            except FutureTimeout:
+                CHAT_DEADLINE_MISSES.labels(stage="trending").inc()
+                trending_candidates = []
+        else:
+            trending_candidates = get_hybrid_recommendations(user_id=user_id, top_n=5, preferred_strategy="popularity-based")
+        
+        raw_candidates = taste_candidates + trending_candidates
+        random.shuffle(raw_candidates)
+    
+    # CRITICAL: Normalize keys: ensure 'movie_id' exists across ALL strategies
+    candidates = []
+    for rec in raw_candidates:
+        # Re-map 'id' to 'movie_id' if needed
+        mid = rec.get("movie_id") or rec.get("id")
+        if mid:
+            rec["movie_id"] = mid
+            candidates.append(rec)
+    if state is not None:
+        state.remember_pool(filters, candidates, has_exact_matches)
+    return candidates, has_exact_matches
 
-        # 3. LLM Task: Format Response Only (No logic/filtering)
-        # If no exact matches were found, we tell the LLM so it can manage expectations
-        context_note = ""
-        if not has_exact_matches:
-            context_note = "NOTE: NONE of the user's filtered criteria matched our database. The movies provided below are general personalized recommendations based on their overall taste. Politely explain that we don't have exactly what they asked for, and offer these others instead."
 
-        prompt = f"""You are a friendly, highly intelligent movie concierge for 'FilmBox'.
-You NEVER invent movies.
-You ONLY use the provided movie list.
-Format response clearly and briefly.
-{context_note}
-{formatted_history}
-User Message: "{message}"
+def _no_candidates_reply() -> Dict[str, Any]:
+    # Absolute failure (no ratings at all, etc.)
+    return {
+        "reply": "I'm having a hard time finding movies for you! Try rating a few favorites first so I can learn your taste.",
+        "movies": [],
+        "follow_up": "Want to try searching for something else?",
+        "source": "no_candidates"
+    }
 
-Structured movie list returned by the backend:
-{candidate_text}
 
-INSTRUCTIONS:
+def _build_prompt(message: str, formatted_history: str, candidates: list[dict], has_exact_matches: bool, streaming: bool = False) -> str:
+    # Prepare candidate string for LLM
+    candidate_lines = []
+    for c in candidates:
+        # Explicitly include the audience score so the LLM knows it is respecting the "below 6" filter
+        line = f"ID: {c['movie_id']} | Title: {c['title']} | Genres: {', '.join(c.get('genres', []))} | Runtime: {c.get('runtime')}m | Rating: {c.get('audience_score')}/10"
+        candidate_lines.append(line)
+    
+    candidate_text = "\n".join(candidate_lines)
+    print(f"DEBUG: Prompt preparation complete.")
+
+    # If no exact matches were found, we tell the LLM so it can manage expectations
+    context_note = ""
+    if not has_exact_matches:
+        context_note = "NOTE: NONE of the user's filtered criteria matched our database. The movies provided below are general personalized recommendations based on their overall taste. Politely explain that we don't have exactly what they asked for, and offer these others instead."
+
+    if streaming:
+        # The movie cards are already on screen; the narrative is shown as it is generated
+        output_format = """INSTRUCTIONS:
+1. Write a friendly, conversational paragraph responding to the user.
+2. IMPORTANT: You MUST explicitly mention the titles of at least 2-3 movies from the provided list.
+3. End with a short clarifying follow-up question.
+
+Reply in plain text only: no JSON, no lists, no movie IDs.
+"""
+    else:
+        output_format = """INSTRUCTIONS:
 1. Write a friendly, conversational paragraph (the "reply") responding to the user.
 2. IMPORTANT: You MUST explicitly mention the titles of at least 2-3 movies from the provided list in your reply.
 3. Ask a short clarifying follow-up question.
 4. Provide the integer IDs of the movies in the "movie_ids" field.
 
 You MUST return ONLY valid JSON in this exact schema:
-{{
+{
     "reply": "I see you like thrillers! You should check out 'Rear Window' and 'Saboteur'...",
     "movie_ids": [123, 456],
     "follow_up": "Want something shorter?"
-}}
+}
 """
 
-        # Use strictly llama-3.3-70b-versatile for high quality formatting
-        client = get_groq_client()
-        response = client.chat.completions.create(
-            messages=[{"role": "user", "content": prompt}],
-            model="llama-3.3-70b-versatile",
-            temperature=0.3,
-            max_completion_tokens=400,
-            response_format={"type": "json_object"},
-            timeout=10.0 # Strict timeout for performance as requested
-        )
-        
-        raw_text = response.choices[0].message.content
-        data = json.loads(raw_text)
-        print(f"DEBUG: LLM call successful.")
-        
-        narrative = data.get("reply", "Here are some movies I found for you.")
-        follow_up = data.get("follow_up", "")
-        selected_ids = data.get("movie_ids", [])
-        
-        # Map IDs back to full movie dicts (Preserve metadata for UI)
-        final_movies = [c for c in candidates if c["movie_id"] in selected_ids]
-        
-        # If LLM didn't select IDs properly or empty, use all 10
-        if not final_movies:
-            final_movies = candidates
+    return f"""You are a friendly, highly intelligent movie concierge for 'FilmBox'.
+You NEVER invent movies.
+You ONLY use the provided movie list.
+Format response clearly and briefly.
+{context_note}
+{formatted_history}
+User Message: "{message}"
 
-        return {
-            "reply": narrative,
-            "movies": final_movies,
-            "follow_up": follow_up
-        }
+Structured movie list returned by the backend:
+{candidate_text}
 
-    except Exception as e:
-        print(f"⚠️ [Conversational Agent Logic Error]: {e}")
-        # Final fallback to deterministic if the LLM crashes or anything else goes wrong
-        try:
-            deterministic_result = run_conversational_agent(user_id, message, top_n=5)
-            return {
-                "reply": f"I had a little trouble understanding that, but here are some general recommendations: {deterministic_result['response']}",
-                "movies": deterministic_result["recommendations"],
-                "follow_up": "Want to try searching for something else?"
-            }
-        except Exception as nested_e:
-            print(f"⚠️ [Conversational Agent Double Fallback Failed]: {nested_e}")
-            return {
-                "reply": "I'm experiencing some technical difficulties! Please try again in a moment.",
-                "movies": [],
-                "follow_up": "Try searching by genre like 'comedy' or 'drama'?"
-            }
+{output_format}"""
+
+
+def _llm_cache_key(filters: dict, candidates: list[dict], has_exact_matches: bool, prompt: str) -> str:
+    # Same prompt (message, history and candidate pool) -> same formatting job; reuse / coalesce it.
+    # The prompt quotes the user's message and history, so it must be part of the key:
+    # the cache is process-wide and a reply written for one conversation must not reach another.
+    return make_llm_cache_key(
+        filters, [c["movie_id"] for c in candidates], exact=has_exact_matches, model=CHAT_MODEL,
+        prompt=hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    )
+
+
+def _call_llm(prompt: str) -> dict:
+    import json
+    from app.agents.groq_client import get_groq_client, create_chat_completion
+
+    # Use strictly llama-3.3-70b-versatile for high quality formatting
+    client = get_groq_client()
+    response = create_chat_completion(
+        client,
+        messages=[{"role": "user", "content": prompt}],
+        model=CHAT_MODEL,
+        temperature=0.3,
+        max_completion_tokens=400,
+        response_format={"type": "json_object"},
+        timeout=10.0 # Strict timeout for performance as requested
+    )
+    raw_text = response.choices[0].message.content
+    data = json.loads(raw_text)
+    print(f"DEBUG: LLM call successful.")
+    return data
+
+
+def _stream_llm(prompt: str) -> Iterator[str]:
+    from app.agents.groq_client import get_groq_client, stream_chat_completion
+
+    client = get_groq_client()
+    yield from stream_chat_completion(
+        client,
+        messages=[{"role": "user", "content": prompt}],
+        model=CHAT_MODEL,
+        temperature=0.3,
+        max_completion_tokens=400,
+        timeout=10.0
+    )
+
+
+def _llm_reply(data: dict, candidates: list[dict]) -> Dict[str, Any]:
+    narrative = data.get("reply", "Here are some movies I found for you.")
+    follow_up = data.get("follow_up", "")
+    selected_ids = data.get("movie_ids", [])
+    
+    # Map IDs back to full movie dicts (Preserve metadata for UI)
+    final_movies = [c for c in candidates if c["movie_id"] in selected_ids]
+    
+    # If LLM didn't select IDs properly or empty, use all 10
+    if not final_movies:
+        final_movies = candidates
+
+    return {
+        "reply": narrative,
+        "movies": final_movies,
+        "follow_up": follow_up,
+        "source": "llm"
+    }
@@ -1,12 +1,48 @@
+"""
+LLM client factory for the agents.
+get_groq_client returns the client of the configured LLM_BACKEND. A backend is a
+zero-argument factory returning an object with the Groq/OpenAI chat interface,
+client.chat.completions.create(model=..., messages=..., **kwargs), answering with
+.choices[0].message.content, or an iterator of .choices[0].delta.content chunks
+when stream=True. Built in: "groq" (the real API) and "stub" (local fake with
+configurable latency and failures, see stub_llm_client).
+"""
 import os
-from groq import Groq
+import random
+import time
+from typing import Callable
+
+from app.core.config import (
+    LLM_BACKEND,
+    LLM_STUB_DELAY_JITTER,
+    LLM_STUB_DELAY_MS,
+    LLM_STUB_FAILURE_RATE,
+    LLM_STUB_SEED,
+    LLM_STUB_TIMEOUT_RATE,
+    LLM_STUB_TOKEN_DELAY_MS,
+)
+from app.core.monitoring import LLM_CALLS, LLM_FIRST_TOKEN_LATENCY, stage_timer
 
 GROQ_MODEL = "llama-3.1-8b-instant"
 
+LLM_BACKENDS: dict[str, Callable] = {}
+
+
+def register_llm_backend(name: str, factory: Callable):
+    LLM_BACKENDS[name] = factory
+
+
 def get_groq_client():
     """
-    Returns a configured Groq client.
+    Returns a configured client for LLM_BACKEND (a Groq client by default).
     """
+    factory = LLM_BACKENDS.get(LLM_BACKEND)
+    if factory is None:
+        raise RuntimeError(f"Unknown LLM_BACKEND {LLM_BACKEND!r} (expected one of {sorted(LLM_BACKENDS)})")
+    return factory()
+
+
+def _groq_backend():
     if os.getenv("ENABLE_LLM", "false").lower() != "true":
         raise RuntimeError("LLM is disabled via ENABLE_LLM flag.")
 
@@ -14,5 +50,66 @@ def get_groq_client():
     if not api_key:
         raise RuntimeError("GROQ_API_KEY not set in environment or .env")
 
+    from groq import Groq
     client = Groq(api_key=api_key.strip())
     return client
+
+
+_stub_rng = random.Random(LLM_STUB_SEED)
+
+
+def _stub_backend():
+    from app.agents.stub_llm_client import StubLLMClient
+    return StubLLMClient(
+        delay_seconds=LLM_STUB_DELAY_MS / 1000,
+        token_delay_seconds=LLM_STUB_TOKEN_DELAY_MS / 1000,
+        jitter=LLM_STUB_DELAY_JITTER,
+        failure_rate=LLM_STUB_FAILURE_RATE,
+        timeout_rate=LLM_STUB_TIMEOUT_RATE,
+        rng=_stub_rng
+    )
+
+
+register_llm_backend("groq", _groq_backend)
+register_llm_backend("stub", _stub_backend)
+
+
+def create_chat_completion(client, **kwargs):
+    """
+    client.chat.completions.create, counted in filmbox_llm_calls_total and timed
+    as the "llm" stage.
+    """
+    with stage_timer("llm"):
+        try:
+            response = client.chat.completions.create(**kwargs)
+        except Exception:
+            LLM_CALLS.labels(status="error").inc()
+            raise
+    LLM_CALLS.labels(status="success").inc()
+    return response
+
+
+def stream_chat_completion(client, **kwargs):
+    """
+    Streamed client.chat.completions.create (stream=True); yields the content deltas.
+    Counted like create_chat_completion; the time to the first token goes to
+    filmbox_llm_first_token_seconds and the whole stream to the "llm" stage.
+    """
+    started = time.perf_counter()
+    first_token = True
+    with stage_timer("llm"):
+        try:
+            for chunk in client.chat.completions.create(stream=True, **kwargs):
+                if not chunk.choices:
+                    continue
+                text = chunk.choices[0].delta.content
+                if not text:
+                    continue
+                if first_token:
+                    LLM_FIRST_TOKEN_LATENCY.observe(time.perf_counter() - started)
+                    first_token = False
+                yield text
+        except Exception:
+            LLM_CALLS.labels(status="error").inc()
+            raise
+    LLM_CALLS.labels(status="success").inc()
@@ -1,6 +1,6 @@
 import json
 import re
-from app.agents.groq_client import get_groq_client, GROQ_MODEL
+from app.agents.groq_client import get_groq_client, create_chat_completion, GROQ_MODEL
 from app.agents.intent_schema import RecommendationIntent
 
 def safe_parse_json(text: str) -> dict | None:
@@ -53,7 +53,8 @@ def extract_intent(message: str) -> RecommendationIntent:
     try:
         client = get_groq_client()
 
-        response = client.chat.completions.create(
+        response = create_chat_completion(
+            client,
             messages=[
                 {
                     "role": "user",
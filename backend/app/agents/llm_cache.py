@@ -0,0 +1,113 @@
+"""
+Response cache for the chat agent's LLM formatting call.
+Keyed by the normalized parsed filters, the candidate movie ids and a hash of the
+full prompt (which quotes the user's message and chat history, so a reply is only
+reused for the same conversation text), with TTL + LRU eviction. Concurrent identical
+requests are coalesced: one caller hits the LLM, the others wait for its result.
+"""
+import copy
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from app.core.config import LLM_CACHE_SIZE, LLM_CACHE_TTL
+from app.core.monitoring import LLM_CACHE_REQUESTS, LLM_RESPONSE_LATENCY
+
+FLIGHT_WAIT_SECONDS = 30.0  # followers give up (and call the LLM themselves) after this
+
+
+def make_key(filters: dict, candidate_ids: list, **extra) -> str:
+    """Order-insensitive for genres and candidates; empty filters are dropped."""
+    normalized = {}
+    for name, value in (filters or {}).items():
+        if value in (None, "", [], ()):
+            continue
+        if isinstance(value, (list, tuple, set)):
+            value = sorted(str(v).lower() for v in value)
+        elif isinstance(value, str):
+            value = value.lower()
+        normalized[name] = value
+    return json.dumps(
+        {"filters": normalized, "candidates": sorted(int(m) for m in candidate_ids), **extra},
+        sort_keys=True
+    )
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error: Exception | None = None
+
+
+class LLMResponseCache:
+    def __init__(self, ttl: float, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.entries: OrderedDict = OrderedDict()
+        self.in_flight: dict[str, _Flight] = {}
+        self.lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def get_or_compute(self, key: str, compute):
+        """Cached value for `key`, or compute() once for all concurrent callers. Errors are not cached."""
+        started = time.perf_counter()
+        if not self.enabled:
+            value = compute()
+            LLM_RESPONSE_LATENCY.labels(source="llm").observe(time.perf_counter() - started)
+            return value
+
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] > time.time():
+                self.entries.move_to_end(key)
+                LLM_CACHE_REQUESTS.labels(result="hit").inc()
+                LLM_RESPONSE_LATENCY.labels(source="cache").observe(time.perf_counter() - started)
+                return copy.deepcopy(entry[1])
+            if entry is not None:
+                del self.entries[key]
+            flight = self.in_flight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self.in_flight[key] = _Flight()
+
+        if not leader:
+            LLM_CACHE_REQUESTS.labels(result="coalesced").inc()
+            if flight.done.wait(FLIGHT_WAIT_SECONDS) and flight.error is None:
+                LLM_RESPONSE_LATENCY.labels(source="coalesced").observe(time.perf_counter() - started)
+                return copy.deepcopy(flight.value)
+            if flight.error is not None:
+                raise flight.error
+            value = compute()
+            LLM_RESPONSE_LATENCY.labels(source="llm").observe(time.perf_counter() - started)
+            return value
+
+        LLM_CACHE_REQUESTS.labels(result="miss").inc()
+        try:
+            value = compute()
+            flight.value = value
+            with self.lock:
+                self.entries[key] = (time.time() + self.ttl, copy.deepcopy(value))
+                self.entries.move_to_end(key)
+                while len(self.entries) > self.max_size:
+                    self.entries.popitem(last=False)
+            LLM_RESPONSE_LATENCY.labels(source="llm").observe(time.perf_counter() - started)
+            return copy.deepcopy(value)
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self.lock:
+                self.in_flight.pop(key, None)
+            flight.done.set()
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+llm_response_cache = LLMResponseCache(ttl=LLM_CACHE_TTL, max_size=LLM_CACHE_SIZE)
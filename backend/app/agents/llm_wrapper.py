@@ -1,5 +1,5 @@
 from typing import List, Dict
-from app.agents.groq_client import get_groq_client, GROQ_MODEL
+from app.agents.groq_client import get_groq_client, create_chat_completion, GROQ_MODEL
 
 def format_movie_details_response(movie, user_message: str) -> str | None:
     """
@@ -24,7 +24,8 @@ def format_movie_details_response(movie, user_message: str) -> str | None:
 
     try:
         client = get_groq_client()
-        response = client.chat.completions.create(
+        response = create_chat_completion(
+            client,
             messages=[
                 {
                     "role": "user",
@@ -74,7 +75,8 @@ def format_conversational_response(recommendations: List[Dict], user_message: st
     # 2. Call Gemini via modular utility
     try:
         client = get_groq_client()
-        response = client.chat.completions.create(
+        response = create_chat_completion(
+            client,
             messages=[
                 {
                     "role": "user",
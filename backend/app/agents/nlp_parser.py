@@ -53,78 +53,110 @@ LANGUAGE_MAP = {
     "portuguese": "pt"
 }
 
+# ─── Compiled tokenizer ───────────────────────────────────────
+def _alternation(keywords) -> str:
+    # Longest first so e.g. "dramas" is tried before "drama"
+    return "|".join(re.escape(kw) for kw in sorted(keywords, key=len, reverse=True))
+
+
+DECADE_MIN_YEAR = {"90s": 1990, "80s": 1980, "2000s": 2000}  # checked in this order
+
+# Every filter cue as one alternation, wrapped in a lookahead so matches may overlap
+# ("under 90 min" is both a runtime and a score bound) and one finditer pass over the
+# message finds them all. Cues of different kinds never start at the same offset,
+# except "under", which is a runtime and a score cue at once and has its own branch.
+FILTER_TOKENS = re.compile(
+    r"(?=(?:"
+    r"\b(?P<genre>" + _alternation(GENRE_MAP) + r")(?:s|es|ies)?\b"
+    r"|\b(?P<language>" + _alternation(LANGUAGE_MAP) + r")\b"
+    r"|under(?P<under_space>\s*)(?P<under>\d+(?:\.\d+)?)(?:\s*(?P<under_unit>hour|min))?"
+    r"|(?:below|less than|worse than)\s*(?P<below>\d+(?:\.\d+)?)"
+    r"|(?:above|over|more than|better than|greater than)\s*(?P<above>\d+(?:\.\d+)?)"
+    r"|(?:after|since|from)\s*(?P<year>\d{4})"
+    r"|\b(?P<decade>" + _alternation(DECADE_MIN_YEAR) + r")\b"
+    r"|(?P<flag>short|newer|recent|good|great|highly rated|bad|flop|poorly rated)"
+    r"))"
+)
+LANGUAGE_RANK = {kw: i for i, kw in enumerate(LANGUAGE_MAP)}  # first keyword in LANGUAGE_MAP wins
+DECADE_RANK = {kw: i for i, kw in enumerate(DECADE_MIN_YEAR)}
+
+
 def parse_user_filters(message: str) -> dict:
     """
     Extracts deterministic filters from a user message.
     Returns a dict with: genres, max_runtime, min_year, language, min_score
+    One pass of FILTER_TOKENS; same results as the keyword-by-keyword parser it
+    replaced (python -m app.scripts.check_filter_parser checks this).
     """
-    msg_lower = message.lower()
+    genres = {}
+    language = None
+    hours = minutes = year = decade = above = below = None
+    flags = set()
+
+    for match in FILTER_TOKENS.finditer(message.lower()):
+        if match["genre"]:
+            genres.setdefault(GENRE_MAP[match["genre"]])
+        elif match["language"]:
+            if language is None or LANGUAGE_RANK[match["language"]] < LANGUAGE_RANK[language]:
+                language = match["language"]
+        elif match["under"]:
+            if below is None:
+                below = match["under"]
+            # Runtime cues need exactly "under <n>" and whole minutes
+            if match["under_space"] == " ":
+                if match["under_unit"] == "hour" and hours is None:
+                    hours = match["under"]
+                elif match["under_unit"] == "min" and minutes is None and "." not in match["under"]:
+                    minutes = match["under"]
+        elif match["below"]:
+            if below is None:
+                below = match["below"]
+        elif match["above"]:
+            if above is None:
+                above = match["above"]
+        elif match["year"]:
+            if year is None:
+                year = match["year"]
+        elif match["decade"]:
+            if decade is None or DECADE_RANK[match["decade"]] < DECADE_RANK[decade]:
+                decade = match["decade"]
+        elif match["flag"]:
+            flags.add(match["flag"])
+
     filters = {
-        "genres": [],
+        "genres": list(genres),
         "max_runtime": None,
         "min_year": None,
-        "language": None,
+        "language": LANGUAGE_MAP[language] if language else None,
         "min_score": None,
         "max_score": None
     }
 
-    # 1. Parse Genres
-    extracted_genres = set()
-    for kw, genre in GENRE_MAP.items():
-        # Allow optional plural s or es
-        if re.search(r'\b' + kw + r'(?:s|es|ies)?\b', msg_lower):
-            extracted_genres.add(genre)
-    if extracted_genres:
-        filters["genres"] = list(extracted_genres)
-
-    # 2. Parse Language
-    for kw, lang_code in LANGUAGE_MAP.items():
-        if re.search(r'\b' + kw + r'\b', msg_lower):
-            filters["language"] = lang_code
-            break # Just take the first one found
-
-    # 3. Parse Runtime
-    if "short" in msg_lower:
+    # Runtime: minutes beat hours beat "short"
+    if minutes is not None:
+        filters["max_runtime"] = int(minutes)
+    elif hours is not None:
+        filters["max_runtime"] = int(float(hours) * 60)
+    elif "short" in flags:
         filters["max_runtime"] = 100
-        
-    # under X hours / mins
-    hr_match = re.search(r'under (\d+(?:\.\d+)?)\s*hour', msg_lower)
-    if hr_match:
-        filters["max_runtime"] = int(float(hr_match.group(1)) * 60)
-        
-    min_match = re.search(r'under (\d+)\s*min', msg_lower)
-    if min_match:
-        filters["max_runtime"] = int(min_match.group(1))
 
-    # 4. Parse Year
-    if "newer" in msg_lower or "recent" in msg_lower:
+    # Year: a decade beats an explicit year, which beats "newer"/"recent"
+    if decade is not None:
+        filters["min_year"] = DECADE_MIN_YEAR[decade]
+    elif year is not None:
+        filters["min_year"] = int(year)
+    elif flags & {"newer", "recent"}:
         filters["min_year"] = 2015
-        
-    year_match = re.search(r'(?:after|since|from)\s*(\d{4})', msg_lower)
-    if year_match:
-        filters["min_year"] = int(year_match.group(1))
-        
-    # Decade match (e.g., 90s, 80s)
-    if re.search(r'\b90s\b', msg_lower):
-        filters["min_year"] = 1990
-    elif re.search(r'\b80s\b', msg_lower):
-        filters["min_year"] = 1980
-    elif re.search(r'\b2000s\b', msg_lower):
-        filters["min_year"] = 2000
 
-    # 5. Parse Ratings
-    # Above / Min Score
-    above_match = re.search(r'(?:above|over|more than|better than|greater than)\s*(\d+(?:\.\d+)?)', msg_lower)
-    if above_match:
-        filters["min_score"] = float(above_match.group(1))
-    elif "good" in msg_lower or "great" in msg_lower or "highly rated" in msg_lower:
+    # Ratings: explicit bounds beat the quality words
+    if above is not None:
+        filters["min_score"] = float(above)
+    elif flags & {"good", "great", "highly rated"}:
         filters["min_score"] = 7.0
-        
-    # Below / Max Score
-    below_match = re.search(r'(?:below|under|less than|worse than)\s*(\d+(?:\.\d+)?)', msg_lower)
-    if below_match:
-        filters["max_score"] = float(below_match.group(1))
-    elif "bad" in msg_lower or "flop" in msg_lower or "poorly rated" in msg_lower:
+
+    if below is not None:
+        filters["max_score"] = float(below)
+    elif flags & {"bad", "flop", "poorly rated"}:
         filters["max_score"] = 5.0
         
     return filters
@@ -1,5 +1,5 @@
 from typing import Dict, Any, List
-from app.ml.recommender_interface import get_hybrid_recommendations
+from app.ml.recommender_interface import get_hybrid_recommendations, get_hybrid_recommendations_async
 
 
 def run_recommendation_agent(user_id: int, message: str, genres: list[str] | None = None, top_n: int = 10) -> Dict[str, Any]:
@@ -9,7 +9,17 @@ def run_recommendation_agent(user_id: int, message: str, genres: list[str] | Non
     """
 
     recommendations = get_hybrid_recommendations(user_id, genres=genres, top_n=top_n)
+    return format_agent_response(recommendations)
 
+
+async def run_recommendation_agent_async(user_id: int, message: str, genres: list[str] | None = None, top_n: int = 10) -> Dict[str, Any]:
+    """Async variant of run_recommendation_agent for async routes."""
+    recommendations = await get_hybrid_recommendations_async(user_id, genres=genres, top_n=top_n)
+    return format_agent_response(recommendations)
+
+
+def format_agent_response(recommendations: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """The deterministic agent's answer for an already-retrieved recommendation list."""
     if not recommendations:
         return {
             "response": "I don’t have enough information yet. Try rating a few movies first.",
@@ -0,0 +1,118 @@
+"""
+Local stand-in for the Groq client (LLM_BACKEND=stub).
+Answers client.chat.completions.create(...) with canned content shaped like the
+real responses, so the chat agent can be exercised and load-tested without
+network access or an API key. With stream=True the content comes back word by
+word, token_delay_seconds apart, as delta chunks.
+
+Latency is lognormal around delay_seconds (jitter is its sigma; 0 = fixed).
+A failure_rate share of calls raise StubLLMError after that latency and a
+timeout_rate share hang for the request's timeout and raise TimeoutError.
+Draws come from one seeded generator, so a run with the same seed and the same
+call order sees the same latencies and failures.
+"""
+import json
+import math
+import random
+import re
+import threading
+import time
+from types import SimpleNamespace
+
+CANDIDATE_LINE = re.compile(r"^ID: (\d+) \| Title: ([^|]+?) \|", re.MULTILINE)
+
+
+class StubLLMError(Exception):
+    """Injected failure, standing in for an API error from the provider."""
+
+
+class _Completions:
+    def __init__(self, client: "StubLLMClient"):
+        self.client = client
+
+    def create(self, messages: list[dict], response_format: dict | None = None, stream: bool = False, **kwargs):
+        prompt = messages[-1]["content"]
+        if response_format and response_format.get("type") == "json_object":
+            content = json.dumps(_json_answer(prompt))
+        else:
+            content = _text_answer(prompt)
+        outcome, delay = self.client.draw(kwargs.get("timeout"))
+        if stream:
+            return self._stream(content, outcome, delay)
+        self._wait(outcome, delay)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+    @staticmethod
+    def _wait(outcome: str, delay: float):
+        time.sleep(delay)
+        if outcome == "timeout":
+            raise TimeoutError("stub LLM: request timed out")
+        if outcome == "error":
+            raise StubLLMError("stub LLM: injected failure")
+
+    def _stream(self, content: str, outcome: str, delay: float):
+        self._wait(outcome, delay)
+        for i, word in enumerate(content.split(" ")):
+            if i:
+                time.sleep(self.client.token_delay_seconds)
+            text = word if i == 0 else " " + word
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+
+def _json_answer(prompt: str) -> dict:
+    if "intent extraction engine" in prompt:
+        return {
+            "intent": "recommend_movie", "genres": [], "mood": None, "time_context": None,
+            "movie_title": None, "max_runtime": None, "min_score": None, "language": None, "quantity": None
+        }
+    picks = CANDIDATE_LINE.findall(prompt)[:3]
+    return {
+        "reply": f"You might enjoy {_titles(picks)}.",
+        "movie_ids": [int(movie_id) for movie_id, _ in picks],
+        "follow_up": "Want something shorter?"
+    }
+
+
+def _text_answer(prompt: str) -> str:
+    picks = CANDIDATE_LINE.findall(prompt)[:3]
+    if not picks:
+        return "This one is a crowd favourite with a memorable story."
+    return f"You might enjoy {_titles(picks)}. Want something shorter?"
+
+
+def _titles(picks: list[tuple[str, str]]) -> str:
+    return " and ".join(f"'{title.strip()}'" for _, title in picks) or "a few favourites"
+
+
+class StubLLMClient:
+    DEFAULT_TIMEOUT = 60.0  # what a call without an explicit timeout waits when it "hangs"
+
+    def __init__(
+        self,
+        delay_seconds: float = 0.2,
+        token_delay_seconds: float = 0.02,
+        jitter: float = 0.0,
+        failure_rate: float = 0.0,
+        timeout_rate: float = 0.0,
+        rng: random.Random | None = None
+    ):
+        self.delay_seconds = delay_seconds
+        self.token_delay_seconds = token_delay_seconds
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.timeout_rate = timeout_rate
+        self.rng = rng or random.Random(0)
+        self.chat = SimpleNamespace(completions=_Completions(self))
+
+    def draw(self, timeout: float | None = None) -> tuple[str, float]:
+        """("ok" | "error" | "timeout", seconds to wait) for one call."""
+        with _rng_lock:
+            roll = self.rng.random()
+            noise = self.rng.gauss(0.0, self.jitter) if self.jitter > 0 else 0.0
+        if roll < self.timeout_rate:
+            return "timeout", timeout if timeout is not None else self.DEFAULT_TIMEOUT
+        outcome = "error" if roll < self.timeout_rate + self.failure_rate else "ok"
+        return outcome, self.delay_seconds * math.exp(noise)
+
+
+_rng_lock = threading.Lock()  # clients share one generator per process (see groq_client)
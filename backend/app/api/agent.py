@@ -1,7 +1,7 @@
 from fastapi import APIRouter
 from pydantic import BaseModel, Field
 
-from app.agents.recommendation_agent import run_recommendation_agent
+from app.agents.recommendation_agent import run_recommendation_agent_async
 
 router = APIRouter(prefix="/api/agent", tags=["AI Agent"])
 
@@ -12,8 +12,8 @@ class AgentRequest(BaseModel):
 
 
 @router.post("/recommend")
-def recommend_via_agent(payload: AgentRequest):
-    return run_recommendation_agent(
+async def recommend_via_agent(payload: AgentRequest):
+    return await run_recommendation_agent_async(
         user_id=payload.user_id,
         message=payload.message
     )
@@ -1,14 +1,17 @@
+import json
 from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
-from typing import List, Dict
-from app.agents.conversational_agent import run_conversational_agent_llm
+from typing import List, Dict, Optional
+from app.agents.conversational_agent import run_conversational_agent_llm, stream_conversational_agent_llm
 
 router = APIRouter(prefix="/api/agent", tags=["AI Agent"])
 
 class ConversationalRequest(BaseModel):
     user_id: int
     message: str = Field(..., max_length=500)
-    chat_history: List[Dict[str, str]] = []
+    chat_history: List[Dict[str, str]] = []  # only used to seed a new session
+    session_id: Optional[str] = None           # returned by the previous turn
 
 @router.post("/chat")
 def conversational_recommendation_llm(payload: ConversationalRequest):
@@ -16,4 +19,20 @@ def conversational_recommendation_llm(payload: ConversationalRequest):
     Unified AI Agent Chat Endpoint.
     Extracts intent, finds movies, and responds using Gemini.
     """
-    return run_conversational_agent_llm(payload.user_id, payload.message, payload.chat_history)
+    return run_conversational_agent_llm(payload.user_id, payload.message, payload.chat_history, payload.session_id)
+
+
+@router.post("/chat/stream")
+def conversational_recommendation_stream(payload: ConversationalRequest):
+    """
+    Streaming variant of /chat as Server-Sent Events:
+    `movies` (candidate cards, sent as soon as they are retrieved), then `token`
+    events with the narrative as the LLM writes it, then `done` with the full reply
+    and its `source` (llm, error_fallback, no_candidates).
+    """
+    events = stream_conversational_agent_llm(payload.user_id, payload.message, payload.chat_history, payload.session_id)
+    return StreamingResponse(
+        (f"event: {event}\ndata: {json.dumps(data)}\n\n" for event, data in events),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
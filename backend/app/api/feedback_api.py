@@ -1,12 +1,13 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
-from app.core.database import get_db
+from app.core.database import get_writer_db
 from app.models.feedback_models import UserFeedback
 from app.models.recommendation_log import RecommendationLog
 from app.ml.strategy_lookup import get_last_strategy_for_user
 from app.ml.strategy_learning import update_strategy_weight
 from app.ml.engagement_tracker import update_engagement
 from app.ml.taste_updater import update_genre_preferences
+from app.ml.recommendation_cache import recommendation_cache
 from app.models.base_models import Movie  # Use Base-defined Movie model
 
 router = APIRouter(prefix="/api/feedback", tags=["Feedback"])
@@ -18,7 +19,7 @@ def submit_feedback(
     liked: int = None, 
     rating: float = None, 
     strategy_name: str = None, 
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_writer_db)
 ):
     """
     Submit user feedback (like/dislike or rating) for a movie.
@@ -85,6 +86,9 @@ def submit_feedback(
                 liked=bool(liked)
             )
 
+    # 6. Drop cached recommendations built on the old taste / weights
+    recommendation_cache.invalidate_user(user_id)
+
     db.refresh(feedback)
     return {
         "status": "success", 
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, HTTPException
 from app.core.database import SessionLocal
 from app.ml.hybrid_recommender import HybridRecommender
+from app.ml.recommender_interface import get_hybrid_recommendations_async
 
 router = APIRouter()
 
@@ -25,3 +26,24 @@ def hybrid_recommendations(user_id: int, top_n: int = 10):
         }
     finally:
         session.close()
+
+
+@router.get("/hybrid-recommendations/{user_id}/adaptive")
+async def adaptive_hybrid_recommendations(user_id: int, top_n: int = 10):
+    """
+    Full personalized pipeline (adaptive strategy, taste bias, exploration, safety gate)
+    on async sessions. Unlike the route above it logs the recommendation event and
+    strategy use, and entries use the pipeline's formatted shape.
+    """
+    recommendations = await get_hybrid_recommendations_async(user_id, top_n)
+
+    if not recommendations:
+        raise HTTPException(
+            status_code=404,
+            detail="No recommendations available"
+        )
+
+    return {
+        "user_id": user_id,
+        "recommended_movies": recommendations
+    }
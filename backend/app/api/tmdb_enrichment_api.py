@@ -5,7 +5,7 @@ from fastapi import APIRouter, Depends
 from fastapi.responses import HTMLResponse, FileResponse
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
-from app.core.database import get_db
+from app.core.database import get_db, get_writer_db
 from app.models.base_models import Movie
 
 router = APIRouter(tags=["TMDb Enrichment"])
@@ -57,7 +57,7 @@ def get_tmdb_mapping(db: Session = Depends(get_db)):
 
 
 @router.post("/api/admin/enrich-batch")
-def enrich_batch(items: List[EnrichItem], db: Session = Depends(get_db)):
+def enrich_batch(items: List[EnrichItem], db: Session = Depends(get_writer_db)):
     """
     Receives a batch of TMDb data and updates the movies table.
     """
@@ -0,0 +1,112 @@
+"""
+Latency benchmarks for the recommendation hot path.
+Every case runs `warmup` untimed calls, then `repetitions` passes over a fixed
+sample of inputs (users or movies), timing each call with perf_counter.
+"""
+import random
+import time
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models.base_models import Rating
+
+CASES = ["recommender", "content", "popularity", "popularity_filtered", "hybrid", "get_hybrid_recommendations"]
+
+
+def summarize(seconds: list[float]) -> dict:
+    ms = np.asarray(seconds) * 1000
+    p50, p90, p95, p99 = np.percentile(ms, [50, 90, 95, 99])
+    return {
+        "n": len(ms),
+        "mean_ms": round(float(ms.mean()), 4),
+        "min_ms": round(float(ms.min()), 4),
+        "p50_ms": round(float(p50), 4),
+        "p90_ms": round(float(p90), 4),
+        "p95_ms": round(float(p95), 4),
+        "p99_ms": round(float(p99), 4),
+        "max_ms": round(float(ms.max()), 4),
+        "ops_per_sec": round(float(1000 / ms.mean()), 2) if ms.mean() > 0 else 0.0,
+    }
+
+
+def _case_functions(session: Session, top_n: int) -> dict:
+    from app.ml.content_recommender import ContentRecommender
+    from app.ml.hybrid_recommender import HybridRecommender
+    from app.ml.popularity_recommender import PopularityRecommender
+    from app.ml.recommender import Recommender
+    from app.ml.recommender_interface import get_hybrid_recommendations
+
+    cf = Recommender(session)
+    cb = ContentRecommender(session)
+    popular = PopularityRecommender(session)
+    hybrid = HybridRecommender(session)
+    return {
+        "recommender": ("user", lambda user_id: cf.recommend(user_id, top_n)),
+        "content": ("movie", lambda movie_id: cb.recommend_similar_movies(movie_id, top_n)),
+        "popularity": ("none", lambda _: popular.recommend(top_n)),
+        "popularity_filtered": ("none", lambda _: popular.recommend(top_n, genre_filter=["Drama"], max_runtime=120)),
+        "hybrid": ("user", lambda user_id: hybrid.recommend(user_id=user_id, top_n=top_n)),
+        "get_hybrid_recommendations": ("user", lambda user_id: get_hybrid_recommendations(user_id, top_n=top_n)),
+    }
+
+
+def run_benchmarks(
+    session: Session,
+    cases: list[str] | None = None,
+    samples: int = 50,
+    warmup: int = 20,
+    repetitions: int = 5,
+    top_n: int = 10,
+    seed: int = 7
+) -> dict:
+    """Returns {case: summarize(...)} for the requested cases."""
+    rng = random.Random(seed)
+    user_ids = [u for (u,) in session.query(Rating.user_id).distinct()]
+    movie_ids = [m for (m,) in session.query(Rating.movie_id).group_by(Rating.movie_id).having(func.count() >= 1)]
+    inputs = {
+        "user": rng.sample(user_ids, min(samples, len(user_ids))),
+        "movie": rng.sample(movie_ids, min(samples, len(movie_ids))),
+        "none": [None] * samples,
+    }
+
+    functions = _case_functions(session, top_n)
+    results = {}
+    for case in cases or CASES:
+        kind, fn = functions[case]
+        case_inputs = inputs[kind]
+        print(f"Benchmarking {case}: {warmup} warmup, {repetitions} x {len(case_inputs)} timed calls...")
+        for i in range(warmup):
+            fn(case_inputs[i % len(case_inputs)])
+
+        timings = []
+        for _ in range(repetitions):
+            for value in case_inputs:
+                started = time.perf_counter()
+                fn(value)
+                timings.append(time.perf_counter() - started)
+        results[case] = summarize(timings)
+    return results
+
+
+def compare_to_baseline(report: dict, baseline: dict, threshold: float = 0.10, min_delta_ms: float = 0.1) -> tuple[list[dict], list[str]]:
+    """
+    Per-case p50/p95 ratios against a saved report, and the cases that got
+    slower than `threshold` (relative) on either. Slowdowns under `min_delta_ms`
+    are treated as timer noise (sub-millisecond cases).
+    """
+    rows, regressions = [], []
+    for case, current in report["results"].items():
+        previous = baseline.get("results", {}).get(case)
+        if not previous:
+            continue
+        row = {"case": case}
+        for metric in ("p50_ms", "p95_ms"):
+            before, after = previous[metric], current[metric]
+            ratio = after / before if before else float("inf")
+            row[metric] = (before, after, ratio)
+            if ratio > 1 + threshold and after - before >= min_delta_ms:
+                regressions.append(f"{case} {metric}: {before:.3f} -> {after:.3f} ms ({ratio:.2f}x)")
+        rows.append(row)
+    return rows, regressions
@@ -1,9 +1,55 @@
 import os
 from dotenv import load_dotenv
 
-load_dotenv(override=True)
+# Tools that run the app against a scratch database (offline evaluation) set LOAD_DOTENV=false
+# so .env cannot override the environment they pass to their worker processes
+if os.getenv("LOAD_DOTENV", "true").lower() == "true":
+    load_dotenv(override=True)
 
 ENV = os.getenv("ENV", "development")
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./filmBox.db")
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 ADMIN_SECRET = os.getenv("ADMIN_SECRET", "supersecretadmin")
+SIMILARITY_INDEX_DIR = os.getenv("SIMILARITY_INDEX_DIR", "./similarity_index")
+SIMILARITY_BACKEND = os.getenv("SIMILARITY_BACKEND", "mmap")  # "mmap" (SQL fallback on miss) or "sql"
+SIMILARITY_WATERMARK_OVERLAP_SECONDS = float(os.getenv("SIMILARITY_WATERMARK_OVERLAP_SECONDS", "30"))  # micro-batches re-read this much before their watermark
+CF_SCORING = os.getenv("CF_SCORING", "sql")  # "sql" (single aggregate query) or "python"
+RECOMMENDATION_CACHE_TTL = float(os.getenv("RECOMMENDATION_CACHE_TTL", "300"))  # seconds; 0 disables the cache
+RECOMMENDATION_CACHE_SIZE = int(os.getenv("RECOMMENDATION_CACHE_SIZE", "10000"))
+# Shared SQLite tier; required for invalidations from other processes (precompute / updater) to reach the API workers
+RECOMMENDATION_CACHE_PATH = os.getenv("RECOMMENDATION_CACHE_PATH", "")
+MOVIE_CATALOG_TTL = float(os.getenv("MOVIE_CATALOG_TTL", "600"))  # seconds before the in-memory catalog is reloaded
+POPULARITY_PRIOR_VOTES = float(os.getenv("POPULARITY_PRIOR_VOTES", "50"))  # Bayesian prior weight (in ratings) toward the global mean
+POPULARITY_REFRESH_SECONDS = float(os.getenv("POPULARITY_REFRESH_SECONDS", "30"))
+POPULARITY_RECOUNT_SECONDS = float(os.getenv("POPULARITY_RECOUNT_SECONDS", "300"))  # how often a refresh with nothing new still checks the table size
+WRITE_BEHIND_ENABLED = os.getenv("WRITE_BEHIND_ENABLED", "true").lower() == "true"  # buffer recommendation logs / strategy usage
+WRITE_BEHIND_FLUSH_SECONDS = float(os.getenv("WRITE_BEHIND_FLUSH_SECONDS", "1.0"))
+WRITE_BEHIND_MAX_BATCH = int(os.getenv("WRITE_BEHIND_MAX_BATCH", "500"))
+PREFERENCE_DECAY_PERIOD_HOURS = float(os.getenv("PREFERENCE_DECAY_PERIOD_HOURS", "24"))  # genre weights lose 2% per period
+# SQLite connection profile: "production" (WAL, mmap, read-only pool + serialized writer) or "default"
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "production" if ENV == "production" else "default")
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))  # bytes
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))  # page cache per connection
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_READ_POOL_SIZE = int(os.getenv("SQLITE_READ_POOL_SIZE", "8"))
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "false").lower() == "true"  # per-stage timings in a Server-Timing response header
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", "600"))  # seconds; 0 disables the chat LLM response cache
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "1000"))
+# Chat agent: concurrent orchestration (speculative retrieval, parallel fallbacks, LLM deadline)
+CHAT_CONCURRENT_MODE = os.getenv("CHAT_CONCURRENT_MODE", "false").lower() == "true"
+CHAT_LATENCY_BUDGET_SECONDS = float(os.getenv("CHAT_LATENCY_BUDGET_SECONDS", "6"))  # past this the deterministic answer is returned
+CHAT_INTENT_WAIT_SECONDS = float(os.getenv("CHAT_INTENT_WAIT_SECONDS", "1.5"))  # how long retrieval waits on extract_intent
+CHAT_WORKERS = int(os.getenv("CHAT_WORKERS", "16"))
+LLM_BACKEND = os.getenv("LLM_BACKEND", "groq")  # "groq" or "stub" (local canned responses, no network)
+LLM_STUB_DELAY_MS = float(os.getenv("LLM_STUB_DELAY_MS", "200"))  # median latency of a stub call
+LLM_STUB_TOKEN_DELAY_MS = float(os.getenv("LLM_STUB_TOKEN_DELAY_MS", "20"))  # stub streaming: pause between tokens
+LLM_STUB_DELAY_JITTER = float(os.getenv("LLM_STUB_DELAY_JITTER", "0"))  # lognormal sigma of the latency; 0 = fixed
+LLM_STUB_FAILURE_RATE = float(os.getenv("LLM_STUB_FAILURE_RATE", "0"))  # share of calls that raise an API error
+LLM_STUB_TIMEOUT_RATE = float(os.getenv("LLM_STUB_TIMEOUT_RATE", "0"))  # share of calls that hang until their timeout
+LLM_STUB_SEED = int(os.getenv("LLM_STUB_SEED", "0"))
+# Chat sessions: server-side filter state and last candidate pool per conversation
+CHAT_SESSION_TTL = float(os.getenv("CHAT_SESSION_TTL", "1800"))  # seconds since the last turn
+CHAT_SESSION_SIZE = int(os.getenv("CHAT_SESSION_SIZE", "10000"))
+CHAT_SESSION_PATH = os.getenv("CHAT_SESSION_PATH", "")  # optional SQLite file shared by workers
+CHAT_SESSION_TURNS = int(os.getenv("CHAT_SESSION_TURNS", "3"))  # user turns whose filters are merged
+CHAT_SESSION_MIN_POOL = int(os.getenv("CHAT_SESSION_MIN_POOL", "3"))  # fewer local matches -> new recommendation pass
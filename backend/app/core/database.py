@@ -1,6 +1,13 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
-from app.core.config import DATABASE_URL
+from app.core.config import (
+    DATABASE_URL,
+    SQLITE_PROFILE,
+    SQLITE_MMAP_SIZE,
+    SQLITE_CACHE_SIZE_KB,
+    SQLITE_BUSY_TIMEOUT_MS,
+    SQLITE_READ_POOL_SIZE,
+)
 from sqlalchemy.ext.declarative import declarative_base
 
 # SQLAlchemy 1.4+ requires "postgresql://" not "postgres://"
@@ -35,3 +42,107 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# ─── SQLite Production Profile ────────────────────────────────
+# WAL lets readers run alongside the writer; the pragmas are per connection, so
+# they are applied on connect. Recommender reads get their own query-only pool,
+# and writes (write-behind flushes, request bookkeeping via writer_session_scope,
+# write endpoints via get_writer_db) go through one serialized writer connection
+# that takes the write lock up front (BEGIN IMMEDIATE) and waits busy_timeout for
+# other processes instead of failing with "database is locked".
+SQLITE_TUNED = DATABASE_URL.startswith("sqlite") and SQLITE_PROFILE == "production" and ":memory:" not in DATABASE_URL
+
+def _apply_sqlite_pragmas(dbapi_connection, query_only: bool = False):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    if query_only:
+        cursor.execute("PRAGMA query_only=ON")
+    cursor.close()
+
+if SQLITE_TUNED:
+    event.listen(engine, "connect", lambda conn, record: _apply_sqlite_pragmas(conn))
+
+    read_engine = create_engine(
+        DATABASE_URL,
+        connect_args={"check_same_thread": False},
+        pool_size=SQLITE_READ_POOL_SIZE,
+        max_overflow=SQLITE_READ_POOL_SIZE
+    )
+    event.listen(read_engine, "connect", lambda conn, record: _apply_sqlite_pragmas(conn, query_only=True))
+
+    writer_engine = create_engine(
+        DATABASE_URL,
+        connect_args={"check_same_thread": False},
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=SQLITE_BUSY_TIMEOUT_MS / 1000 * 6
+    )
+
+    @event.listens_for(writer_engine, "connect")
+    def _writer_connect(dbapi_connection, connection_record):
+        _apply_sqlite_pragmas(dbapi_connection)
+        dbapi_connection.isolation_level = None  # let the "begin" hook below issue BEGIN
+
+    @event.listens_for(writer_engine, "begin")
+    def _writer_begin(conn):
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+else:
+    # PostgreSQL (or the default SQLite profile): one pool serves both roles
+    read_engine = engine
+    writer_engine = engine
+
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+WriterSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=writer_engine)
+
+
+def get_writer_db():
+    """
+    get_db for endpoints that write. Under the SQLite production profile the session
+    holds the single writer connection, so keep the handler short and never wait on
+    the network with it open (movie_search_api.import_movie stays on get_db for that reason).
+    """
+    db = WriterSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+# ─── Async Engine (async request pipeline) ────────────────────
+# Needs an async driver: aiosqlite for SQLite, asyncpg for PostgreSQL.
+# Without one, AsyncSessionLocal stays None and callers fall back to the sync path.
+def _async_url(url: str) -> str:
+    if url.startswith("sqlite:"):
+        return url.replace("sqlite:", "sqlite+aiosqlite:", 1)
+    if url.startswith("postgresql:") or url.startswith("postgresql+psycopg2:"):
+        return "postgresql+asyncpg:" + url.split(":", 1)[1]
+    return url
+
+try:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    if DATABASE_URL.startswith("sqlite"):
+        async_engine = create_async_engine(_async_url(DATABASE_URL))
+        if SQLITE_TUNED:
+            event.listen(async_engine.sync_engine, "connect", lambda conn, record: _apply_sqlite_pragmas(conn))
+    else:
+        async_engine = create_async_engine(
+            _async_url(DATABASE_URL),
+            pool_pre_ping=True,
+            pool_size=5,
+            max_overflow=10
+        )
+    AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+except ImportError:
+    async_engine = None
+    AsyncSessionLocal = None
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
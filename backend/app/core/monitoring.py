@@ -1,12 +1,19 @@
 """
 Phase 23: Prometheus Metrics & Monitoring Middleware
-Tracks request count, latency, error rate, and active requests.
+Tracks request count, latency, error rate, and active requests, plus
+per-stage timings of the recommendation pipeline (optionally echoed to the
+client in a Server-Timing header).
 """
+import re
 import time
+from contextlib import contextmanager
+from contextvars import ContextVar
 from prometheus_client import Counter, Histogram, Gauge, generate_latest
 from fastapi import Request, Response
 from starlette.middleware.base import BaseHTTPMiddleware
 
+from app.core.config import SERVER_TIMING_ENABLED
+
 # ─── Prometheus Metrics ───────────────────────────────────────
 REQUEST_COUNT = Counter(
     "filmbox_requests_total",
@@ -44,8 +51,148 @@ LLM_CALLS = Counter(
     ["status"]
 )
 
+LLM_CACHE_REQUESTS = Counter(
+    "filmbox_llm_cache_total",
+    "Chat LLM response cache lookups",
+    ["result"]
+)
+
+LLM_RESPONSE_LATENCY = Histogram(
+    "filmbox_llm_response_latency_seconds",
+    "Time to obtain the chat LLM response, by where it came from (cache, llm, coalesced)",
+    ["source"],
+    buckets=[0.0005, 0.005, 0.05, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0]
+)
+
+LLM_FIRST_TOKEN_LATENCY = Histogram(
+    "filmbox_llm_first_token_seconds",
+    "Time from starting a streamed LLM completion to its first content token",
+    buckets=[0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+)
+
+CHAT_DEADLINE_MISSES = Counter(
+    "filmbox_chat_deadline_misses_total",
+    "Concurrent chat requests that stopped waiting on a background step (intent, llm, trending)",
+    ["stage"]
+)
+
+CHAT_SPECULATION = Counter(
+    "filmbox_chat_speculative_retrievals_total",
+    "Speculative candidate retrievals started before extract_intent returned, by outcome",
+    ["result"]
+)
+
+CHAT_RESPONSES = Counter(
+    "filmbox_chat_responses_total",
+    "Chat agent replies by how they were produced (llm, deadline_fallback, error_fallback, no_candidates, unavailable)",
+    ["source"]
+)
+
+CHAT_SESSION_REQUESTS = Counter(
+    "filmbox_chat_sessions_total",
+    "Chat session lookups (hit, miss, new) and candidate pool reuse (pool_reused, pool_refetched)",
+    ["result"]
+)
+
+DB_CONNECTIONS_PER_REQUEST = Histogram(
+    "filmbox_db_connections_per_request",
+    "Peak pool connections held at once while serving one request",
+    ["endpoint"],
+    buckets=[0, 1, 2, 3, 4, 5, 8, 13]
+)
+
+DB_QUERIES_PER_REQUEST = Histogram(
+    "filmbox_db_queries_per_request",
+    "SQL statements executed while serving one request",
+    ["endpoint"],
+    buckets=[0, 1, 2, 5, 10, 20, 50, 100, 250]
+)
+
+DB_QUERY_SECONDS_PER_REQUEST = Histogram(
+    "filmbox_db_query_seconds_per_request",
+    "Time spent executing SQL statements while serving one request",
+    ["endpoint"],
+    buckets=[0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5]
+)
+
+STAGE_LATENCY = Histogram(
+    "filmbox_recommendation_stage_seconds",
+    "Time spent in each stage of the recommendation pipeline",
+    ["stage"],
+    buckets=[0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 10.0]
+)
+
+WRITE_BEHIND_PENDING = Gauge(
+    "filmbox_write_behind_pending",
+    "Recommendation logs and strategy-usage increments waiting to be flushed"
+)
+
+RECOMMENDATION_CACHE_REQUESTS = Counter(
+    "filmbox_recommendation_cache_total",
+    "Recommendation cache lookups and invalidations",
+    ["tier", "result"]
+)
+
+
+# ─── Stage Timing ─────────────────────────────────────────────
+# Per-request {name: [seconds, description]}; only set while a Server-Timing header is being built
+_request_timings: ContextVar["dict | None"] = ContextVar("request_timings", default=None)
+
+
+@contextmanager
+def stage_timer(stage: str):
+    """Times a pipeline stage into STAGE_LATENCY (and the request's Server-Timing entries)."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_LATENCY.labels(stage=stage).observe(elapsed)
+        record_request_timing(stage, elapsed)
+
+
+def record_request_timing(name: str, seconds: float, description: str | None = None):
+    """Adds to the current request's Server-Timing entry (summed if the stage repeats)."""
+    timings = _request_timings.get()
+    if timings is None:
+        return
+    entry = timings.setdefault(name, [0.0, description])
+    entry[0] += seconds
+    if description:
+        entry[1] = description
+
+
+def _server_timing_header(timings: dict, total: float) -> str:
+    parts = []
+    for name, (seconds, description) in timings.items():
+        part = f"{re.sub(r'[^A-Za-z0-9_.-]', '-', name)};dur={seconds * 1000:.2f}"
+        if description:
+            part += f'; desc="{description}"'
+        parts.append(part)
+    parts.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(parts)
+
 
 # ─── Middleware ───────────────────────────────────────────────
+class ServerTimingMiddleware(BaseHTTPMiddleware):
+    """Adds a Server-Timing header with the stage timings of each request (SERVER_TIMING_ENABLED)."""
+
+    async def dispatch(self, request: Request, call_next):
+        if not SERVER_TIMING_ENABLED or request.url.path == "/metrics":
+            return await call_next(request)
+
+        timings = {}
+        token = _request_timings.set(timings)
+        start_time = time.perf_counter()
+        try:
+            response = await call_next(request)
+        finally:
+            _request_timings.reset(token)
+        response.headers["Server-Timing"] = _server_timing_header(timings, time.perf_counter() - start_time)
+        response.headers["Timing-Allow-Origin"] = "*"  # let the browser UI read it (CORS allows all origins)
+        return response
+
+
 class MetricsMiddleware(BaseHTTPMiddleware):
     async def dispatch(self, request: Request, call_next):
         if request.url.path == "/metrics":
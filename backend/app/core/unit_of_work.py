@@ -0,0 +1,202 @@
+"""
+Request-scoped unit of work.
+One lazily opened Session is shared by every helper that asks for
+session_scope() while a unit of work is active, instead of each helper opening
+its own SessionLocal(). Engine events attribute pool checkouts and statements
+to the active unit of work, so connections and queries per request are visible
+in Prometheus.
+
+The session is only shared within the thread that opened it; helpers running on
+other threads get a private session (still counted) since Sessions are not
+thread-safe.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from starlette.middleware.base import BaseHTTPMiddleware
+from fastapi import Request
+
+from app.core.database import SessionLocal, ReadSessionLocal, WriterSessionLocal, engine, read_engine, writer_engine, async_engine
+from app.core.monitoring import (
+    DB_CONNECTIONS_PER_REQUEST,
+    DB_QUERIES_PER_REQUEST,
+    DB_QUERY_SECONDS_PER_REQUEST,
+    record_request_timing,
+)
+
+_current: ContextVar["UnitOfWork | None"] = ContextVar("unit_of_work", default=None)
+
+
+class UnitOfWork:
+    def __init__(self):
+        self._session: Session | None = None
+        self.owner: int | None = None
+        self.checkouts = 0
+        self.connections = 0       # currently checked out
+        self.peak_connections = 0  # what actually drives pool pressure
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.lock = threading.Lock()
+
+    @property
+    def session(self) -> Session:
+        if self._session is None:
+            self._session = SessionLocal()
+            self.owner = threading.get_ident()
+        return self._session
+
+    def owns_current_thread(self) -> bool:
+        return self.owner is None or self.owner == threading.get_ident()
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+
+def current_unit_of_work() -> UnitOfWork | None:
+    return _current.get()
+
+
+@contextmanager
+def unit_of_work():
+    """Starts a unit of work, or joins the one already active in this context."""
+    active = _current.get()
+    if active is not None:
+        yield active
+        return
+
+    uow = UnitOfWork()
+    token = _current.set(uow)
+    try:
+        yield uow
+    finally:
+        _current.reset(token)
+        uow.close()
+
+
+@contextmanager
+def session_scope():
+    """
+    The shared request session when a unit of work is active on this thread,
+    otherwise a private SessionLocal() closed on exit (the pre-UoW behaviour).
+    """
+    uow = _current.get()
+    if uow is not None and uow.owns_current_thread():
+        session = uow.session
+        try:
+            yield session
+        except Exception:
+            session.rollback()
+            raise
+        return
+
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@contextmanager
+def read_session_scope():
+    """
+    Session for read-only work on the recommender path. Under the SQLite
+    production profile this is a private session on the query-only pool;
+    otherwise it is the same as session_scope().
+    """
+    if read_engine is engine:
+        with session_scope() as session:
+            yield session
+        return
+
+    session = ReadSessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@contextmanager
+def writer_session_scope():
+    """
+    Session for request-path writes. Under the SQLite production profile this is a
+    private session on the serialized writer (BEGIN IMMEDIATE); otherwise it is the
+    same as session_scope(). Do not open one while already holding a writer session
+    on the same thread: the writer pool has a single connection.
+    """
+    if writer_engine is engine:
+        with session_scope() as session:
+            yield session
+        return
+
+    session = WriterSessionLocal()
+    try:
+        yield session
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
+# ─── Instrumentation ──────────────────────────────────────────
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    uow = _current.get()
+    if uow is not None:
+        connection_record.info["unit_of_work"] = uow
+        with uow.lock:
+            uow.checkouts += 1
+            uow.connections += 1
+            uow.peak_connections = max(uow.peak_connections, uow.connections)
+
+
+def _on_checkin(dbapi_connection, connection_record):
+    uow = connection_record.info.pop("unit_of_work", None)
+    if uow is not None:
+        with uow.lock:
+            uow.connections -= 1
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started"].pop()
+    uow = _current.get()
+    if uow is not None:
+        with uow.lock:
+            uow.queries += 1
+            uow.query_seconds += time.perf_counter() - started
+
+
+_engines = [engine, read_engine, writer_engine, async_engine.sync_engine if async_engine is not None else None]
+for _engine in {id(e): e for e in _engines if e is not None}.values():
+    event.listen(_engine, "checkout", _on_checkout)
+    event.listen(_engine, "checkin", _on_checkin)
+    event.listen(_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class UnitOfWorkMiddleware(BaseHTTPMiddleware):
+    """Opens a unit of work per HTTP request and records its DB usage."""
+
+    async def dispatch(self, request: Request, call_next):
+        if request.url.path == "/metrics":
+            return await call_next(request)
+
+        with unit_of_work() as uow:
+            response = await call_next(request)
+
+        route = request.scope.get("route")
+        endpoint = getattr(route, "path", "unmatched")  # raw URLs would give every 404 its own label series
+        DB_CONNECTIONS_PER_REQUEST.labels(endpoint=endpoint).observe(uow.peak_connections)
+        DB_QUERIES_PER_REQUEST.labels(endpoint=endpoint).observe(uow.queries)
+        DB_QUERY_SECONDS_PER_REQUEST.labels(endpoint=endpoint).observe(uow.query_seconds)
+        record_request_timing("db", uow.query_seconds, f"{uow.queries} queries")
+        return response
@@ -0,0 +1,54 @@
+"""
+Ranking metrics for offline evaluation (binary relevance, cut at k).
+"""
+import math
+
+import numpy as np
+
+
+def precision_at_k(recommended: list[int], relevant: set[int], k: int) -> float:
+    if k <= 0:
+        return 0.0
+    return sum(1 for m in recommended[:k] if m in relevant) / k
+
+
+def recall_at_k(recommended: list[int], relevant: set[int], k: int) -> float:
+    if not relevant:
+        return 0.0
+    return sum(1 for m in recommended[:k] if m in relevant) / len(relevant)
+
+
+def ndcg_at_k(recommended: list[int], relevant: set[int], k: int) -> float:
+    dcg = sum(1.0 / math.log2(i + 2) for i, m in enumerate(recommended[:k]) if m in relevant)
+    ideal = sum(1.0 / math.log2(i + 2) for i in range(min(len(relevant), k)))
+    return dcg / ideal if ideal else 0.0
+
+
+def catalog_coverage(recommendation_lists: list[list[int]], catalog_size: int) -> float:
+    """Share of the catalog that shows up in at least one list."""
+    if not catalog_size:
+        return 0.0
+    return len({m for recs in recommendation_lists for m in recs}) / catalog_size
+
+
+def novelty(recommendation_lists: list[list[int]], item_counts: dict[int, int], n_users: int) -> float:
+    """
+    Mean self-information -log2(p(item)) of recommended items, with p the share of
+    train users who rated the item. Higher = less obvious recommendations.
+    """
+    if not n_users:
+        return 0.0
+    values = [
+        -math.log2(max(item_counts.get(m, 0), 1) / n_users)
+        for recs in recommendation_lists for m in recs
+    ]
+    return float(np.mean(values)) if values else 0.0
+
+
+def latency_percentiles(seconds: list[float]) -> dict[str, float]:
+    """p50/p90/p99 and mean in milliseconds."""
+    if not seconds:
+        return {"p50_ms": 0.0, "p90_ms": 0.0, "p99_ms": 0.0, "mean_ms": 0.0}
+    ms = np.asarray(seconds) * 1000
+    p50, p90, p99 = np.percentile(ms, [50, 90, 99])
+    return {"p50_ms": round(float(p50), 3), "p90_ms": round(float(p90), 3), "p99_ms": round(float(p99), 3), "mean_ms": round(float(ms.mean()), 3)}
@@ -0,0 +1,128 @@
+"""
+Runs every recommendation strategy over the held-out users of a temporal split
+and reports ranking quality next to per-strategy latency.
+
+Expects to run against the split database (see splits.write_split_database) with
+similarities precomputed on it; app/scripts/evaluate_offline.py sets that up.
+"""
+import random
+import time
+from collections import Counter
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.evaluation.metrics import (
+    catalog_coverage,
+    latency_percentiles,
+    ndcg_at_k,
+    novelty,
+    precision_at_k,
+    recall_at_k,
+)
+from app.ml.batch_recommender import BatchRecommender
+from app.ml.hybrid_recommender import HybridRecommender
+from app.ml.movie_catalog import load_catalog
+from app.models.base_models import Rating
+
+ONLINE_STRATEGIES = ["collaborative-filtering", "content-based", "popularity-based", "hybrid"]
+STRATEGIES = ONLINE_STRATEGIES + ["batch"]
+QUALITY_METRICS = ["precision", "recall", "ndcg", "coverage", "novelty"]
+
+
+def _movie_ids(recommendations: list[dict]) -> list[int]:
+    return [int(m.get("movie_id", m.get("id"))) for m in recommendations]
+
+
+def _run_online(session: Session, strategy: str, user_ids: list[str], k: int):
+    recommender = HybridRecommender(session, use_cache=False)
+    preferred = None if strategy == "hybrid" else strategy
+    lists, timings, served = {}, [], Counter()
+    for user_id in user_ids:
+        started = time.perf_counter()
+        result = recommender.recommend(user_id=user_id, top_n=k, preferred_strategy=preferred)
+        timings.append(time.perf_counter() - started)
+        lists[user_id] = _movie_ids(result["recommendations"])
+        served[result["strategy"]] += 1
+    return lists, timings, served
+
+
+def _run_batch(session: Session, user_ids: list[str], k: int):
+    """Latency is per user, amortized over each block."""
+    recommender = BatchRecommender(session, top_n=k)
+    lists, timings, served = {}, [], Counter()
+    for start in range(0, len(user_ids), recommender.block_size):
+        block = user_ids[start:start + recommender.block_size]
+        started = time.perf_counter()
+        results = recommender.recommend_block(block)
+        elapsed = time.perf_counter() - started
+        timings.extend([elapsed / len(block)] * len(block))
+        for result in results:
+            lists[result["user_id"]] = _movie_ids(result["recommendations"])
+            served[result["strategy"]] += 1
+    return lists, timings, served
+
+
+def evaluate(
+    session: Session,
+    relevant: dict[str, set[int]],
+    k: int = 10,
+    strategies: list[str] | None = None,
+    max_users: int | None = None,
+    seed: int = 42
+) -> dict:
+    """
+    Returns {"k", "users", "strategies": {name: metrics}} where metrics holds
+    precision/recall/ndcg@k (means over users), coverage, novelty, the share of
+    empty lists, which strategy actually served (fallbacks) and latency percentiles.
+    """
+    strategies = strategies or STRATEGIES
+    user_ids = sorted(relevant)
+    if max_users and len(user_ids) > max_users:
+        user_ids = sorted(random.Random(seed).sample(user_ids, max_users))
+
+    catalog = load_catalog(session)
+    item_counts = dict(session.query(Rating.movie_id, func.count(Rating.user_id)).group_by(Rating.movie_id).all())
+    n_train_users = session.query(func.count(func.distinct(Rating.user_id))).scalar() or 0
+
+    report = {"k": k, "users": len(user_ids), "strategies": {}}
+    for strategy in strategies:
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown strategy: {strategy}")
+        print(f"Evaluating {strategy} on {len(user_ids)} users...")
+        random.seed(seed)  # content-based picks a random seed movie
+        if strategy == "batch":
+            lists, timings, served = _run_batch(session, user_ids, k)
+        else:
+            lists, timings, served = _run_online(session, strategy, user_ids, k)
+
+        per_user = [lists.get(u, []) for u in user_ids]
+        n = max(len(user_ids), 1)
+        report["strategies"][strategy] = {
+            "precision": sum(precision_at_k(lists.get(u, []), relevant[u], k) for u in user_ids) / n,
+            "recall": sum(recall_at_k(lists.get(u, []), relevant[u], k) for u in user_ids) / n,
+            "ndcg": sum(ndcg_at_k(lists.get(u, []), relevant[u], k) for u in user_ids) / n,
+            "coverage": catalog_coverage(per_user, len(catalog)),
+            "novelty": novelty(per_user, item_counts, n_train_users),
+            "empty_rate": sum(1 for recs in per_user if not recs) / n,
+            "served": dict(served),
+            "latency": latency_percentiles(timings),
+        }
+    return report
+
+
+def compare_to_baseline(report: dict, baseline: dict, tolerance: float = 0.02) -> list[str]:
+    """
+    Quality metrics that dropped by more than `tolerance` (relative) against a
+    previous report, e.g. after a performance change.
+    """
+    regressions = []
+    for strategy, metrics in report["strategies"].items():
+        previous = baseline.get("strategies", {}).get(strategy)
+        if not previous:
+            continue
+        for metric in QUALITY_METRICS:
+            before, after = previous.get(metric, 0.0), metrics.get(metric, 0.0)
+            if before > 0 and (before - after) / before > tolerance:
+                regressions.append(f"{strategy} {metric}: {before:.4f} -> {after:.4f}")
+    return regressions
@@ -0,0 +1,134 @@
+"""
+Temporal train/test splits of the ratings table for offline evaluation.
+
+- "global": every rating after the (1 - test_fraction) quantile of rated_at is
+  held out, i.e. train on the past and predict the future.
+- "per-user": each user's most recent test_fraction of ratings is held out, so
+  every active user contributes to the test set.
+
+The train side is written to a standalone SQLite database (catalog tables plus
+train ratings) that the precompute and the recommenders then run against, so
+nothing in the test period leaks into similarities or popularity.
+"""
+import json
+import math
+import os
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+
+from app.core.database import Base
+from app.models.base_models import Genre, Movie, Rating, movie_genres_table
+import app.models.feedback_models
+import app.models.recommendation_log
+import app.models.strategy_stats
+import app.models.user_engagement_stats
+import app.models.user_genre_preferences
+import app.models.user_strategy_stats
+
+RELEVANT_RATING = 4  # test ratings at or above this count as relevant
+COPY_CHUNK = 5000
+
+
+class Split:
+    def __init__(self, mode: str, test_fraction: float, train: list[tuple], test: dict[str, list[tuple]], cutoff: datetime | None = None):
+        self.mode = mode
+        self.test_fraction = test_fraction
+        self.train = train   # [(user_id, movie_id, rating, rated_at)]
+        self.test = test     # {user_id: [(movie_id, rating)]}
+        self.cutoff = cutoff
+
+    def relevant(self) -> dict[str, set[int]]:
+        """Held-out items per user that count as hits, for users that also have train ratings."""
+        train_users = {r[0] for r in self.train}
+        relevant = {
+            user_id: {movie_id for movie_id, rating in items if rating >= RELEVANT_RATING}
+            for user_id, items in self.test.items()
+            if user_id in train_users
+        }
+        return {user_id: items for user_id, items in relevant.items() if items}
+
+
+def load_ratings(session: Session) -> list[tuple]:
+    return [
+        (str(user_id), int(movie_id), rating, rated_at)
+        for user_id, movie_id, rating, rated_at in session.query(Rating.user_id, Rating.movie_id, Rating.rating, Rating.rated_at)
+    ]
+
+
+def temporal_split(ratings: list[tuple], mode: str = "per-user", test_fraction: float = 0.2, min_user_ratings: int = 5) -> Split:
+    """Ratings without a timestamp always stay in train."""
+    if mode not in ("global", "per-user"):
+        raise ValueError(f"Unknown split mode: {mode}")
+    if not 0 < test_fraction < 1:
+        raise ValueError("test_fraction must be between 0 and 1")
+
+    train, test = [], defaultdict(list)
+    cutoff = None
+
+    if mode == "global":
+        stamps = sorted(r[3] for r in ratings if r[3] is not None)
+        if stamps:
+            cutoff = stamps[min(len(stamps) - 1, int(len(stamps) * (1 - test_fraction)))]
+        for r in ratings:
+            if cutoff is not None and r[3] is not None and r[3] >= cutoff:
+                test[r[0]].append((r[1], r[2]))
+            else:
+                train.append(r)
+    else:
+        by_user = defaultdict(list)
+        for r in ratings:
+            by_user[r[0]].append(r)
+        for user_id, rows in by_user.items():
+            timed = sorted((r for r in rows if r[3] is not None), key=lambda r: (r[3], r[1]))
+            untimed = [r for r in rows if r[3] is None]
+            n_test = math.floor(len(rows) * test_fraction) if len(rows) >= min_user_ratings else 0
+            n_test = min(n_test, len(timed))
+            held = timed[len(timed) - n_test:] if n_test else []
+            train.extend(untimed + timed[:len(timed) - n_test])
+            test[user_id].extend((r[1], r[2]) for r in held)
+
+    return Split(mode, test_fraction, train, {u: items for u, items in test.items() if items}, cutoff)
+
+
+def write_split_database(split: Split, source: Session, path: str):
+    """Creates a fresh SQLite database holding the catalog and the train ratings only."""
+    if os.path.exists(path):
+        os.remove(path)
+    target = create_engine(f"sqlite:///{os.path.abspath(path)}")
+    Base.metadata.create_all(bind=target)
+
+    with target.begin() as conn:
+        for table in (Movie.__table__, Genre.__table__, movie_genres_table):
+            rows = [dict(row) for row in source.execute(select(table)).mappings()]
+            for start in range(0, len(rows), COPY_CHUNK):
+                conn.execute(insert(table), rows[start:start + COPY_CHUNK])
+
+        train = [
+            {"user_id": u, "movie_id": m, "rating": r, "rated_at": t}
+            for u, m, r, t in split.train
+        ]
+        for start in range(0, len(train), COPY_CHUNK):
+            conn.execute(insert(Rating.__table__), train[start:start + COPY_CHUNK])
+    target.dispose()
+
+
+def save_holdout(split: Split, path: str):
+    with open(path, "w") as f:
+        json.dump({
+            "mode": split.mode,
+            "test_fraction": split.test_fraction,
+            "cutoff": split.cutoff.isoformat() if split.cutoff else None,
+            "train_ratings": len(split.train),
+            "test": split.test,
+            "relevant": {u: sorted(items) for u, items in split.relevant().items()},
+        }, f)
+
+
+def load_holdout(path: str) -> dict:
+    with open(path) as f:
+        holdout = json.load(f)
+    holdout["relevant"] = {u: set(items) for u, items in holdout["relevant"].items()}
+    return holdout
@@ -1,6 +1,6 @@
 import random
 from sqlalchemy.orm import Session
-from app.core.database import SessionLocal
+from app.core.unit_of_work import session_scope, writer_session_scope
 from app.models.strategy_experiment import StrategyExperiment
 
 EXPERIMENT_GROUP = "phase14_ab"
@@ -8,31 +8,30 @@ STRATEGIES = ["collaborative-filtering", "content-based"]
 
 
 def get_or_assign_strategy(user_id: int) -> str:
-    session: Session = SessionLocal()
-
-    record = (
-        session.query(StrategyExperiment)
-        .filter(
-            StrategyExperiment.user_id == user_id,
-            StrategyExperiment.experiment_group == EXPERIMENT_GROUP
+    with session_scope() as session:
+        record = (
+            session.query(StrategyExperiment)
+            .filter(
+                StrategyExperiment.user_id == user_id,
+                StrategyExperiment.experiment_group == EXPERIMENT_GROUP
+            )
+            .first()
         )
-        .first()
-    )
 
-    if record:
-        session.close()
-        return record.strategy
+        if record:
+            return record.strategy
 
+    # Only first-time assignments write, so only they take the writer
     chosen = random.choice(STRATEGIES)
 
-    new_record = StrategyExperiment(
-        user_id=user_id,
-        strategy=chosen,
-        experiment_group=EXPERIMENT_GROUP
-    )
+    with writer_session_scope() as session:
+        new_record = StrategyExperiment(
+            user_id=user_id,
+            strategy=chosen,
+            experiment_group=EXPERIMENT_GROUP
+        )
 
-    session.add(new_record)
-    session.commit()
-    session.close()
+        session.add(new_record)
+        session.commit()
 
     return chosen
@@ -7,8 +7,12 @@ from fastapi.middleware.cors import CORSMiddleware
 from app.api.router import api_router
 from app.core.config import ENV, LOG_LEVEL
 from app.core.database import Base, engine, SessionLocal
-from app.core.monitoring import MetricsMiddleware, metrics_response
+from app.core.monitoring import MetricsMiddleware, ServerTimingMiddleware, metrics_response
 from app.core.logging_config import setup_logging
+from app.core.unit_of_work import UnitOfWorkMiddleware
+from app.ml.movie_catalog import load_catalog
+from app.ml.popularity_leaderboard import get_leaderboard
+from app.ml.write_behind import write_behind
 
 # ─── Phase 23: Structured Logging ────────────────────────────
 logger = setup_logging(level=LOG_LEVEL)
@@ -57,8 +61,25 @@ app.add_middleware(
 # Phase 23: Add Prometheus metrics middleware
 app.add_middleware(MetricsMiddleware)
 
+# Request-scoped unit of work (shared session + DB connection/query counts)
+app.add_middleware(UnitOfWorkMiddleware)
+
+# Per-stage Server-Timing header (outermost, so it also sees the DB totals)
+app.add_middleware(ServerTimingMiddleware)
+
 app.include_router(api_router)
 
+# ─── In-memory Movie Catalog & Popularity Leaderboard ─────────
+@app.on_event("startup")
+def load_movie_catalog():
+    load_catalog()
+    get_leaderboard()
+
+# ─── Write-behind Buffer (drain on shutdown) ──────────────────
+@app.on_event("shutdown")
+def drain_write_behind():
+    write_behind.stop()
+
 # ─── Phase 23: Prometheus Metrics Endpoint ────────────────────
 @app.get("/metrics", include_in_schema=False)
 def prometheus_metrics():
@@ -0,0 +1,192 @@
+"""
+Random-projection LSH index for approximate cosine neighbors (pure NumPy).
+Built by precompute_matrices.py over user rating vectors and movie genre vectors
+and saved under SIMILARITY_INDEX_DIR, so recommenders can ask for any K, or for
+entities that were not in the last precompute, without an O(N^2) rebuild.
+"""
+import os
+
+import numpy as np
+from scipy import sparse
+
+from app.core.config import SIMILARITY_INDEX_DIR
+from app.ml.sparse_similarity import l2_normalize_rows
+
+USER_INDEX_FILE = "user_ann.npz"
+MOVIE_INDEX_FILE = "movie_ann.npz"
+BUCKET_TARGET = 32
+
+
+class RandomProjectionIndex:
+    def __init__(
+        self,
+        planes: np.ndarray,
+        codes: np.ndarray,
+        vectors: sparse.csr_matrix,
+        item_ids: np.ndarray,
+        feature_ids: np.ndarray
+    ):
+        self.planes = planes              # (dim, n_tables * n_bits)
+        self.codes = codes                # (n_tables, n_items) uint32 bucket codes
+        self.vectors = vectors            # L2-normalized item vectors, for exact re-ranking
+        self.item_ids = item_ids
+        self.feature_ids = feature_ids    # column -> movie_id (users) / genre_id (movies)
+        self.n_tables = codes.shape[0]
+        self.n_bits = planes.shape[1] // self.n_tables
+
+        self.order = np.argsort(codes, axis=1, kind="stable")
+        self.sorted_codes = np.take_along_axis(codes, self.order, axis=1)
+        self.item_index = {item_id: i for i, item_id in enumerate(item_ids.tolist())}
+        self.feature_index = {feature_id: i for i, feature_id in enumerate(feature_ids.tolist())}
+
+    # ─── Build / Persist ──────────────────────────────────────
+    @classmethod
+    def build(
+        cls,
+        matrix: sparse.csr_matrix,
+        item_ids: np.ndarray,
+        feature_ids: np.ndarray,
+        n_tables: int = 16,
+        n_bits: int | None = None,
+        seed: int = 42,
+        block_size: int = 4096
+    ):
+        """
+        Hashes every row into `n_tables` tables of `n_bits` sign bits.
+        By default n_bits targets ~BUCKET_TARGET items per bucket.
+        """
+        if n_bits is None:
+            n_bits = int(np.clip(np.log2(max(matrix.shape[0], 1) / BUCKET_TARGET), 4, 20))
+        vectors = l2_normalize_rows(matrix.tocsr()).astype(np.float32)
+        item_ids = np.asarray(item_ids)
+        if item_ids.dtype == object:
+            item_ids = item_ids.astype(str)  # string user ids; keeps the .npz pickle-free
+        rng = np.random.default_rng(seed)
+        planes = rng.standard_normal((vectors.shape[1], n_tables * n_bits)).astype(np.float32)
+
+        codes = np.empty((n_tables, vectors.shape[0]), dtype=np.uint32)
+        for start in range(0, vectors.shape[0], block_size):
+            stop = start + block_size
+            codes[:, start:stop] = cls._hash(vectors[start:stop] @ planes, n_tables, n_bits)
+        return cls(planes, codes, vectors, item_ids, np.asarray(feature_ids))
+
+    @staticmethod
+    def _hash(projections: np.ndarray, n_tables: int, n_bits: int) -> np.ndarray:
+        """Sign bits of (rows, n_tables * n_bits) projections packed into (n_tables, rows) codes."""
+        bits = (np.asarray(projections) > 0).reshape(-1, n_tables, n_bits)
+        weights = (1 << np.arange(n_bits, dtype=np.uint32))
+        return (bits * weights).sum(axis=2, dtype=np.uint32).T
+
+    def save(self, path: str):
+        """Writes to a temp file and swaps it in, so running workers never read a partial index."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                planes=self.planes,
+                codes=self.codes,
+                data=self.vectors.data,
+                indices=self.vectors.indices,
+                indptr=self.vectors.indptr,
+                shape=np.array(self.vectors.shape),
+                item_ids=self.item_ids,
+                feature_ids=self.feature_ids
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str):
+        with np.load(path, allow_pickle=False) as f:
+            vectors = sparse.csr_matrix((f["data"], f["indices"], f["indptr"]), shape=tuple(f["shape"]))
+            return cls(f["planes"], f["codes"], vectors, f["item_ids"], f["feature_ids"])
+
+    # ─── Query ────────────────────────────────────────────────
+    def encode(self, features: dict) -> sparse.csr_matrix | None:
+        """Turns {feature_id: value} (e.g. {movie_id: rating}) into a normalized query row."""
+        cols, vals = [], []
+        for feature_id, value in features.items():
+            col = self.feature_index.get(feature_id)
+            if col is not None and value:
+                cols.append(col)
+                vals.append(value)
+        if not cols:
+            return None
+        row = sparse.csr_matrix(
+            (np.array(vals, dtype=np.float32), (np.zeros(len(cols), dtype=np.int32), np.array(cols))),
+            shape=(1, self.vectors.shape[1])
+        )
+        return l2_normalize_rows(row)
+
+    def _candidates(self, codes: np.ndarray, min_candidates: int) -> np.ndarray:
+        found = []
+        for table, code in enumerate(codes):
+            lo, hi = np.searchsorted(self.sorted_codes[table], [code, code + 1])
+            found.append(self.order[table, lo:hi])
+        candidates = np.unique(np.concatenate(found))
+
+        # Multi-probe: widen to buckets one bit-flip away if the exact buckets are too thin
+        if len(candidates) < min_candidates:
+            for table, code in enumerate(codes):
+                for bit in range(self.n_bits):
+                    probe = code ^ np.uint32(1 << bit)
+                    lo, hi = np.searchsorted(self.sorted_codes[table], [probe, probe + 1])
+                    found.append(self.order[table, lo:hi])
+            candidates = np.unique(np.concatenate(found))
+        return candidates
+
+    def query(self, vector: sparse.csr_matrix, k: int = 10, exclude=None) -> list[tuple]:
+        """
+        Approximate top-k for an L2-normalized query row.
+        Candidates come from the LSH buckets and are re-ranked by exact cosine.
+        Returns [(item_id, score), ...] best first.
+        """
+        codes = self._hash(vector @ self.planes, self.n_tables, self.n_bits)[:, 0]
+        candidates = self._candidates(codes, min_candidates=k * 4)
+        if exclude is not None and exclude in self.item_index:
+            candidates = candidates[candidates != self.item_index[exclude]]
+        if len(candidates) == 0:
+            return []
+
+        scores = (self.vectors[candidates] @ vector.T).toarray().ravel()
+        top = np.argsort(-scores, kind="stable")[:k]
+        return [
+            (self.item_ids[candidates[i]].item(), float(scores[i]))
+            for i in top
+            if scores[i] > 0
+        ]
+
+    def query_item(self, item_id, k: int = 10) -> list[tuple]:
+        """Neighbors of an item already in the index."""
+        row = self.item_index.get(item_id)
+        if row is None:
+            return []
+        return self.query(self.vectors[row], k, exclude=item_id)
+
+
+# ─── Process-wide cache (reloaded when precompute rewrites the file) ───
+_loaded: dict[str, tuple[float, RandomProjectionIndex]] = {}
+
+
+def _get_index(filename: str) -> RandomProjectionIndex | None:
+    path = os.path.join(SIMILARITY_INDEX_DIR, filename)
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+
+    cached = _loaded.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    index = RandomProjectionIndex.load(path)
+    _loaded[path] = (mtime, index)
+    return index
+
+
+def get_user_index() -> RandomProjectionIndex | None:
+    return _get_index(USER_INDEX_FILE)
+
+
+def get_movie_index() -> RandomProjectionIndex | None:
+    return _get_index(MOVIE_INDEX_FILE)
@@ -0,0 +1,257 @@
+"""
+Batch top-N recommendations for many users at once (email / push campaigns).
+The rating matrix, movie-genre matrix and popularity pool are loaded once; each
+block of users then pulls its neighborhoods and genre preferences in bulk
+queries and is scored together with sparse/dense NumPy products.
+
+Follows the online scoring path without filters: the top_n User-CF candidates
+over the stored neighbors (popularity fallback for users without CF candidates:
+the top_n of a top_n * 5 leaderboard pool after the score adjuster's
+popularity-stability boost), re-ranked by taste bias. It skips the per-request
+strategy bandit, exploration and logging.
+"""
+import json
+from datetime import datetime
+from typing import Iterator
+
+import numpy as np
+from scipy import sparse
+from sqlalchemy.orm import Session
+
+from app.ml.decay import decayed_weight
+from app.ml.neighbor_store import get_user_store, updated_since
+from app.ml.popularity_leaderboard import get_leaderboard
+from app.ml.recommender import NEIGHBOR_COUNT
+from app.ml.sparse_similarity import load_genre_matrix, load_rating_matrix, top_k_dense
+from app.models.base_models import Genre, Movie, UserSimilarity
+from app.models.user_genre_preferences import UserGenrePreferences
+
+BLOCK_SIZE = 256
+MIN_VOTES = 50
+STABLE_VOTES = 200  # score_adjuster.apply_intent_boosts: x1.05 at or above this many ratings
+
+
+class BatchRecommender:
+    def __init__(self, session: Session, top_n: int = 10, block_size: int = BLOCK_SIZE):
+        self.session = session
+        self.top_n = top_n
+        self.pool_size = top_n * 5
+        self.block_size = block_size
+
+        # Online CF reads the ratings table only, so no feedback overlay here
+        ratings, user_ids, movie_ids = load_rating_matrix(session, include_feedback=False)
+        self.ratings = ratings
+        self.liked = ratings.multiply(ratings >= 4).tocsr()
+        self.user_ids = [str(u) for u in user_ids]
+        self.user_index = {u: i for i, u in enumerate(self.user_ids)}
+        self.movie_ids = movie_ids
+        self.movie_index = {int(m): i for i, m in enumerate(movie_ids)}
+
+        self.titles = dict(session.query(Movie.id, Movie.title).all())
+        self.movie_genres, self.genre_names = self._load_movie_genres()
+        self.popular_cols, self.popular_scores = self._load_popularity()
+
+    # ─── One-off loads ────────────────────────────────────────
+    def _load_movie_genres(self):
+        """Movie x genre indicators aligned to the rating-matrix columns."""
+        matrix, genre_movie_ids, genre_ids = load_genre_matrix(self.session)
+        names = dict(self.session.query(Genre.id, Genre.name).all())
+
+        cols = np.array([self.movie_index.get(int(m), -1) for m in genre_movie_ids], dtype=np.int64)
+        present = np.nonzero(cols >= 0)[0]
+        aligned = sparse.csr_matrix((len(self.movie_ids), matrix.shape[1]), dtype=np.float32)
+        if len(present):
+            remap = sparse.csr_matrix(
+                (np.ones(len(present), dtype=np.float32), (cols[present], present)),
+                shape=(len(self.movie_ids), matrix.shape[0])
+            )
+            aligned = (remap @ matrix).tocsr()
+        return aligned, [names.get(int(g), "") for g in genre_ids]
+
+    def _load_popularity(self):
+        """
+        Same candidates as the online popularity path without filters: the Bayesian
+        leaderboard pool, boosted like apply_intent_boosts and cut to top_n.
+        """
+        entries = [m for m in get_leaderboard().top(self.pool_size, min_votes=MIN_VOTES) if m["id"] in self.movie_index]
+        scores = [
+            round(round(m["bayesian_score"], 2) * (1.05 if m["rating_count"] >= STABLE_VOTES else 1.0), 4)
+            for m in entries
+        ]
+        order = sorted(range(len(entries)), key=lambda i: -scores[i])[:self.top_n]
+        cols = np.array([self.movie_index[entries[i]["id"]] for i in order], dtype=np.int64)
+        return cols, np.array([scores[i] for i in order], dtype=np.float32)
+
+    # ─── Bulk per-block loads ─────────────────────────────────
+    def _neighbor_weights(self, block_user_ids: list[str]) -> sparse.csr_matrix:
+        """(block x users) similarity weights for each user's top NEIGHBOR_COUNT neighbors."""
+        rows, cols, vals = [], [], []
+        store = get_user_store()
+        rewritten = updated_since(self.session, store, block_user_ids) if store is not None else set()
+        missing = []
+        for r, user_id in enumerate(block_user_ids):
+            neighbors = None
+            if store is not None and user_id not in rewritten:
+                neighbors = store.neighbors_of(user_id, limit=NEIGHBOR_COUNT)
+            if neighbors is None:
+                missing.append(r)
+                continue
+            for similar_id, score in neighbors:
+                col = self.user_index.get(similar_id)
+                if col is not None:
+                    rows.append(r)
+                    cols.append(col)
+                    vals.append(score)
+
+        if missing:
+            by_user: dict[str, list] = {}
+            stored = (
+                self.session.query(UserSimilarity.user_id, UserSimilarity.similar_user_id, UserSimilarity.similarity_score)
+                .filter(UserSimilarity.user_id.in_([block_user_ids[r] for r in missing]))
+                .order_by(UserSimilarity.user_id, UserSimilarity.similarity_score.desc())
+            )
+            for user_id, similar_id, score in stored:
+                by_user.setdefault(user_id, []).append((similar_id, score))
+            for r in missing:
+                for similar_id, score in by_user.get(block_user_ids[r], [])[:NEIGHBOR_COUNT]:
+                    col = self.user_index.get(similar_id)
+                    if col is not None:
+                        rows.append(r)
+                        cols.append(col)
+                        vals.append(score)
+
+        return sparse.csr_matrix(
+            (np.array(vals, dtype=np.float32), (np.array(rows, dtype=np.int64), np.array(cols, dtype=np.int64))),
+            shape=(len(block_user_ids), len(self.user_ids))
+        )
+
+    def _genre_preferences(self, block_user_ids: list[str]) -> np.ndarray:
+        """(block x genres) taste weights in one query."""
+        prefs = np.zeros((len(block_user_ids), len(self.genre_names)), dtype=np.float32)
+        position = {u: i for i, u in enumerate(block_user_ids)}
+        genre_col = {name: i for i, name in enumerate(self.genre_names)}
+        rows = (
+            self.session.query(
+                UserGenrePreferences.user_id, UserGenrePreferences.genre,
+                UserGenrePreferences.weight, UserGenrePreferences.last_updated
+            )
+            .filter(UserGenrePreferences.user_id.in_(block_user_ids))
+        )
+        now = datetime.utcnow()
+        for user_id, genre, weight, last_updated in rows:
+            col = genre_col.get(genre)
+            if col is not None and weight:
+                prefs[position[user_id], col] += decayed_weight(weight, last_updated, now)
+        return prefs
+
+    # ─── Scoring ──────────────────────────────────────────────
+    def recommend_block(self, block_user_ids: list[str]) -> list[dict]:
+        n = len(block_user_ids)
+        if not n:
+            return []
+        weights = self._neighbor_weights(block_user_ids)
+        cf_scores = (weights @ self.liked).toarray()
+
+        # Exclude already-rated movies (users unknown to the matrix have none)
+        known = np.array([self.user_index.get(u, -1) for u in block_user_ids])
+        seen = sparse.csr_matrix((n, len(self.movie_ids)), dtype=np.float32)
+        if (known >= 0).any():
+            seen_rows = sparse.csr_matrix(
+                (np.ones((known >= 0).sum(), dtype=np.float32), (np.nonzero(known >= 0)[0], known[known >= 0])),
+                shape=(n, len(self.user_ids))
+            )
+            seen = seen_rows @ self.ratings
+        seen_r, seen_c = seen.nonzero()
+        cf_scores[seen_r, seen_c] = 0
+
+        # Online CF hands only its top_n candidates to the taste bias
+        pool_cols, pool_scores = top_k_dense(cf_scores, self.top_n)
+        has_cf = pool_scores[:, 0] > 0 if pool_scores.size else np.zeros(n, dtype=bool)
+
+        # Cold rows take the popularity pool instead
+        pool_cols = pool_cols.copy()
+        pool_scores = pool_scores.copy()
+        width = min(pool_cols.shape[1], len(self.popular_cols))
+        cold = ~has_cf
+        pool_scores[cold] = -np.inf
+        pool_cols[np.ix_(cold, np.arange(width))] = self.popular_cols[:width]
+        pool_scores[np.ix_(cold, np.arange(width))] = self.popular_scores[:width]
+
+        # Taste bias: sum of the user's genre weights over each candidate's genres
+        prefs = self._genre_preferences(block_user_ids)
+        movie_bias = (self.movie_genres @ prefs.T).T  # (block x movies)
+        valid = np.isfinite(pool_scores) & ((pool_scores > 0) | cold[:, None])
+        final = np.where(valid, pool_scores + np.take_along_axis(movie_bias, pool_cols, axis=1), -np.inf)
+
+        order = np.argsort(-final, axis=1, kind="stable")[:, :self.top_n]
+        results = []
+        for r, user_id in enumerate(block_user_ids):
+            recs = []
+            for c in order[r]:
+                if not np.isfinite(final[r, c]):
+                    break
+                movie_id = int(self.movie_ids[pool_cols[r, c]])
+                recs.append({
+                    "movie_id": movie_id,
+                    "title": self.titles.get(movie_id),
+                    "score": round(float(final[r, c]), 4)
+                })
+            results.append({
+                "user_id": user_id,
+                "strategy": "collaborative-filtering" if has_cf[r] else "popularity-based",
+                "recommendations": recs
+            })
+        return results
+
+    def recommend_users(self, user_ids: list) -> Iterator[dict]:
+        """Yields one result per user, block by block."""
+        user_ids = [str(u) for u in user_ids]
+        for start in range(0, len(user_ids), self.block_size):
+            yield from self.recommend_block(user_ids[start:start + self.block_size])
+
+
+# ─── Writers ──────────────────────────────────────────────────
+def write_jsonl(results: Iterator[dict], path: str) -> int:
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for result in results:
+            f.write(json.dumps(result) + "\n")
+            count += 1
+    return count
+
+
+def write_parquet(results: Iterator[dict], path: str, rows_per_group: int = 50_000) -> int:
+    """One row per (user, rank). Requires pyarrow (optional dependency)."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet output requires pyarrow: pip install pyarrow")
+
+    schema = pa.schema([
+        ("user_id", pa.string()),
+        ("strategy", pa.string()),
+        ("rank", pa.int32()),
+        ("movie_id", pa.int64()),
+        ("title", pa.string()),
+        ("score", pa.float32()),
+    ])
+    columns = {name: [] for name in schema.names}
+    count = 0
+
+    with pq.ParquetWriter(path, schema) as writer:
+        for result in results:
+            count += 1
+            for rank, rec in enumerate(result["recommendations"], 1):
+                columns["user_id"].append(result["user_id"])
+                columns["strategy"].append(result["strategy"])
+                columns["rank"].append(rank)
+                columns["movie_id"].append(rec["movie_id"])
+                columns["title"].append(rec["title"])
+                columns["score"].append(rec["score"])
+            if len(columns["user_id"]) >= rows_per_group:
+                writer.write_table(pa.table(columns, schema=schema))
+                columns = {name: [] for name in schema.names}
+        if columns["user_id"]:
+            writer.write_table(pa.table(columns, schema=schema))
+    return count
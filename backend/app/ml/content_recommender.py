@@ -1,7 +1,10 @@
 import pandas as pd
 from sqlalchemy.orm import Session
 from sqlalchemy import desc
-from app.models.base_models import Movie, Genre, MovieSimilarity
+from app.models.base_models import MovieSimilarity, movie_genres_table
+from app.ml.ann_index import get_movie_index
+from app.ml.neighbor_store import get_movie_store
+from app.ml.movie_catalog import get_catalog
 
 class ContentRecommender:
     def __init__(self, session: Session):
@@ -20,64 +23,65 @@ class ContentRecommender:
         min_year: int | None = None
     ):
         """
-        Recommend movies similar to a given movie using PRECOMPUTED SQLite scores.
-        Zero memory overhead.
+        Recommend movies similar to a given movie using PRECOMPUTED scores
+        (memory-mapped neighbor store first, movie_similarities table as fallback).
+        When the stored top-K rows run short (large candidate pools, movies added
+        after the last precompute), the on-disk ANN index tops the pool up.
         """
         # ... [logic to fetch precomputed similarities] ...
         # Fetch precomputed similarities
         candidate_count = top_n * 10 if genre_filter else top_n + 5
         
+        sim_scores_dict = dict(self._stored_neighbors(movie_id, candidate_count))
+
+        if len(sim_scores_dict) < candidate_count:
+            for similar_id, score in self._ann_neighbors(movie_id, candidate_count):
+                sim_scores_dict.setdefault(similar_id, score)
+
+        if not sim_scores_dict:
+            return []
+
+        # Sort by the precomputed similarity score, then filter against the in-memory catalog
+        similar_movie_ids = sorted(sim_scores_dict, key=sim_scores_dict.get, reverse=True)
+        catalog = get_catalog()
+        rows = catalog.rows_of(similar_movie_ids)
+        keep = catalog.filter_mask(rows, genre_filter=genre_filter, max_runtime=max_runtime, min_score=min_score, max_score=max_score, language=language, min_year=min_year)
+
+        results = []
+        for row in rows[keep][:top_n]:
+            movie = catalog.movie_dict(row)
+            movie["score"] = float(sim_scores_dict.get(movie["id"], 0))
+            results.append(movie)
+        return results
+
+    def _stored_neighbors(self, movie_id: int, k: int) -> list[tuple[int, float]]:
+        store = get_movie_store()
+        if store is not None:
+            neighbors = store.neighbors_of(movie_id, limit=k)
+            if neighbors is not None:
+                return neighbors
+
         similarities = (
-            self.session.query(MovieSimilarity)
+            self.session.query(MovieSimilarity.similar_movie_id, MovieSimilarity.similarity_score)
             .filter(MovieSimilarity.movie_id == movie_id)
             .order_by(desc(MovieSimilarity.similarity_score))
-            .limit(candidate_count)
+            .limit(k)
             .all()
         )
-        
-        if not similarities:
-            return []
-            
-        sim_scores_dict = {sim.similar_movie_id: sim.similarity_score for sim in similarities}
-        similar_movie_ids = list(sim_scores_dict.keys())
- 
-        # Fetch actual movie details
-        query = (
-            self.session.query(Movie)
-            .filter(Movie.id.in_(similar_movie_ids))
-        )
-        
-        if genre_filter:
-            query = query.filter(Movie.genres.any(Genre.name.in_(genre_filter)))
-            
-        if max_runtime:
-            query = query.filter(Movie.runtime <= max_runtime)
-        if min_score:
-            query = query.filter(Movie.audience_score >= min_score)
-        if max_score:
-            query = query.filter(Movie.audience_score <= max_score)
-        if language:
-            query = query.filter(Movie.language == language)
-        if min_year:
-            query = query.filter(Movie.release_year >= min_year)
+        return [(similar_id, score) for similar_id, score in similarities]
 
-        movies = query.all()
-        
-        # Sort by the precomputed similarity score
-        movies = sorted(movies, key=lambda m: sim_scores_dict.get(m.id, 0), reverse=True)
+    def _ann_neighbors(self, movie_id: int, k: int) -> list[tuple[int, float]]:
+        index = get_movie_index()
+        if index is None:
+            return []
+        if movie_id in index.item_index:
+            return index.query_item(movie_id, k=k)
 
-        return [
-            {
-                "id": m.id,
-                "title": m.title,
-                "release_year": m.release_year,
-                "poster_url": m.poster_url,
-                "overview": m.overview,
-                "runtime": m.runtime,
-                "language": m.language,
-                "audience_score": m.audience_score,
-                "score": float(sim_scores_dict.get(m.id, 0)),
-                "genres": [g.name for g in m.genres]
-            }
-            for m in movies[:top_n]
-        ]
+        # Movie added after the last precompute: encode its genres on the fly
+        genre_ids = self.session.query(movie_genres_table.c.genre_id).filter(
+            movie_genres_table.c.movie_id == movie_id
+        )
+        vector = index.encode({genre_id: 1.0 for (genre_id,) in genre_ids})
+        if vector is None:
+            return []
+        return index.query(vector, k=k, exclude=movie_id)
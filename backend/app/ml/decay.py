@@ -1,14 +1,36 @@
+from datetime import datetime
+from app.core.config import PREFERENCE_DECAY_PERIOD_HOURS
 from app.models.user_genre_preferences import UserGenrePreferences
 from sqlalchemy.orm import Session
 
-DECAY_RATE = 0.98  # Per interaction cycle
+DECAY_RATE = 0.98  # Per decay period (PREFERENCE_DECAY_PERIOD_HOURS)
+DECAY_PERIOD_SECONDS = PREFERENCE_DECAY_PERIOD_HOURS * 3600
+
+def decay_factor(last_decayed: datetime | None, now: datetime | None = None) -> float:
+    """
+    Lazy, time-based decay: DECAY_RATE per elapsed period since the weight was
+    last persisted (UserGenrePreferences.last_updated is the decay anchor).
+    """
+    if last_decayed is None:
+        return 1.0
+    elapsed = ((now or datetime.utcnow()) - last_decayed).total_seconds()
+    if elapsed <= 0:
+        return 1.0
+    return DECAY_RATE ** (elapsed / DECAY_PERIOD_SECONDS)
+
+
+def decayed_weight(weight: float | None, last_decayed: datetime | None, now: datetime | None = None) -> float:
+    return (weight or 0.0) * decay_factor(last_decayed, now)
+
 
 def decay_preferences(session: Session, user_id: any):
     """
-    Applies a decay factor to all genre preferences for a user.
-    Ensures old tastes fade over time.
+    Persists the decay accrued so far for a user's genre preferences and resets
+    the anchor. Reads apply decay on the fly, so this is only needed before
+    modifying weights (feedback) or for maintenance; it is not on the read path.
     """
     user_id_str = str(user_id)
+    now = datetime.utcnow()
     prefs = (
         session.query(UserGenrePreferences)
         .filter_by(user_id=user_id_str)
@@ -16,6 +38,7 @@ def decay_preferences(session: Session, user_id: any):
     )
 
     for pref in prefs:
-        pref.weight *= DECAY_RATE
+        pref.weight = decayed_weight(pref.weight, pref.last_updated, now)
+        pref.last_updated = now
 
     session.commit()
@@ -1,3 +1,5 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.models.user_engagement_stats import UserEngagementStats
 
@@ -20,3 +22,15 @@ def get_engagement_score(
         return 0.0
 
     return stats.engagement_score
+
+
+async def get_engagement_score_async(session: AsyncSession, user_id: any) -> float:
+    """Async variant of get_engagement_score."""
+    score = (
+        await session.execute(
+            select(UserEngagementStats.engagement_score)
+            .filter_by(user_id=str(user_id))
+            .limit(1)
+        )
+    ).scalar_one_or_none()
+    return score if score is not None else 0.0
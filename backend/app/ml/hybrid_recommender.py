@@ -4,15 +4,24 @@ from app.ml.recommender import Recommender
 from app.ml.content_recommender import ContentRecommender
 from app.ml.popularity_recommender import PopularityRecommender
 from app.ml.score_adjuster import apply_intent_boosts
+from app.ml.recommendation_cache import recommendation_cache
+from app.core.monitoring import stage_timer
 from app.models.base_models import Rating, Movie
 from app.models.recommendation_log import RecommendationLog
 from app.models.strategy_stats import StrategyStats
 from app.models.user_strategy_stats import UserStrategyStats
 
+STRATEGY_REASONS = {
+    "collaborative-filtering": "User has sufficient interaction history; using collaborative taste.",
+    "content-based": "User has some history; matched against your liked movie genres.",
+    "popularity-based": "Using globally trending movies for best experience.",
+}
+
 class HybridRecommender:
-    def __init__(self, session: Session, min_ratings: int = 5):
+    def __init__(self, session: Session, min_ratings: int = 5, use_cache: bool = True):
         self.session = session
         self.min_ratings = min_ratings
+        self.use_cache = use_cache
         self.cf = Recommender(session)
         self.cb = ContentRecommender(session)
         self.popular = PopularityRecommender(session)
@@ -65,8 +74,34 @@ class HybridRecommender:
         language: str | None = None,
         min_year: int | None = None
     ):
+        """
+        The strategy is chosen on every call, so the strategy weights keep being
+        exercised; only its candidate list is cached, keyed by (user, filters, strategy).
+        Content-based lists are never cached since they come from a random seed movie.
+        Entries expire after RECOMMENDATION_CACHE_TTL and are invalidated by feedback
+        and similarity recomputes.
+        Callers get a private copy and may mutate it (taste bias, exploration).
+        """
+        strategy = self._select_strategy(user_id, preferred_strategy)
+        params = dict(
+            top_n=top_n, genres=genres, mood=mood, time_context=time_context,
+            max_runtime=max_runtime, min_score=min_score, max_score=max_score,
+            language=language, min_year=min_year
+        )
+        if not self.use_cache or strategy == "content-based":
+            return self._recommend(user_id, strategy, **params)
+
+        key = recommendation_cache.make_key(user_id, strategy=strategy, **params)
+        cached = recommendation_cache.get(user_id, key)
+        if cached is not None:
+            return cached
+
+        result = self._recommend(user_id, strategy, **params)
+        recommendation_cache.set(user_id, key, result)
+        return result
+
+    def _select_strategy(self, user_id: int, preferred_strategy: str | None = None) -> str:
         rating_count = self._user_rating_count(user_id)
-        candidate_count = top_n * 5
 
         # 1. Identify Viable Strategies
         viable = ["popularity-based"]
@@ -78,28 +113,46 @@ class HybridRecommender:
 
         # 2. Select Best Strategy based on Weight
         if preferred_strategy and preferred_strategy in viable:
-            strategy = preferred_strategy
-        else:
-            strategy = self._get_best_strategy(user_id, viable)
+            return preferred_strategy
+        return self._get_best_strategy(user_id, viable)
+
+    def _recommend(
+        self, 
+        user_id: int, 
+        strategy: str,
+        top_n: int = 10, 
+        genres: list[str] | None = None,
+        mood: str | None = None,
+        time_context: str | None = None,
+        max_runtime: int | None = None,
+        min_score: float | None = None,
+        max_score: float | None = None,
+        language: str | None = None,
+        min_year: int | None = None
+    ):
+        candidate_count = top_n * 5
         results = []
         reason = ""
 
         # 3. Execute Selected Strategy
         if strategy == "collaborative-filtering":
-            results = self.cf.recommend(str(user_id), candidate_count, genre_filter=genres, max_runtime=max_runtime, min_score=min_score, max_score=max_score, language=language, min_year=min_year)
-            reason = "User has sufficient interaction history; using collaborative taste."
+            with stage_timer("candidates_cf"):
+                results = self.cf.recommend(str(user_id), candidate_count, genre_filter=genres, max_runtime=max_runtime, min_score=min_score, max_score=max_score, language=language, min_year=min_year)
+            reason = STRATEGY_REASONS[strategy]
             for movie in results:
                 movie["explanation"] = self._cf_explanation()
 
         elif strategy == "content-based":
-            results = self._content_fallback(user_id, candidate_count, genre_filter=genres, max_runtime=max_runtime, min_score=min_score, max_score=max_score, language=language, min_year=min_year)
-            reason = "User has some history; matched against your liked movie genres."
+            with stage_timer("candidates_content"):
+                results = self._content_fallback(user_id, candidate_count, genre_filter=genres, max_runtime=max_runtime, min_score=min_score, max_score=max_score, language=language, min_year=min_year)
+            reason = STRATEGY_REASONS[strategy]
 
         # FALLBACK (Safety)
         if not results:
-            results = self.popular.recommend(candidate_count, genre_filter=genres, max_runtime=max_runtime, min_score=min_score, max_score=max_score, language=language, min_year=min_year)
+            with stage_timer("candidates_popularity"):
+                results = self.popular.recommend(candidate_count, genre_filter=genres, max_runtime=max_runtime, min_score=min_score, max_score=max_score, language=language, min_year=min_year)
             strategy = "popularity-based"
-            reason = "Using globally trending movies for best experience."
+            reason = STRATEGY_REASONS[strategy]
             for movie in results:
                 movie["explanation"] = self._popularity_explanation(
                     movie.get("rating_count", 0),
@@ -109,13 +162,14 @@ class HybridRecommender:
         # ... (rest of the re-ranking logic) ...
         # --- INTENT-AWARE RE-RANKING (Phase 8) ---
         if results:
-            results = apply_intent_boosts(
-                recommendations=results,
-                intent=strategy,
-                genres=genres,
-                mood=mood,
-                time_context=time_context
-            )
+            with stage_timer("rerank"):
+                results = apply_intent_boosts(
+                    recommendations=results,
+                    intent=strategy,
+                    genres=genres,
+                    mood=mood,
+                    time_context=time_context
+                )
             
             # --- PRESERVE EXPLAINABILITY (Step 4) ---
             if mood or time_context:
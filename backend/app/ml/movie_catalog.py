@@ -0,0 +1,191 @@
+"""
+Process-wide, read-only movie catalog held in NumPy columns.
+Replaces the per-request ORM filter chain (genre any(), runtime, audience_score,
+language, release_year) with vectorized masks, and builds recommendation dicts
+without lazy-loading Movie.genres row by row.
+
+Loaded once at startup and reloaded after MOVIE_CATALOG_TTL seconds so movies
+added by the ingestion scripts show up without a restart.
+"""
+import threading
+import time
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.core.config import MOVIE_CATALOG_TTL
+from app.core.database import ReadSessionLocal
+from app.models.base_models import Genre, Movie, movie_genres_table
+
+
+def _frozen(array: np.ndarray) -> np.ndarray:
+    array.flags.writeable = False
+    return array
+
+
+def _optional_int(value: float):
+    return None if np.isnan(value) else int(value)
+
+
+def _optional_float(value: float):
+    return None if np.isnan(value) else float(value)
+
+
+class MovieCatalog:
+    def __init__(self, session: Session):
+        movies = (
+            session.query(
+                Movie.id, Movie.title, Movie.release_year, Movie.poster_url, Movie.overview,
+                Movie.runtime, Movie.language, Movie.audience_score
+            )
+            .order_by(Movie.id)
+            .all()
+        )
+        n = len(movies)
+
+        # Numeric columns use NaN for NULL, so comparisons drop them like SQL does
+        self.ids = _frozen(np.array([m.id for m in movies], dtype=np.int64))
+        self.release_year = _frozen(np.array([np.nan if m.release_year is None else m.release_year for m in movies], dtype=np.float64))
+        self.runtime = _frozen(np.array([np.nan if m.runtime is None else m.runtime for m in movies], dtype=np.float64))
+        self.audience_score = _frozen(np.array([np.nan if m.audience_score is None else m.audience_score for m in movies], dtype=np.float64))
+
+        self.languages = tuple(sorted({m.language for m in movies if m.language is not None}))
+        language_code = {lang: i for i, lang in enumerate(self.languages)}
+        self.language = _frozen(np.array([language_code.get(m.language, -1) for m in movies], dtype=np.int32))
+
+        self.titles = tuple(m.title for m in movies)
+        self.poster_urls = tuple(m.poster_url for m in movies)
+        self.overviews = tuple(m.overview for m in movies)
+
+        # Genre bitmask, one uint64 word per 64 genres
+        self.genre_names = tuple(name for (name,) in session.query(Genre.name).order_by(Genre.id))
+        self.genre_bit = {name: i for i, name in enumerate(self.genre_names)}
+        genre_bit_by_id = {
+            genre_id: self.genre_bit[name] for genre_id, name in session.query(Genre.id, Genre.name)
+        }
+        words = max(1, (len(self.genre_names) + 63) // 64)
+        genre_mask = np.zeros((n, words), dtype=np.uint64)
+        pairs = np.array(session.query(movie_genres_table.c.movie_id, movie_genres_table.c.genre_id).all(), dtype=np.int64).reshape(-1, 2)
+        if len(pairs):
+            rows = np.searchsorted(self.ids, pairs[:, 0])
+            known = (rows < n) & (self.ids[np.minimum(rows, n - 1)] == pairs[:, 0]) if n else np.zeros(len(pairs), dtype=bool)
+            bits = np.array([genre_bit_by_id.get(g, -1) for g in pairs[:, 1]], dtype=np.int64)
+            known &= bits >= 0
+            np.bitwise_or.at(
+                genre_mask,
+                (rows[known], bits[known] // 64),
+                np.left_shift(np.uint64(1), (bits[known] % 64).astype(np.uint64))
+            )
+        self.genre_mask = _frozen(genre_mask)
+        self.loaded_at = time.time()
+
+    def __len__(self):
+        return len(self.ids)
+
+    # ─── Lookups ──────────────────────────────────────────────
+    def rows_of(self, movie_ids) -> np.ndarray:
+        """Catalog rows for `movie_ids` in the given order; unknown ids get -1."""
+        movie_ids = np.asarray(movie_ids, dtype=np.int64)
+        if not len(self.ids) or not len(movie_ids):
+            return np.full(len(movie_ids), -1, dtype=np.int64)
+        rows = np.searchsorted(self.ids, movie_ids)
+        rows = np.minimum(rows, len(self.ids) - 1)
+        return np.where(self.ids[rows] == movie_ids, rows, -1)
+
+    def genres_of(self, row: int) -> list[str]:
+        mask = self.genre_mask[row]
+        return [
+            name for i, name in enumerate(self.genre_names)
+            if int(mask[i // 64]) >> (i % 64) & 1
+        ]
+
+    def movie_dict(self, row: int) -> dict:
+        """Same fields the recommenders used to read off the ORM Movie."""
+        return {
+            "id": int(self.ids[row]),
+            "title": self.titles[row],
+            "release_year": _optional_int(self.release_year[row]),
+            "poster_url": self.poster_urls[row],
+            "overview": self.overviews[row],
+            "runtime": _optional_int(self.runtime[row]),
+            "language": self.languages[self.language[row]] if self.language[row] >= 0 else None,
+            "audience_score": _optional_float(self.audience_score[row]),
+            "genres": self.genres_of(row),
+        }
+
+    # ─── Filters ──────────────────────────────────────────────
+    def filter_mask(
+        self,
+        rows: np.ndarray | None = None,
+        genre_filter: list[str] | None = None,
+        max_runtime: int | None = None,
+        min_score: float | None = None,
+        max_score: float | None = None,
+        language: str | None = None,
+        min_year: int | None = None
+    ) -> np.ndarray:
+        """
+        Boolean mask over `rows` (or the whole catalog) with the recommenders'
+        filter semantics: falsy filters are ignored, NULL columns never match.
+        """
+        if rows is None:
+            rows = np.arange(len(self.ids))
+        rows = np.asarray(rows, dtype=np.int64)
+        mask = rows >= 0
+        safe = np.where(mask, rows, 0)
+
+        with np.errstate(invalid="ignore"):
+            if genre_filter:
+                query = np.zeros(self.genre_mask.shape[1], dtype=np.uint64)
+                for name in genre_filter:
+                    bit = self.genre_bit.get(name)
+                    if bit is not None:
+                        query[bit // 64] |= np.uint64(1) << np.uint64(bit % 64)
+                mask &= (self.genre_mask[safe] & query).any(axis=1)
+            if max_runtime:
+                mask &= self.runtime[safe] <= max_runtime
+            if min_score:
+                mask &= self.audience_score[safe] >= min_score
+            if max_score:
+                mask &= self.audience_score[safe] <= max_score
+            if language:
+                code = self.languages.index(language) if language in self.languages else -2
+                mask &= self.language[safe] == code
+            if min_year:
+                mask &= self.release_year[safe] >= min_year
+        return mask
+
+
+# ─── Process-wide instance ────────────────────────────────────
+_catalog: MovieCatalog | None = None
+_lock = threading.Lock()
+
+
+def load_catalog(session: Session | None = None) -> MovieCatalog:
+    """(Re)builds the shared catalog; called at startup and whenever it expires."""
+    global _catalog
+    own_session = session is None
+    session = session or ReadSessionLocal()
+    try:
+        catalog = MovieCatalog(session)
+    finally:
+        if own_session:
+            session.close()
+    _catalog = catalog
+    print(f"Movie catalog loaded: {len(catalog)} movies, {len(catalog.genre_names)} genres")
+    return catalog
+
+
+def get_catalog() -> MovieCatalog:
+    catalog = _catalog
+    if catalog is not None and time.time() - catalog.loaded_at < MOVIE_CATALOG_TTL:
+        return catalog
+    # Expired: one thread reloads, the others keep serving the old snapshot
+    if not _lock.acquire(blocking=catalog is None):
+        return catalog
+    try:
+        if _catalog is not None and _catalog is not catalog:
+            return _catalog
+        return load_catalog()
+    finally:
+        _lock.release()
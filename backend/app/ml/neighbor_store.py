@@ -0,0 +1,150 @@
+"""
+Memory-mapped CSR neighbor store.
+precompute_matrices.py writes each similarity table as four fixed-width .npy arrays:
+
+    keys.npy       sorted source ids (row i belongs to keys[i])
+    offsets.npy    int64, len(keys) + 1; row i spans offsets[i]:offsets[i + 1]
+    neighbors.npy  int32 row numbers of the neighbors (ids are keys[neighbors])
+    scores.npy     float32 similarity, descending within each row
+
+Readers open them with mmap_mode="r", so a lookup is a binary search plus two
+array slices, and every uvicorn worker shares the same pages via the OS cache.
+Each write goes to a fresh version directory and CURRENT is swapped last.
+
+A store is a snapshot: users the incremental updater rewrote after it was built
+are listed in user_similarity_updates, and their SQL rows win (see updated_since).
+"""
+import os
+import shutil
+import time
+from datetime import datetime
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.core.config import SIMILARITY_INDEX_DIR, SIMILARITY_BACKEND
+from app.models.base_models import UserSimilarityUpdate
+
+USER_STORE = "user_neighbors"
+MOVIE_STORE = "movie_neighbors"
+POINTER_FILE = "CURRENT"
+KEEP_VERSIONS = 2
+
+
+class NeighborStore:
+    def __init__(self, path: str):
+        self.path = path
+        self.keys = np.load(os.path.join(path, "keys.npy"), mmap_mode="r")
+        self.offsets = np.load(os.path.join(path, "offsets.npy"), mmap_mode="r")
+        self.neighbors = np.load(os.path.join(path, "neighbors.npy"), mmap_mode="r")
+        self.scores = np.load(os.path.join(path, "scores.npy"), mmap_mode="r")
+        # Version directories are named v<time_ns> by write_store
+        self.built_at = datetime.utcfromtimestamp(int(os.path.basename(path)[1:]) / 1e9)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def row_of(self, key) -> int | None:
+        row = int(np.searchsorted(self.keys, key))
+        if row < len(self.keys) and self.keys[row] == key:
+            return row
+        return None
+
+    def neighbors_of(self, key, limit: int | None = None) -> list[tuple] | None:
+        """
+        [(neighbor_id, score), ...] best first, or None if `key` has no stored row
+        (callers then fall back to SQL). Rows rewritten since the snapshot are not
+        detected here; check updated_since first.
+        """
+        row = self.row_of(key)
+        if row is None:
+            return None
+        start, stop = int(self.offsets[row]), int(self.offsets[row + 1])
+        if start == stop:
+            return None
+        if limit is not None:
+            stop = min(stop, start + limit)
+        ids = self.keys[self.neighbors[start:stop]]
+        return list(zip(ids.tolist(), self.scores[start:stop].tolist()))
+
+
+def write_store(name: str, src_ids: np.ndarray, dst_ids: np.ndarray, scores: np.ndarray, root: str = SIMILARITY_INDEX_DIR) -> str:
+    """Writes columnar (src, dst, score) pairs as a new store version and makes it current."""
+    src_ids, dst_ids = np.asarray(src_ids), np.asarray(dst_ids)
+    if src_ids.dtype == object:
+        src_ids, dst_ids = src_ids.astype(str), dst_ids.astype(str)
+
+    keys = np.unique(np.concatenate([src_ids, dst_ids]))
+    src_rows = np.searchsorted(keys, src_ids)
+    dst_rows = np.searchsorted(keys, dst_ids).astype(np.int32)
+    scores = np.asarray(scores, dtype=np.float32)
+
+    order = np.lexsort((-scores, src_rows))
+    offsets = np.zeros(len(keys) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src_rows, minlength=len(keys)), out=offsets[1:])
+
+    base = os.path.join(root, name)
+    version = f"v{time.time_ns()}"
+    path = os.path.join(base, version)
+    os.makedirs(path)
+    np.save(os.path.join(path, "keys.npy"), keys)
+    np.save(os.path.join(path, "offsets.npy"), offsets)
+    np.save(os.path.join(path, "neighbors.npy"), dst_rows[order])
+    np.save(os.path.join(path, "scores.npy"), scores[order])
+
+    pointer = os.path.join(base, POINTER_FILE)
+    with open(pointer + ".tmp", "w") as f:
+        f.write(version)
+    os.replace(pointer + ".tmp", pointer)
+
+    # Old versions may still be mapped by running workers; keep the previous one around
+    versions = sorted(v for v in os.listdir(base) if v.startswith("v"))
+    for stale in versions[:-KEEP_VERSIONS]:
+        shutil.rmtree(os.path.join(base, stale), ignore_errors=True)
+    return path
+
+
+def updated_since(session: Session, store: NeighborStore, user_ids: list[str]) -> set[str]:
+    """The given users whose user_similarities rows were rewritten after `store` was built."""
+    if not user_ids:
+        return set()
+    rows = (
+        session.query(UserSimilarityUpdate.user_id)
+        .filter(UserSimilarityUpdate.user_id.in_(user_ids))
+        .filter(UserSimilarityUpdate.updated_at > store.built_at)
+    )
+    return {user_id for (user_id,) in rows}
+
+
+# ─── Process-wide cache (reopened when CURRENT changes) ───
+_opened: dict[str, tuple[str, NeighborStore]] = {}
+
+
+def _get_store(name: str) -> NeighborStore | None:
+    if SIMILARITY_BACKEND != "mmap":
+        return None
+    base = os.path.join(SIMILARITY_INDEX_DIR, name)
+    try:
+        with open(os.path.join(base, POINTER_FILE)) as f:
+            version = f.read().strip()
+    except OSError:
+        return None
+
+    cached = _opened.get(name)
+    if cached and cached[0] == version:
+        return cached[1]
+
+    try:
+        store = NeighborStore(os.path.join(base, version))
+    except OSError:
+        return None
+    _opened[name] = (version, store)
+    return store
+
+
+def get_user_store() -> NeighborStore | None:
+    return _get_store(USER_STORE)
+
+
+def get_movie_store() -> NeighborStore | None:
+    return _get_store(MOVIE_STORE)
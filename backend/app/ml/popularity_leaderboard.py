@@ -0,0 +1,240 @@
+"""
+Materialized popularity leaderboards.
+Per-movie rating sums and counts are kept in arrays aligned to the movie catalog:
+built with one GROUP BY at startup, then advanced by reading only the ratings
+recorded at or after the watermark (falling back to a rebuild when the table
+changed in ways a timestamp cannot see). Scores are Bayesian weighted averages
+
+    score = (prior_votes * global_mean + rating_sum) / (prior_votes + rating_count)
+
+so a handful of 5-star ratings no longer outranks a well-rated classic, and
+ranked boards are kept for all movies and per genre, language and decade.
+Cold-start requests then walk a board instead of aggregating the ratings table.
+"""
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import POPULARITY_PRIOR_VOTES, POPULARITY_RECOUNT_SECONDS, POPULARITY_REFRESH_SECONDS
+from app.core.database import ReadSessionLocal
+from app.ml.movie_catalog import MovieCatalog, get_catalog
+from app.models.base_models import Rating
+
+SCAN_CHUNK = 256
+
+
+class Boards:
+    """Immutable snapshot of scores and ranked catalog rows; swapped whole on refresh."""
+
+    def __init__(self, catalog: MovieCatalog, sums: np.ndarray, counts: np.ndarray, prior_votes: float):
+        self.catalog = catalog
+        self.counts = counts
+        rated = counts > 0
+        self.global_mean = float(sums.sum() / counts.sum()) if rated.any() else 0.0
+        with np.errstate(invalid="ignore", divide="ignore"):
+            self.avg_ratings = np.where(rated, sums / counts, 0.0)
+        self.scores = (prior_votes * self.global_mean + sums) / (prior_votes + counts)
+
+        # Best score first, then most ratings, then lowest id
+        rows = np.nonzero(rated)[0]
+        ranked = rows[np.lexsort((catalog.ids[rows], -counts[rows], -self.scores[rows]))]
+        self.all = ranked
+
+        self.by_genre = {}
+        for name, bit in catalog.genre_bit.items():
+            word, shift = bit // 64, np.uint64(bit % 64)
+            member = (catalog.genre_mask[ranked, word] >> shift) & np.uint64(1)
+            self.by_genre[name] = ranked[member.astype(bool)]
+
+        self.by_language = {
+            language: ranked[catalog.language[ranked] == code]
+            for code, language in enumerate(catalog.languages)
+        }
+
+        years = catalog.release_year[ranked]
+        known = ~np.isnan(years)
+        decades = np.full(len(ranked), -1, dtype=np.int64)
+        decades[known] = (years[known] // 10 * 10).astype(np.int64)
+        self.by_decade = {int(d): ranked[decades == d] for d in np.unique(decades[known])}
+
+    def board(self, genre: str | None = None, language: str | None = None, decade: int | None = None) -> np.ndarray:
+        """Ranked rows for the narrowest requested board (callers mask the rest)."""
+        candidates = [self.all]
+        if genre is not None:
+            candidates.append(self.by_genre.get(genre, self.all[:0]))
+        if language is not None:
+            candidates.append(self.by_language.get(language, self.all[:0]))
+        if decade is not None:
+            candidates.append(self.by_decade.get(decade, self.all[:0]))
+        return min(candidates, key=len)
+
+
+class PopularityLeaderboard:
+    def __init__(self, prior_votes: float = POPULARITY_PRIOR_VOTES):
+        self.prior_votes = prior_votes
+        self.catalog: MovieCatalog | None = None
+        self.sums = np.zeros(0)
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.watermark: datetime | None = None
+        self.at_watermark: set[tuple[str, int]] = set()  # (user_id, movie_id) counted with rated_at == watermark
+        self.total = 0  # rating rows folded into sums/counts
+        self.refreshed_at = 0.0
+        self.counted_at = 0.0  # last time the table size was checked against total
+        self.boards: Boards | None = None
+
+    def rebuild(self, session: Session, catalog: MovieCatalog):
+        """Full aggregate; used at startup and whenever the catalog is reloaded."""
+        sums = np.zeros(len(catalog))
+        counts = np.zeros(len(catalog), dtype=np.int64)
+        aggregates = (
+            session.query(Rating.movie_id, func.sum(Rating.rating), func.count(Rating.user_id), func.max(Rating.rated_at))
+            .group_by(Rating.movie_id)
+            .all()
+        )
+        watermark, at_watermark = None, set()
+        if aggregates:
+            rows = catalog.rows_of([a[0] for a in aggregates])
+            known = rows >= 0
+            sums[rows[known]] = np.array([float(a[1]) for a in aggregates])[known]
+            counts[rows[known]] = np.array([a[2] for a in aggregates], dtype=np.int64)[known]
+            stamps = [a[3] for a in aggregates if a[3] is not None]
+            watermark = max(stamps) if stamps else None
+        if watermark is not None:
+            at_watermark = set(session.query(Rating.user_id, Rating.movie_id).filter(Rating.rated_at == watermark).all())
+
+        self.catalog, self.sums, self.counts = catalog, sums, counts
+        self.watermark, self.at_watermark = watermark, at_watermark
+        self.total = sum(a[2] for a in aggregates)
+        self.boards = Boards(catalog, sums, counts, self.prior_votes)
+        self.refreshed_at = self.counted_at = time.time()
+
+    def refresh(self, session: Session) -> int:
+        """
+        Folds in ratings recorded at or after the watermark (skipping the ones already
+        counted at it); returns how many were applied. Timestamps alone miss backdated
+        rows (ingest_movielens keeps historic times), re-ratings and deletes, so if the
+        table size no longer equals what has been folded in, the boards are rebuilt.
+        The size is checked when new ratings arrived, and otherwise only every
+        POPULARITY_RECOUNT_SECONDS. Without a watermark (empty table, or no rated_at
+        at all) there is nothing to read incrementally and the boards are rebuilt.
+        """
+        if self.watermark is None:
+            total = self.total
+            self.rebuild(session, self.catalog)
+            return self.total - total
+
+        query = (
+            session.query(Rating.user_id, Rating.movie_id, Rating.rating, Rating.rated_at)
+            .filter(Rating.rated_at >= self.watermark)
+        )
+        new_ratings = [r for r in query if r[3] != self.watermark or (r[0], r[1]) not in self.at_watermark]
+        now = time.time()
+        self.refreshed_at = now
+
+        if new_ratings or now - self.counted_at >= POPULARITY_RECOUNT_SECONDS:
+            table_size = session.query(func.count(Rating.user_id)).scalar() or 0
+            self.counted_at = now
+            if table_size != self.total + len(new_ratings):
+                self.rebuild(session, self.catalog)
+                return len(new_ratings)
+        if not new_ratings:
+            return 0
+
+        rows = self.catalog.rows_of([r[1] for r in new_ratings])
+        known = rows >= 0
+        sums, counts = self.sums.copy(), self.counts.copy()
+        np.add.at(sums, rows[known], np.array([r[2] for r in new_ratings], dtype=np.float64)[known])
+        np.add.at(counts, rows[known], 1)
+
+        stamps = [r[3] for r in new_ratings if r[3] is not None]
+        if stamps:
+            watermark = max(stamps)
+            if watermark > self.watermark:
+                self.watermark, self.at_watermark = watermark, set()
+            self.at_watermark |= {(r[0], r[1]) for r in new_ratings if r[3] == self.watermark}
+        self.total += len(new_ratings)
+        self.sums, self.counts = sums, counts
+        self.boards = Boards(self.catalog, sums, counts, self.prior_votes)
+        return len(new_ratings)
+
+    def top(
+        self,
+        top_n: int = 10,
+        genre_filter: list[str] | None = None,
+        max_runtime: int | None = None,
+        min_score: float | None = None,
+        max_score: float | None = None,
+        language: str | None = None,
+        min_year: int | None = None,
+        decade: int | None = None,
+        min_votes: int = 1
+    ) -> list[dict]:
+        """
+        Catalog movie dicts with "bayesian_score", "avg_rating" and "rating_count", best first.
+        Walks the narrowest board in chunks and stops once top_n rows pass the filters.
+        """
+        boards = self.boards
+        if boards is None:
+            return []
+        catalog = boards.catalog
+        genre = genre_filter[0] if genre_filter and len(genre_filter) == 1 else None
+        board = boards.board(genre=genre, language=language or None, decade=decade)
+
+        picked = []
+        for start in range(0, len(board), max(SCAN_CHUNK, top_n)):
+            chunk = board[start:start + max(SCAN_CHUNK, top_n)]
+            keep = catalog.filter_mask(
+                chunk, genre_filter=genre_filter, max_runtime=max_runtime,
+                min_score=min_score, max_score=max_score, language=language, min_year=min_year
+            )
+            if min_votes > 1:
+                keep &= boards.counts[chunk] >= min_votes
+            if decade is not None:
+                with np.errstate(invalid="ignore"):
+                    keep &= catalog.release_year[chunk] // 10 * 10 == decade
+            picked.extend(chunk[keep][:top_n - len(picked)].tolist())
+            if len(picked) >= top_n:
+                break
+
+        results = []
+        for row in picked:
+            movie = catalog.movie_dict(row)
+            movie["bayesian_score"] = float(boards.scores[row])
+            movie["avg_rating"] = float(boards.avg_ratings[row])
+            movie["rating_count"] = int(boards.counts[row])
+            results.append(movie)
+        return results
+
+
+# ─── Process-wide instance ────────────────────────────────────
+_leaderboard = PopularityLeaderboard()
+_lock = threading.Lock()
+
+
+def get_leaderboard() -> PopularityLeaderboard:
+    """Builds on first use, rebuilds after a catalog reload, otherwise refreshes incrementally."""
+    catalog = get_catalog()
+    stale = _leaderboard.catalog is not catalog
+    due = time.time() - _leaderboard.refreshed_at >= POPULARITY_REFRESH_SECONDS
+    if not stale and not due:
+        return _leaderboard
+
+    # Only the first build blocks; later refreshes happen in one thread while others read the old boards
+    if not _lock.acquire(blocking=_leaderboard.boards is None):
+        return _leaderboard
+    try:
+        session = ReadSessionLocal()
+        try:
+            if _leaderboard.catalog is not catalog:
+                _leaderboard.rebuild(session, catalog)
+            elif time.time() - _leaderboard.refreshed_at >= POPULARITY_REFRESH_SECONDS:
+                _leaderboard.refresh(session)
+        finally:
+            session.close()
+    finally:
+        _lock.release()
+    return _leaderboard
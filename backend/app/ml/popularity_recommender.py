@@ -1,7 +1,6 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 
-from app.models.base_models import Movie, Rating, Genre
+from app.ml.popularity_leaderboard import get_leaderboard
 
 
 class PopularityRecommender:
@@ -20,74 +19,28 @@ class PopularityRecommender:
         min_year: int | None = None
     ):
         """
-        Recommend globally popular movies based on
-        average rating and number of ratings.
+        Recommend globally popular movies from the materialized leaderboard,
+        ranked by Bayesian-weighted average rating.
         Optional filters scope results using enriched TMDb data.
         """
-        query = (
-            self.session.query(
-                Movie.id,
-                Movie.title,
-                Movie.release_year,
-                Movie.poster_url,
-                Movie.overview,
-                Movie.runtime,
-                Movie.language,
-                Movie.audience_score,
-                func.avg(Rating.rating).label("avg_rating"),
-                func.count(Rating.user_id).label("rating_count")
-            )
-            .join(Rating, Rating.movie_id == Movie.id)
-        )
- 
-        if genre_filter:
-            # Note: The above is a bit complex in SQLAlchemy for many-to-many.
-            # A simpler way if genres is a relationship:
-            query = query.filter(Movie.genres.any(Genre.name.in_(genre_filter)))
-            
-        if max_runtime:
-            query = query.filter(Movie.runtime <= max_runtime)
-        if min_score:
-            query = query.filter(Movie.audience_score >= min_score)
-        if max_score:
-            query = query.filter(Movie.audience_score <= max_score)
-        if language:
-            query = query.filter(Movie.language == language)
-        if min_year:
-            query = query.filter(Movie.release_year >= min_year)
- 
         # Reduce minimum votes if strict filters are applied to prevent over-filtering niche queries
         current_min_votes = self.min_votes
         if genre_filter or max_runtime or min_score or max_score or language:
             current_min_votes = 1  # Just ensure it has at least 1 rating so it has an average score
 
-        movies = (
-            query
-            .group_by(Movie.id)
-            .having(func.count(Rating.user_id) >= current_min_votes)
-            .order_by(
-                func.avg(Rating.rating).desc(),
-                func.count(Rating.user_id).desc()
-            )
-            .limit(top_n)
-            .all()
+        results = get_leaderboard().top(
+            top_n,
+            genre_filter=genre_filter,
+            max_runtime=max_runtime,
+            min_score=min_score,
+            max_score=max_score,
+            language=language,
+            min_year=min_year,
+            min_votes=current_min_votes
         )
 
-        return [
-            {
-                "id": m.id,
-                "title": m.title,
-                "release_year": m.release_year,
-                "poster_url": m.poster_url,
-                "overview": m.overview,
-                "runtime": m.runtime,
-                "language": m.language,
-                "audience_score": m.audience_score,
-                "avg_rating": round(float(m.avg_rating), 2),
-                "rating_count": m.rating_count,
-                "score": round(float(m.avg_rating), 2), # Use average rating as base score
-                "num_ratings": m.rating_count,          # Used by score adjuster
-                "genres": [g.name for g in self.session.query(Movie).get(m.id).genres] # Need genres for boosts
-            }
-            for m in movies
-        ]
+        for movie in results:
+            movie["avg_rating"] = round(movie["avg_rating"], 2)
+            movie["score"] = round(movie.pop("bayesian_score"), 2)  # Bayesian average as base score
+            movie["num_ratings"] = movie["rating_count"]            # Used by score adjuster
+        return results
@@ -1,15 +1,31 @@
+from datetime import datetime
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from app.ml.decay import decayed_weight
 from app.models.user_genre_preferences import UserGenrePreferences
 
 def get_genre_preferences(session: Session, user_id: any) -> dict[str, float]:
     """
-    Retrieves the current genre preference map for a user.
+    Retrieves the current genre preference map for a user, with time decay
+    applied on read (no writes).
     Returns: { "Action": 0.5, "Drama": -0.2 }
     """
     user_id_str = str(user_id)
+    now = datetime.utcnow()
     prefs = (
-        session.query(UserGenrePreferences)
+        session.query(UserGenrePreferences.genre, UserGenrePreferences.weight, UserGenrePreferences.last_updated)
         .filter_by(user_id=user_id_str)
         .all()
     )
-    return {p.genre: p.weight for p in prefs}
+    return {genre: decayed_weight(weight, last_updated, now) for genre, weight, last_updated in prefs}
+
+
+async def get_genre_preferences_async(session: AsyncSession, user_id: any) -> dict[str, float]:
+    """Async variant of get_genre_preferences."""
+    now = datetime.utcnow()
+    rows = await session.execute(
+        select(UserGenrePreferences.genre, UserGenrePreferences.weight, UserGenrePreferences.last_updated)
+        .filter_by(user_id=str(user_id))
+    )
+    return {genre: decayed_weight(weight, last_updated, now) for genre, weight, last_updated in rows}
@@ -0,0 +1,205 @@
+"""
+Recommendation result cache for HybridRecommender.recommend.
+
+Two tiers:
+- In-process LRU with TTL (per uvicorn worker).
+- Optional shared SQLite file (RECOMMENDATION_CACHE_PATH) so workers reuse each
+  other's results and see each other's invalidations.
+
+Invalidation is epoch based: every entry remembers the (global, user) epochs it
+was written under; submit_feedback bumps the user epoch and the precompute job
+bumps the global one, which makes all older entries unreachable.
+"""
+import copy
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from app.core.config import (
+    RECOMMENDATION_CACHE_PATH,
+    RECOMMENDATION_CACHE_SIZE,
+    RECOMMENDATION_CACHE_TTL,
+)
+from app.core.monitoring import RECOMMENDATION_CACHE_REQUESTS
+
+GLOBAL_SCOPE = "*"
+
+
+class LRUTier:
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.entries: OrderedDict = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key: str, epoch: tuple, now: float):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            entry_epoch, expires_at, value = entry
+            if entry_epoch != epoch or expires_at <= now:
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, epoch: tuple, expires_at: float, value):
+        with self.lock:
+            self.entries[key] = (epoch, expires_at, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class SQLiteTier:
+    """Shared tier; one connection per thread, WAL so readers don't block the writer."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS rec_cache ("
+            "key TEXT PRIMARY KEY, epoch TEXT NOT NULL, expires_at REAL NOT NULL, value TEXT NOT NULL)"
+        )
+        conn.execute("CREATE TABLE IF NOT EXISTS rec_cache_epochs (scope TEXT PRIMARY KEY, epoch INTEGER NOT NULL)")
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+        return conn
+
+    def epoch(self, user_id: str) -> tuple:
+        rows = dict(self._conn().execute(
+            "SELECT scope, epoch FROM rec_cache_epochs WHERE scope IN (?, ?)", (GLOBAL_SCOPE, user_id)
+        ).fetchall())
+        return rows.get(GLOBAL_SCOPE, 0), rows.get(user_id, 0)
+
+    def bump(self, scopes: list[str]):
+        conn = self._conn()
+        conn.executemany(
+            "INSERT INTO rec_cache_epochs (scope, epoch) VALUES (?, 1) "
+            "ON CONFLICT(scope) DO UPDATE SET epoch = epoch + 1",
+            [(scope,) for scope in scopes]
+        )
+        if GLOBAL_SCOPE in scopes:
+            conn.execute("DELETE FROM rec_cache")
+        conn.commit()
+
+    def get(self, key: str, epoch: tuple, now: float):
+        row = self._conn().execute(
+            "SELECT value FROM rec_cache WHERE key = ? AND epoch = ? AND expires_at > ?",
+            (key, json.dumps(epoch), now)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, key: str, epoch: tuple, expires_at: float, value):
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO rec_cache (key, epoch, expires_at, value) VALUES (?, ?, ?, ?)",
+            (key, json.dumps(epoch), expires_at, json.dumps(value))
+        )
+        conn.commit()
+
+
+class RecommendationCache:
+    def __init__(self, ttl: float, max_size: int, shared_path: str | None = None):
+        self.ttl = ttl
+        self.lru = LRUTier(max_size)
+        self.shared = SQLiteTier(shared_path) if shared_path else None
+        self.local_epochs: dict[str, int] = {}
+        self.lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    @staticmethod
+    def make_key(user_id, **params) -> str:
+        normalized = {
+            k: sorted(v) if isinstance(v, (list, tuple, set)) else v
+            for k, v in params.items()
+        }
+        return json.dumps([str(user_id), normalized], sort_keys=True)
+
+    def _epoch(self, user_id: str) -> tuple:
+        if self.shared is not None:
+            return self.shared.epoch(user_id)
+        with self.lock:
+            return self.local_epochs.get(GLOBAL_SCOPE, 0), self.local_epochs.get(user_id, 0)
+
+    def get(self, user_id, key: str):
+        """Returns a private copy of the cached value, or None."""
+        if not self.enabled:
+            return None
+        user_id = str(user_id)
+        now = time.time()
+        epoch = self._epoch(user_id)
+
+        value = self.lru.get(key, epoch, now)
+        if value is not None:
+            RECOMMENDATION_CACHE_REQUESTS.labels(tier="lru", result="hit").inc()
+            return copy.deepcopy(value)
+        RECOMMENDATION_CACHE_REQUESTS.labels(tier="lru", result="miss").inc()
+
+        if self.shared is not None:
+            value = self.shared.get(key, epoch, now)
+            if value is not None:
+                RECOMMENDATION_CACHE_REQUESTS.labels(tier="shared", result="hit").inc()
+                self.lru.set(key, epoch, now + self.ttl, value)
+                return copy.deepcopy(value)
+            RECOMMENDATION_CACHE_REQUESTS.labels(tier="shared", result="miss").inc()
+        return None
+
+    def set(self, user_id, key: str, value):
+        if not self.enabled:
+            return
+        user_id = str(user_id)
+        epoch = self._epoch(user_id)
+        expires_at = time.time() + self.ttl
+        stored = copy.deepcopy(value)
+        self.lru.set(key, epoch, expires_at, stored)
+        if self.shared is not None:
+            self.shared.set(key, epoch, expires_at, stored)
+
+    def invalidate_users(self, user_ids):
+        scopes = [str(u) for u in user_ids]
+        if not scopes:
+            return
+        with self.lock:
+            for scope in scopes:
+                self.local_epochs[scope] = self.local_epochs.get(scope, 0) + 1
+        if self.shared is not None:
+            self.shared.bump(scopes)
+        RECOMMENDATION_CACHE_REQUESTS.labels(tier="all", result="invalidate_user").inc(len(scopes))
+
+    def invalidate_user(self, user_id):
+        self.invalidate_users([user_id])
+
+    def invalidate_all(self):
+        with self.lock:
+            self.local_epochs[GLOBAL_SCOPE] = self.local_epochs.get(GLOBAL_SCOPE, 0) + 1
+        self.lru.clear()
+        if self.shared is not None:
+            self.shared.bump([GLOBAL_SCOPE])
+        RECOMMENDATION_CACHE_REQUESTS.labels(tier="all", result="invalidate_all").inc()
+
+
+recommendation_cache = RecommendationCache(
+    ttl=RECOMMENDATION_CACHE_TTL,
+    max_size=RECOMMENDATION_CACHE_SIZE,
+    shared_path=RECOMMENDATION_CACHE_PATH or None
+)
@@ -1,5 +1,6 @@
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.core.database import SessionLocal
+from app.core.unit_of_work import writer_session_scope
 from app.models.recommendation_log import RecommendationLog
 
 
@@ -10,8 +11,6 @@ def log_recommendation_event(
     experiment_group: str = None,
     movie_ids: list = None # New for Phase 21: List of ints
 ):
-    session: Session = SessionLocal()
-
     # Convert list to CSV string
     movie_ids_str = ",".join(map(str, movie_ids)) if movie_ids else ""
 
@@ -23,6 +22,25 @@ def log_recommendation_event(
         movie_ids=movie_ids_str
     )
 
-    session.add(log)
-    session.commit()
-    session.close()
+    with writer_session_scope() as session:
+        session.add(log)
+        session.commit()
+
+
+async def log_recommendation_event_async(
+    session: AsyncSession,
+    user_id: int,
+    strategy: str,
+    num_recommendations: int,
+    experiment_group: str = None,
+    movie_ids: list = None
+):
+    """Async variant of log_recommendation_event on a caller-provided session."""
+    session.add(RecommendationLog(
+        user_id=str(user_id),
+        strategy=strategy,
+        num_recommendations=num_recommendations,
+        experiment_group=experiment_group,
+        movie_ids=",".join(map(str, movie_ids)) if movie_ids else ""
+    ))
+    await session.commit()
@@ -1,6 +1,12 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
-from app.models.base_models import Rating, Movie, Genre, UserSimilarity
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import desc, case, exists, func
+from app.core.config import CF_SCORING
+from app.models.base_models import Rating, UserSimilarity
+from app.ml.ann_index import get_user_index
+from app.ml.neighbor_store import get_user_store, updated_since
+from app.ml.movie_catalog import get_catalog
+
+NEIGHBOR_COUNT = 15 # Top 15 closest users
 
 class Recommender:
     def __init__(self, session: Session):
@@ -18,92 +24,116 @@ class Recommender:
         min_year: int | None = None
     ):
         """
-        Recommend movies using PRECOMPUTED User-CF SQLite scores.
-        Zero memory overhead.
+        Recommend movies using PRECOMPUTED User-CF scores
+        (memory-mapped neighbor store first, user_similarities table as fallback
+        and for users the incremental updater rewrote since the store was built).
+        Users missing from the last precompute fall back to the on-disk ANN index.
         """
-        # ... [logic to get similar users and candidate ratings] ...
         # 1. Get Top Similar Users
+        sim_scores_dict = dict(self._stored_neighbors(user_id, NEIGHBOR_COUNT))
+
+        if not sim_scores_dict:
+            sim_scores_dict = dict(self._ann_neighbors(user_id, NEIGHBOR_COUNT))
+
+        if not sim_scores_dict:
+            return []
+
+        # 2-3. Score movies these similar users rated highly (>= 4) and the
+        # current user has NOT rated: sum(rating * user_similarity)
+        candidate_limit = top_n * 5 if genre_filter else top_n
+        if CF_SCORING == "sql":
+            movie_scores = self._score_candidates_sql(user_id, sim_scores_dict, candidate_limit)
+        else:
+            movie_scores = self._score_candidates_python(user_id, sim_scores_dict, candidate_limit)
+
+        if not movie_scores:
+            return []
+
+        top_movies_ids = list(movie_scores)
+
+        # Movie details and filters come from the in-memory catalog (no per-movie genre loads)
+        catalog = get_catalog()
+        rows = catalog.rows_of(top_movies_ids)
+        keep = catalog.filter_mask(rows, genre_filter=genre_filter, max_runtime=max_runtime, min_score=min_score, max_score=max_score, language=language, min_year=min_year)
+
+        final_list = []
+        for row in rows[keep][:top_n]:
+            movie = catalog.movie_dict(row)
+            movie["score"] = float(movie_scores.get(movie["id"], 0)) # Keep the ML score for boosting
+            final_list.append(movie)
+
+        return final_list
+
+    def _stored_neighbors(self, user_id: str, k: int) -> list[tuple[str, float]]:
+        store = get_user_store()
+        if store is not None and not updated_since(self.session, store, [user_id]):
+            neighbors = store.neighbors_of(user_id, limit=k)
+            if neighbors is not None:
+                return neighbors
+
         similarities = (
-            self.session.query(UserSimilarity)
+            self.session.query(UserSimilarity.similar_user_id, UserSimilarity.similarity_score)
             .filter(UserSimilarity.user_id == user_id)
             .order_by(desc(UserSimilarity.similarity_score))
-            .limit(15) # Top 15 closest users
+            .limit(k)
             .all()
         )
-        
-        if not similarities:
-            return []
-            
-        sim_scores_dict = {sim.similar_user_id: sim.similarity_score for sim in similarities}
-        similar_user_ids = list(sim_scores_dict.keys())
-        
-        # 2. Get the movies that these similar users rated highly (>= 4)
-        # and that the current user has NOT rated.
+        return [(similar_id, score) for similar_id, score in similarities]
+
+    def _score_candidates_sql(self, user_id: str, sim_scores: dict[str, float], limit: int) -> dict[int, float]:
+        """
+        One statement: weighted sum over neighbor ratings, anti-joined against the
+        user's own ratings, aggregated and cut to the top `limit` in the database.
+        """
+        mine = aliased(Rating)
+        weight = case(sim_scores, value=Rating.user_id, else_=0.0)
+        score = func.sum(Rating.rating * weight).label("score")
+
+        rows = (
+            self.session.query(Rating.movie_id, score)
+            .filter(Rating.user_id.in_(list(sim_scores)))
+            .filter(Rating.rating >= 4) # Only good recommendations
+            .filter(~exists().where(mine.user_id == user_id, mine.movie_id == Rating.movie_id)) # Exclude already watched
+            .group_by(Rating.movie_id)
+            .order_by(score.desc(), Rating.movie_id)
+            .limit(limit)
+            .all()
+        )
+        return {movie_id: float(total) for movie_id, total in rows}
+
+    def _score_candidates_python(self, user_id: str, sim_scores: dict[str, float], limit: int) -> dict[int, float]:
+        """Original multi-query path, kept as a fallback (CF_SCORING=python)."""
         user_rated_movie_ids = {
             r[0] for r in self.session.query(Rating.movie_id).filter(Rating.user_id == user_id).all()
         }
-        
+
         candidate_ratings = (
             self.session.query(Rating)
-            .filter(Rating.user_id.in_(similar_user_ids))
+            .filter(Rating.user_id.in_(list(sim_scores)))
             .filter(~Rating.movie_id.in_(user_rated_movie_ids)) # Exclude already watched
             .filter(Rating.rating >= 4) # Only good recommendations
             .all()
         )
-        
-        if not candidate_ratings:
-            return []
-            
-        # 3. Calculate weighted scores: sum(rating * user_similarity)
+
         movie_scores = {}
         for r in candidate_ratings:
-            weight = sim_scores_dict.get(r.user_id, 0)
+            weight = sim_scores.get(r.user_id, 0)
             if r.movie_id not in movie_scores:
                 movie_scores[r.movie_id] = 0
             movie_scores[r.movie_id] += r.rating * weight
-            
-        # Sort candidates
-        candidate_limit = top_n * 5 if genre_filter else top_n
-        top_movies_ids = sorted(movie_scores, key=movie_scores.get, reverse=True)[:candidate_limit]
-        
-        # Get movie details
-        query = self.session.query(Movie).filter(Movie.id.in_(top_movies_ids))
-        
-        if genre_filter:
-            query = query.filter(Movie.genres.any(Genre.name.in_(genre_filter)))
-
-        if max_runtime:
-            query = query.filter(Movie.runtime <= max_runtime)
-        if min_score:
-            query = query.filter(Movie.audience_score >= min_score)
-        if max_score:
-            query = query.filter(Movie.audience_score <= max_score)
-        if language:
-            query = query.filter(Movie.language == language)
-        if min_year:
-            query = query.filter(Movie.release_year >= min_year)
-
-        movies = query.all()
-        
-        # Re-sort because SQL in_ doesn't guarantee order, and take top_n
-        movie_dict = {m.id: m for m in movies}
-        final_list = []
-        for mid in top_movies_ids:
-            if mid in movie_dict:
-                m = movie_dict[mid]
-                final_list.append({
-                    "id": m.id, 
-                    "title": m.title, 
-                    "release_year": m.release_year,
-                    "poster_url": m.poster_url,
-                    "overview": m.overview,
-                    "runtime": m.runtime,
-                    "language": m.language,
-                    "audience_score": m.audience_score,
-                    "genres": [g.name for g in m.genres],
-                    "score": float(movie_scores.get(mid, 0)) # Keep the ML score for boosting
-                })
-            if len(final_list) >= top_n:
-                break
-                
-        return final_list
+
+        top_ids = sorted(movie_scores, key=movie_scores.get, reverse=True)[:limit]
+        return {mid: movie_scores[mid] for mid in top_ids}
+
+    def _ann_neighbors(self, user_id: str, k: int) -> list[tuple[str, float]]:
+        """Approximate neighbors for users the precompute has not seen yet."""
+        index = get_user_index()
+        if index is None:
+            return []
+        user_ratings = dict(
+            self.session.query(Rating.movie_id, Rating.rating).filter(Rating.user_id == user_id).all()
+        )
+        vector = index.encode(user_ratings)
+        if vector is None:
+            return []
+        return index.query(vector, k=k, exclude=user_id)
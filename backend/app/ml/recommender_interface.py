@@ -1,9 +1,10 @@
 from sqlalchemy.orm import Session
 from app.core.database import SessionLocal
+from app.core.unit_of_work import unit_of_work, read_session_scope
+from app.core.monitoring import RECOMMENDATION_COUNT, stage_timer
 from app.ml.hybrid_recommender import HybridRecommender
 from app.ml.strategy_selector import select_best_strategy
-from app.ml.strategy_tracker import record_strategy_use
-from app.ml.recommendation_logger import log_recommendation_event
+from app.ml.write_behind import record_strategy_use, log_recommendation_event
 from app.experiments.assignment import get_or_assign_strategy, EXPERIMENT_GROUP
 
 def get_strategy_for_user(user_id: int, use_experiment: bool = False) -> str:
@@ -21,11 +22,49 @@ def get_strategy_for_user(user_id: int, use_experiment: bool = False) -> str:
 from app.ml.engagement_reader import get_engagement_score
 from app.ml.adaptive_strategy import select_adaptive_strategy
 from app.ml.exploration_logic import apply_exploration
-from app.ml.decay import decay_preferences
 from app.ml.preference_reader import get_genre_preferences
 from app.ml.taste_bias import apply_taste_bias
 from app.ml.safety_controls import SafetyEnforcer
 
+def _finalize_recommendations(result: dict, genre_weights: dict, exploration_rate: float, final_strategy: str, top_n: int) -> list[dict]:
+    """Steps 4-5 plus the safety gate and output formatting, shared by the sync and async paths."""
+    # The hybrid.recommend return dict contains a list of movies under 'recommendations'
+    # We need to extract them to match the original return format and for tracking.
+    recommendations = result.get("recommendations", [])
+    
+    # Phase 20: Apply Taste Bias (Re-ranking)
+    with stage_timer("taste_bias"):
+        recommendations = apply_taste_bias(recommendations, genre_weights)
+    
+    # Phase 19.2: Apply Exploration (Diversity Shuffling)
+    with stage_timer("exploration"):
+        recommendations = apply_exploration(recommendations, exploration_rate)
+
+    # Phase 21.2: Safety Controls (Production Gate)
+    with stage_timer("safety"):
+        recommendations = SafetyEnforcer.filter_low_confidence(recommendations)
+        recommendations = SafetyEnforcer.enforce_limits(recommendations, top_n)
+
+    # Standardize for consumption
+    formatted_recs = []
+    for movie in recommendations:
+        formatted_recs.append({
+            "movie_id": movie.get("id") or movie.get("movie_id"),
+            "title": movie.get("title"),
+            "explanation": movie.get("explanation", ""),
+            "strategy": final_strategy,
+            "runtime": movie.get("runtime"),
+            "language": movie.get("language"),
+            "poster_url": movie.get("poster_url"),
+            "audience_score": movie.get("audience_score"),
+            "overview": movie.get("overview"),
+            "genres": movie.get("genres", [])
+        })
+
+    RECOMMENDATION_COUNT.labels(strategy=final_strategy).inc(len(formatted_recs[:top_n]))
+    return formatted_recs
+
+
 def get_hybrid_recommendations(
     user_id: int, 
     top_n: int = 10, 
@@ -36,34 +75,41 @@ def get_hybrid_recommendations(
     min_score=None,
     max_score=None,
     language=None,
-    min_year=None
+    min_year=None,
+    preferred_strategy=None
 ):
     """
     Orchestrates the recommendation flow:
     1. Select strategy (Adaptive via Phase 19)
-    2. Decay old preferences (Phase 20)
+    2. Read time-decayed preferences (Phase 20)
     3. Fetch recommendations from the hybrid recommender
     4. Apply Taste Bias (Phase 20)
     5. Apply Exploration (Diversity Injection)
     6. Record strategy usage & Log event
+    A preferred_strategy (e.g. "popularity-based" for trending picks) replaces the
+    adaptive selection in step 1 and turns exploration off.
     """
-    session: Session = SessionLocal()
-    try:
-        # Phase 19: Adaptive Strategy Switching
-        base_strategy = select_best_strategy(user_id)
-        
-        engagement = get_engagement_score(session, user_id)
-        
-        adaptive_result = select_adaptive_strategy(base_strategy, engagement)
-        
-        final_strategy = adaptive_result["strategy"]
-        exploration_rate = adaptive_result.get("exploration", 0.0)
+    # One unit of work: the helpers below share this session instead of opening their own
+    # (the read-only steps use the query-only pool under the SQLite production profile)
+    with unit_of_work(), read_session_scope() as session:
+        if preferred_strategy:
+            final_strategy, exploration_rate = preferred_strategy, 0.0
+        else:
+            # Phase 19: Adaptive Strategy Switching
+            with stage_timer("strategy_selection"):
+                base_strategy = select_best_strategy(user_id)
+            
+            with stage_timer("engagement_read"):
+                engagement = get_engagement_score(session, user_id)
+            
+            adaptive_result = select_adaptive_strategy(base_strategy, engagement)
+            
+            final_strategy = adaptive_result["strategy"]
+            exploration_rate = adaptive_result.get("exploration", 0.0)
  
-        # Phase 20: Decay Preferences ("Memory Fading")
-        decay_preferences(session, user_id)
-        
-        # Phase 20: Fetch Active Preferences
-        genre_weights = get_genre_preferences(session, user_id)
+        # Phase 20: Fetch Active Preferences ("Memory Fading" decay is applied on read)
+        with stage_timer("preference_decay"):
+            genre_weights = get_genre_preferences(session, user_id)
  
         hybrid = HybridRecommender(session)
         result = hybrid.recommend(
@@ -80,50 +126,155 @@ def get_hybrid_recommendations(
             preferred_strategy=final_strategy
         )
 
-        # The hybrid.recommend return dict contains a list of movies under 'recommendations'
-        # We need to extract them to match the original return format and for tracking.
-        recommendations = result.get("recommendations", [])
-        
-        # Phase 20: Apply Taste Bias (Re-ranking)
-        recommendations = apply_taste_bias(recommendations, genre_weights)
-        
-        # Phase 19.2: Apply Exploration (Diversity Shuffling)
-        recommendations = apply_exploration(recommendations, exploration_rate)
+        formatted_recs = _finalize_recommendations(result, genre_weights, exploration_rate, final_strategy, top_n)
 
-        # Phase 21.2: Safety Controls (Production Gate)
-        recommendations = SafetyEnforcer.filter_low_confidence(recommendations)
-        recommendations = SafetyEnforcer.enforce_limits(recommendations, top_n)
+        with stage_timer("logging"):
+            record_strategy_use(user_id, final_strategy)
+
+            # Extract IDs
+            rec_ids = [r["movie_id"] for r in formatted_recs]
+
+            log_recommendation_event(
+                user_id=user_id,
+                strategy=final_strategy,
+                num_recommendations=len(formatted_recs),
+                experiment_group=None, # Phase 16: Not in experiment by default
+                movie_ids=rec_ids
+            )
+
+        return formatted_recs[:top_n]
+
+
+# ─── Async pipeline ───────────────────────────────────────────
+import asyncio
+from starlette.concurrency import run_in_threadpool
+from app.core.database import AsyncSessionLocal, SQLITE_TUNED
+from app.ml.strategy_selector import select_best_strategy_async
+from app.ml.engagement_reader import get_engagement_score_async
+from app.ml.preference_reader import get_genre_preferences_async
+from app.ml.strategy_tracker import record_strategy_use_async
+from app.ml.recommendation_logger import log_recommendation_event_async
+from app.ml.write_behind import write_behind
+from app.core.config import WRITE_BEHIND_ENABLED
+
+
+async def _read_strategy(user_id: int) -> str:
+    with stage_timer("strategy_selection"):
+        async with AsyncSessionLocal() as session:
+            return await select_best_strategy_async(session, user_id)
+
+
+async def _read_engagement(user_id: int) -> float:
+    with stage_timer("engagement_read"):
+        async with AsyncSessionLocal() as session:
+            return await get_engagement_score_async(session, user_id)
+
+
+async def _read_preferences(user_id: int) -> dict[str, float]:
+    with stage_timer("preference_decay"):
+        async with AsyncSessionLocal() as session:
+            return await get_genre_preferences_async(session, user_id)
 
-        # Standardize for consumption
-        formatted_recs = []
-        for movie in recommendations:
-            formatted_recs.append({
-                "movie_id": movie.get("id") or movie.get("movie_id"),
-                "title": movie.get("title"),
-                "explanation": movie.get("explanation", ""),
-                "strategy": final_strategy,
-                "runtime": movie.get("runtime"),
-                "language": movie.get("language"),
-                "poster_url": movie.get("poster_url"),
-                "audience_score": movie.get("audience_score"),
-                "overview": movie.get("overview"),
-                "genres": movie.get("genres", [])
-            })
-
-        record_strategy_use(user_id, final_strategy)
-
-        # Extract IDs
-        rec_ids = [r["movie_id"] for r in formatted_recs]
-
-        log_recommendation_event(
+
+async def _record_strategy(user_id: int, strategy: str):
+    async with AsyncSessionLocal() as session:
+        await record_strategy_use_async(session, user_id, strategy)
+
+
+async def _log_event(user_id: int, strategy: str, movie_ids: list):
+    async with AsyncSessionLocal() as session:
+        await log_recommendation_event_async(
+            session,
             user_id=user_id,
-            strategy=final_strategy,
-            num_recommendations=len(formatted_recs),
-            experiment_group=None, # Phase 16: Not in experiment by default
-            movie_ids=rec_ids
+            strategy=strategy,
+            num_recommendations=len(movie_ids),
+            experiment_group=None,
+            movie_ids=movie_ids
         )
 
-        return formatted_recs[:top_n]
 
-    finally:
-        session.close()
+def _write_bookkeeping(user_id: int, strategy: str, movie_ids: list):
+    """Direct (unbuffered) writes on the serialized writer, for the SQLite production profile."""
+    record_strategy_use(user_id, strategy)
+    log_recommendation_event(user_id, strategy, len(movie_ids), None, movie_ids)
+
+
+def _run_hybrid(user_id: int, **kwargs) -> dict:
+    with read_session_scope() as session:
+        return HybridRecommender(session).recommend(user_id=user_id, **kwargs)
+
+
+async def get_hybrid_recommendations_async(
+    user_id: int,
+    top_n: int = 10,
+    genres=None,
+    mood=None,
+    time_context=None,
+    max_runtime=None,
+    min_score=None,
+    max_score=None,
+    language=None,
+    min_year=None,
+    preferred_strategy=None
+):
+    """
+    asyncio version of get_hybrid_recommendations with the same output.
+    Strategy, engagement and (time-decayed) preferences are independent and are read
+    concurrently on async sessions; the CPU-bound hybrid scoring runs in the
+    threadpool; the two bookkeeping writes are queued on the write-behind buffer
+    (or issued together on async sessions when it is disabled, except under the
+    SQLite production profile, where they go through the serialized writer).
+    Falls back to the sync pipeline when no async DB driver is installed.
+    """
+    if AsyncSessionLocal is None:
+        return await run_in_threadpool(
+            get_hybrid_recommendations, user_id, top_n, genres, mood, time_context,
+            max_runtime, min_score, max_score, language, min_year, preferred_strategy
+        )
+
+    if preferred_strategy:
+        final_strategy, exploration_rate = preferred_strategy, 0.0
+        genre_weights = await _read_preferences(user_id)
+    else:
+        base_strategy, engagement, genre_weights = await asyncio.gather(
+            _read_strategy(user_id),
+            _read_engagement(user_id),
+            _read_preferences(user_id)
+        )
+
+        adaptive_result = select_adaptive_strategy(base_strategy, engagement)
+        final_strategy = adaptive_result["strategy"]
+        exploration_rate = adaptive_result.get("exploration", 0.0)
+
+    result = await run_in_threadpool(
+        _run_hybrid,
+        user_id,
+        top_n=top_n,
+        genres=genres,
+        mood=mood,
+        time_context=time_context,
+        max_runtime=max_runtime,
+        min_score=min_score,
+        max_score=max_score,
+        language=language,
+        min_year=min_year,
+        preferred_strategy=final_strategy
+    )
+
+    formatted_recs = _finalize_recommendations(result, genre_weights, exploration_rate, final_strategy, top_n)
+
+    rec_ids = [r["movie_id"] for r in formatted_recs]
+    with stage_timer("logging"):
+        if WRITE_BEHIND_ENABLED:
+            write_behind.record_strategy_use(user_id, final_strategy)
+            write_behind.log_recommendation_event(user_id, final_strategy, len(rec_ids), None, rec_ids)
+        elif SQLITE_TUNED:
+            # The async engine has no serialized writer; use the sync one instead of racing it
+            await run_in_threadpool(_write_bookkeeping, user_id, final_strategy, rec_ids)
+        else:
+            await asyncio.gather(
+                _record_strategy(user_id, final_strategy),
+                _log_event(user_id, final_strategy, rec_ids)
+            )
+
+    return formatted_recs[:top_n]
@@ -0,0 +1,247 @@
+"""
+Incremental User-CF similarity maintenance.
+Keeps the user x movie rating matrix and per-user squared norms in memory
+(the sufficient statistics for cosine), folds new Rating / UserFeedback rows in
+as micro-batches, and rewrites only the user_similarities rows that can change.
+"""
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+from scipy import sparse
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import SIMILARITY_WATERMARK_OVERLAP_SECONDS
+from app.ml.recommendation_cache import recommendation_cache
+from app.ml.sparse_similarity import (
+    BLOCK_SIZE,
+    bulk_load_pairs,
+    iter_feedback_ratings,
+    load_rating_matrix,
+    top_k_block,
+)
+from app.models.base_models import Rating, UserSimilarity, UserSimilarityUpdate
+
+TOP_K = 50
+# rated_at is stamped when a row is flushed, not when it commits, so a rating can become
+# visible after a batch that started later than its rated_at. Each watermark is moved back
+# by this much; replayed ratings are no-ops (see apply_ratings).
+WATERMARK_OVERLAP = timedelta(seconds=SIMILARITY_WATERMARK_OVERLAP_SECONDS)
+
+
+class IncrementalUserSimilarity:
+    def __init__(self, k: int = TOP_K, block_size: int = BLOCK_SIZE):
+        self.k = k
+        self.block_size = block_size
+        self.matrix = sparse.csr_matrix((0, 0), dtype=np.float32)
+        self.sq_norms = np.zeros(0, dtype=np.float64)
+        self.user_index: dict[str, int] = {}
+        self.movie_index: dict[int, int] = {}
+        self.user_ids: list[str] = []
+        # Per-user size and smallest score of the stored top-K row
+        self.row_size = np.zeros(0, dtype=np.int32)
+        self.row_floor = np.zeros(0, dtype=np.float32)
+        self.watermark: datetime | None = None
+
+    # ─── State ────────────────────────────────────────────────
+    def load(self, session: Session, since: datetime | None = None):
+        """
+        Builds the in-memory statistics from the database.
+        `since` should be the time the stored similarity rows were computed;
+        anything rated at or after it is left out of the matrix and replayed by
+        the next micro-batch, so those users are rewritten.
+        """
+        self.watermark = (since or datetime.utcnow()) - WATERMARK_OVERLAP
+        matrix, user_ids, movie_ids = load_rating_matrix(session, before=since)
+        self.matrix = matrix
+        self.user_ids = [str(u) for u in user_ids]
+        self.user_index = {u: i for i, u in enumerate(self.user_ids)}
+        self.movie_index = {int(m): i for i, m in enumerate(movie_ids)}
+        self.sq_norms = np.asarray(matrix.multiply(matrix).sum(axis=1), dtype=np.float64).ravel()
+
+        self.row_size = np.zeros(len(self.user_ids), dtype=np.int32)
+        self.row_floor = np.zeros(len(self.user_ids), dtype=np.float32)
+        stored = (
+            session.query(
+                UserSimilarity.user_id,
+                func.count(UserSimilarity.id),
+                func.min(UserSimilarity.similarity_score)
+            )
+            .group_by(UserSimilarity.user_id)
+        )
+        for user_id, size, floor in stored:
+            row = self.user_index.get(user_id)
+            if row is not None:
+                self.row_size[row] = size
+                self.row_floor[row] = floor
+        return self
+
+    def _grow(self):
+        n_users, n_movies = len(self.user_index), len(self.movie_index)
+        if self.matrix.shape == (n_users, n_movies):
+            return
+        self.matrix.resize((n_users, n_movies))
+        extra = n_users - len(self.sq_norms)
+        if extra > 0:
+            self.sq_norms = np.concatenate([self.sq_norms, np.zeros(extra)])
+            self.row_size = np.concatenate([self.row_size, np.zeros(extra, dtype=np.int32)])
+            self.row_floor = np.concatenate([self.row_floor, np.zeros(extra, dtype=np.float32)])
+
+    def apply_ratings(self, triples: list[tuple[str, int, float]]) -> np.ndarray:
+        """
+        Folds (user_id, movie_id, rating) upserts into the matrix and norms.
+        Re-applying an already-seen rating is a no-op, so overlapping batches are safe.
+        Returns the row indices of users whose vectors changed.
+        """
+        latest: dict[tuple[int, int], float] = {}
+        for user_id, movie_id, rating in triples:
+            user_id = str(user_id)
+            if user_id not in self.user_index:
+                self.user_index[user_id] = len(self.user_ids)
+                self.user_ids.append(user_id)
+            self.movie_index.setdefault(int(movie_id), len(self.movie_index))
+            latest[(self.user_index[user_id], self.movie_index[int(movie_id)])] = float(rating)
+        self._grow()
+
+        if not latest:
+            return np.empty(0, dtype=np.int64)
+
+        keys = np.array(list(latest.keys()), dtype=np.int64)
+        new_values = np.array(list(latest.values()), dtype=np.float64)
+        old_values = np.asarray(self.matrix[keys[:, 0], keys[:, 1]], dtype=np.float64).ravel()
+        changed = new_values != old_values
+        if not changed.any():
+            return np.empty(0, dtype=np.int64)
+
+        keys, new_values, old_values = keys[changed], new_values[changed], old_values[changed]
+        delta = sparse.csr_matrix(
+            ((new_values - old_values).astype(np.float32), (keys[:, 0], keys[:, 1])),
+            shape=self.matrix.shape
+        )
+        self.matrix = (self.matrix + delta).tocsr()
+        self.matrix.eliminate_zeros()
+        np.add.at(self.sq_norms, keys[:, 0], new_values ** 2 - old_values ** 2)
+        return np.unique(keys[:, 0])
+
+    def _cosine_rows(self, rows: np.ndarray) -> np.ndarray:
+        """Dense cosine block for `rows` against every user, from raw dots and stored norms."""
+        dots = (self.matrix[rows] @ self.matrix.T).toarray()
+        norms = np.sqrt(self.sq_norms)
+        denom = np.outer(norms[rows], norms)
+        denom[denom == 0] = np.inf
+        return (dots / denom).astype(np.float32)
+
+    def dirty_rows(self, session: Session, changed: np.ndarray) -> np.ndarray:
+        """
+        Users whose stored top-K can differ after `changed` vectors moved:
+        the changed users themselves, anyone who currently lists one of them,
+        and anyone for whom a changed user now beats their K-th neighbor.
+        """
+        dirty = set(changed.tolist())
+        changed_ids = [self.user_ids[r] for r in changed]
+
+        listing = (
+            session.query(UserSimilarity.user_id)
+            .filter(UserSimilarity.similar_user_id.in_(changed_ids))
+            .distinct()
+        )
+        dirty.update(self.user_index[u] for (u,) in listing if u in self.user_index)
+
+        for start in range(0, len(changed), self.block_size):
+            block_rows = changed[start:start + self.block_size]
+            cosine = self._cosine_rows(block_rows)
+            cosine[np.arange(len(block_rows)), block_rows] = 0
+            beats = (cosine > 0) & (
+                (cosine > self.row_floor[None, :]) | (self.row_size[None, :] < self.k)
+            )
+            dirty.update(np.nonzero(beats.any(axis=0))[0].tolist())
+
+        return np.array(sorted(dirty), dtype=np.int64)
+
+    def rewrite_rows(self, session: Session, rows: np.ndarray) -> int:
+        """
+        Recomputes top-K for `rows` and replaces their user_similarities rows.
+        The users are recorded in user_similarity_updates so readers prefer these
+        rows over the memory-mapped snapshot.
+        """
+        if len(rows) == 0:
+            return 0
+        user_ids = np.array(self.user_ids, dtype=object)
+        updated_at = datetime.utcnow()
+        pairs = 0
+
+        for start in range(0, len(rows), self.block_size):
+            block_rows = rows[start:start + self.block_size]
+            src_rows, dst, score = top_k_block(self._cosine_rows(block_rows), self.k, block_rows)
+
+            session.query(UserSimilarity).filter(
+                UserSimilarity.user_id.in_(user_ids[block_rows].tolist())
+            ).delete(synchronize_session=False)
+            pairs += bulk_load_pairs(
+                session,
+                UserSimilarity.__tablename__,
+                ("user_id", "similar_user_id", "similarity_score"),
+                user_ids[src_rows], user_ids[dst], score
+            )
+            session.query(UserSimilarityUpdate).filter(
+                UserSimilarityUpdate.user_id.in_(user_ids[block_rows].tolist())
+            ).delete(synchronize_session=False)
+            session.execute(
+                UserSimilarityUpdate.__table__.insert(),
+                [{"user_id": u, "updated_at": updated_at} for u in user_ids[block_rows].tolist()]
+            )
+
+            self.row_size[block_rows] = 0
+            self.row_floor[block_rows] = np.inf
+            np.add.at(self.row_size, src_rows, 1)
+            np.minimum.at(self.row_floor, src_rows, score)
+            self.row_floor[block_rows[self.row_size[block_rows] == 0]] = 0
+
+        session.commit()
+        return pairs
+
+    # ─── Micro-batch ──────────────────────────────────────────
+    def fetch_new_ratings(self, session: Session, since: datetime) -> list[tuple[str, int, float]]:
+        """Ratings and explicit-rating feedback recorded at or after `since`."""
+        triples = [
+            (user_id, movie_id, rating)
+            for user_id, movie_id, rating in (
+                session.query(Rating.user_id, Rating.movie_id, Rating.rating)
+                .filter(Rating.rated_at >= since)
+            )
+        ]
+
+        feedback = list(iter_feedback_ratings(session, since=since))
+        if feedback:
+            # Feedback only counts where no Rating row exists (same rule as the full rebuild)
+            rated = {
+                (user_id, movie_id)
+                for user_id, movie_id in (
+                    session.query(Rating.user_id, Rating.movie_id)
+                    .filter(Rating.user_id.in_({f[0] for f in feedback}))
+                )
+            }
+            triples.extend(f for f in feedback if (f[0], f[1]) not in rated)
+        return triples
+
+    def run_micro_batch(self, session: Session) -> dict:
+        """Ingests everything newer than the watermark and rewrites the affected rows."""
+        started = time.perf_counter()
+        batch_started_at = datetime.utcnow()
+
+        triples = self.fetch_new_ratings(session, self.watermark)
+        changed = self.apply_ratings(triples)
+        dirty = self.dirty_rows(session, changed) if len(changed) else changed
+        pairs = self.rewrite_rows(session, dirty)
+        if len(dirty):
+            recommendation_cache.invalidate_users([self.user_ids[r] for r in dirty])
+
+        self.watermark = batch_started_at - WATERMARK_OVERLAP
+        return {
+            "new_ratings": len(triples),
+            "changed_users": len(changed),
+            "rewritten_users": len(dirty),
+            "pairs": pairs,
+            "seconds": round(time.perf_counter() - started, 3)
+        }
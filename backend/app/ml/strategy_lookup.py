@@ -1,18 +1,21 @@
 from sqlalchemy.orm import Session
-from app.core.database import SessionLocal
+from app.core.unit_of_work import session_scope
 from app.models.recommendation_log import RecommendationLog
+from app.ml.write_behind import write_behind
 
 
 def get_last_strategy_for_user(user_id: int) -> str | None:
-    session: Session = SessionLocal()
+    # Logs still waiting in the write-behind buffer are newer than anything in the table
+    pending = write_behind.pending_strategy_for(user_id)
+    if pending:
+        return pending
 
-    log = (
-        session.query(RecommendationLog)
-        .filter(RecommendationLog.user_id == user_id)
-        .order_by(RecommendationLog.created_at.desc())
-        .first()
-    )
+    with session_scope() as session:
+        log = (
+            session.query(RecommendationLog)
+            .filter(RecommendationLog.user_id == user_id)
+            .order_by(RecommendationLog.created_at.desc())
+            .first()
+        )
 
-    session.close()
-
-    return log.strategy if log else None
+        return log.strategy if log else None
@@ -1,5 +1,7 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.core.database import SessionLocal
+from app.core.unit_of_work import session_scope
 from app.models.user_strategy_stats import UserStrategyStats
 
 DEFAULT_ORDER = [
@@ -9,30 +11,44 @@ DEFAULT_ORDER = [
 ]
 
 def select_best_strategy(user_id: int) -> str:
-    session: Session = SessionLocal()
+    with session_scope() as session:
+        stats = (
+            session.query(UserStrategyStats)
+            .filter(UserStrategyStats.user_id == user_id)
+            .all()
+        )
 
+        # Convert to sets for easy comparison
+        used_strategies = {s.strategy for s in stats}
+        
+        # 1. Exploration: Try strategies that haven't been used yet
+        for strategy in DEFAULT_ORDER:
+            if strategy not in used_strategies:
+                return strategy
+
+        # 2. Exploitation: Pick the best-performing one
+        best_stat = (
+            session.query(UserStrategyStats)
+            .filter(UserStrategyStats.user_id == user_id)
+            .order_by(UserStrategyStats.weight.desc())
+            .first()
+        )
+        
+        return best_stat.strategy if best_stat else DEFAULT_ORDER[0]
+
+
+async def select_best_strategy_async(session: AsyncSession, user_id: int) -> str:
+    """Async variant of select_best_strategy on a caller-provided session (one query)."""
     stats = (
-        session.query(UserStrategyStats)
-        .filter(UserStrategyStats.user_id == user_id)
-        .all()
-    )
+        await session.execute(
+            select(UserStrategyStats).filter(UserStrategyStats.user_id == str(user_id))
+        )
+    ).scalars().all()
 
-    # Convert to sets for easy comparison
     used_strategies = {s.strategy for s in stats}
-    
-    # 1. Exploration: Try strategies that haven't been used yet
     for strategy in DEFAULT_ORDER:
         if strategy not in used_strategies:
-            session.close()
             return strategy
 
-    # 2. Exploitation: Pick the best-performing one
-    best_stat = (
-        session.query(UserStrategyStats)
-        .filter(UserStrategyStats.user_id == user_id)
-        .order_by(UserStrategyStats.weight.desc())
-        .first()
-    )
-    
-    session.close()
+    best_stat = max(stats, key=lambda s: s.weight or 0.0, default=None)
     return best_stat.strategy if best_stat else DEFAULT_ORDER[0]
@@ -1,28 +1,52 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.core.database import SessionLocal
+from app.core.unit_of_work import writer_session_scope
 from app.models.user_strategy_stats import UserStrategyStats
 
 
 def record_strategy_use(user_id: int, strategy: str):
-    session: Session = SessionLocal()
+    with writer_session_scope() as session:
+        stat = (
+            session.query(UserStrategyStats)
+            .filter_by(user_id=user_id, strategy=strategy)
+            .first()
+        )
+
+        if not stat:
+            stat = UserStrategyStats(
+                user_id=user_id,
+                strategy=strategy,
+                total_used=1,
+                positive_feedback=0,
+                weight=1.0
+            )
+            session.add(stat)
+        else:
+            stat.total_used += 1
+
+        session.commit()
 
+
+async def record_strategy_use_async(session: AsyncSession, user_id: int, strategy: str):
+    """Async variant of record_strategy_use on a caller-provided session."""
     stat = (
-        session.query(UserStrategyStats)
-        .filter_by(user_id=user_id, strategy=strategy)
-        .first()
-    )
+        await session.execute(
+            select(UserStrategyStats)
+            .filter_by(user_id=str(user_id), strategy=strategy)
+            .limit(1)
+        )
+    ).scalar_one_or_none()
 
     if not stat:
-        stat = UserStrategyStats(
-            user_id=user_id,
+        session.add(UserStrategyStats(
+            user_id=str(user_id),
             strategy=strategy,
             total_used=1,
             positive_feedback=0,
             weight=1.0
-        )
-        session.add(stat)
+        ))
     else:
         stat.total_used += 1
 
-    session.commit()
-    session.close()
+    await session.commit()
@@ -1,6 +1,7 @@
 from sqlalchemy.orm import Session
 from datetime import datetime
 from app.models.user_genre_preferences import UserGenrePreferences
+from app.ml.decay import decayed_weight
 
 LIKE_BOOST = 0.2
 DISLIKE_PENALTY = 0.3
@@ -37,8 +38,9 @@ def update_genre_preferences(
             )
             session.add(pref)
         else:
-            pref.weight += delta
-            # Ensure last_updated is refreshed (it's auto-handled by onupdate in model but good to be explicit/safe)
-            pref.last_updated = datetime.utcnow()
+            # Fold in the decay accrued since the last write, then move the decay anchor
+            now = datetime.utcnow()
+            pref.weight = decayed_weight(pref.weight, pref.last_updated, now) + delta
+            pref.last_updated = now
 
     session.commit()
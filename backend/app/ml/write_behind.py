@@ -0,0 +1,180 @@
+"""
+Write-behind buffer for per-request bookkeeping.
+RecommendationLog rows and UserStrategyStats.total_used increments are queued in
+memory and written by a background thread in one transaction per flush, either
+every WRITE_BEHIND_FLUSH_SECONDS or as soon as WRITE_BEHIND_MAX_BATCH items are
+pending. The buffer is drained on application shutdown (and at interpreter exit).
+"""
+import atexit
+import threading
+from collections import Counter
+from datetime import datetime
+
+from sqlalchemy import insert, update
+from sqlalchemy.orm import Session
+
+from app.core.config import WRITE_BEHIND_ENABLED, WRITE_BEHIND_FLUSH_SECONDS, WRITE_BEHIND_MAX_BATCH
+from app.core.database import WriterSessionLocal
+from app.core.monitoring import WRITE_BEHIND_PENDING
+from app.ml.recommendation_logger import log_recommendation_event as log_recommendation_event_now
+from app.ml.strategy_tracker import record_strategy_use as record_strategy_use_now
+from app.models.recommendation_log import RecommendationLog
+from app.models.user_strategy_stats import UserStrategyStats
+
+MAX_RETRY_BACKLOG = 50_000  # drop the oldest logs past this if the DB stays unavailable
+
+
+class WriteBehindBuffer:
+    def __init__(self, flush_seconds: float, max_batch: int):
+        self.flush_seconds = flush_seconds
+        self.max_batch = max_batch
+        self.logs: list[dict] = []
+        self.increments: Counter = Counter()
+        self.last_strategy: dict[str, str] = {}
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.wake = threading.Event()
+        self.stopping = threading.Event()
+        self.thread: threading.Thread | None = None
+
+    # ─── Producers (request path) ─────────────────────────────
+    def record_strategy_use(self, user_id, strategy: str):
+        with self.lock:
+            self.increments[(str(user_id), strategy)] += 1
+            size = self._size()
+        self._after_enqueue(size)
+
+    def log_recommendation_event(
+        self,
+        user_id,
+        strategy: str,
+        num_recommendations: int,
+        experiment_group: str = None,
+        movie_ids: list = None
+    ):
+        row = {
+            "user_id": str(user_id),
+            "strategy": strategy,
+            "num_recommendations": num_recommendations,
+            "experiment_group": experiment_group,
+            "movie_ids": ",".join(map(str, movie_ids)) if movie_ids else "",
+            "created_at": datetime.utcnow()
+        }
+        with self.lock:
+            self.logs.append(row)
+            self.last_strategy[row["user_id"]] = strategy
+            size = self._size()
+        self._after_enqueue(size)
+
+    def pending_strategy_for(self, user_id) -> str | None:
+        """Latest strategy logged for the user that has not been flushed yet."""
+        with self.lock:
+            return self.last_strategy.get(str(user_id))
+
+    def _size(self) -> int:
+        return len(self.logs) + len(self.increments)
+
+    def _after_enqueue(self, size: int):
+        WRITE_BEHIND_PENDING.set(size)
+        self.start()
+        if size >= self.max_batch:
+            self.wake.set()
+
+    # ─── Consumer ─────────────────────────────────────────────
+    def flush(self) -> int:
+        """Writes everything pending in a single transaction; returns the number of items written."""
+        with self.flush_lock:
+            with self.lock:
+                logs, self.logs = self.logs, []
+                increments, self.increments = self.increments, Counter()
+                last_strategy = dict(self.last_strategy)
+            if not logs and not increments:
+                return 0
+
+            session: Session = WriterSessionLocal()
+            try:
+                if logs:
+                    session.execute(insert(RecommendationLog), logs)
+                for (user_id, strategy), count in increments.items():
+                    updated = session.execute(
+                        update(UserStrategyStats)
+                        .where(UserStrategyStats.user_id == user_id, UserStrategyStats.strategy == strategy)
+                        .values(total_used=UserStrategyStats.total_used + count)
+                    )
+                    if updated.rowcount == 0:
+                        session.add(UserStrategyStats(
+                            user_id=user_id,
+                            strategy=strategy,
+                            total_used=count,
+                            positive_feedback=0,
+                            weight=1.0
+                        ))
+                session.commit()
+                with self.lock:
+                    # Keep entries that changed since the swap; the rest are now readable from the DB
+                    for user_id, strategy in last_strategy.items():
+                        if self.last_strategy.get(user_id) == strategy:
+                            del self.last_strategy[user_id]
+            except Exception as e:
+                session.rollback()
+                print(f"⚠️ [Write-behind] Flush failed, re-queueing {len(logs)} logs: {e}")
+                with self.lock:
+                    self.logs = (logs + self.logs)[-MAX_RETRY_BACKLOG:]
+                    self.increments.update(increments)
+                return 0
+            finally:
+                session.close()
+                with self.lock:
+                    WRITE_BEHIND_PENDING.set(self._size())
+            return len(logs) + len(increments)
+
+    def _run(self):
+        while not self.stopping.is_set():
+            self.wake.wait(self.flush_seconds)
+            self.wake.clear()
+            self.flush()
+
+    def start(self):
+        if self.thread is not None and self.thread.is_alive():
+            return
+        with self.flush_lock:
+            if self.thread is not None and self.thread.is_alive():
+                return
+            self.stopping.clear()
+            self.thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        """Stops the flusher and drains whatever is still queued."""
+        self.stopping.set()
+        self.wake.set()
+        if self.thread is not None:
+            self.thread.join(timeout=10)
+            self.thread = None
+        self.flush()
+
+
+write_behind = WriteBehindBuffer(WRITE_BEHIND_FLUSH_SECONDS, WRITE_BEHIND_MAX_BATCH)
+atexit.register(write_behind.stop)
+
+
+def record_strategy_use(user_id: int, strategy: str):
+    """Buffered record_strategy_use (direct write when WRITE_BEHIND_ENABLED is off)."""
+    if WRITE_BEHIND_ENABLED:
+        write_behind.record_strategy_use(user_id, strategy)
+    else:
+        record_strategy_use_now(user_id, strategy)
+
+
+def log_recommendation_event(
+    user_id: int,
+    strategy: str,
+    num_recommendations: int,
+    experiment_group: str = None,
+    movie_ids: list = None
+):
+    """Buffered log_recommendation_event (direct write when WRITE_BEHIND_ENABLED is off)."""
+    if WRITE_BEHIND_ENABLED:
+        write_behind.log_recommendation_event(user_id, strategy, num_recommendations, experiment_group, movie_ids)
+    else:
+        log_recommendation_event_now(user_id, strategy, num_recommendations, experiment_group, movie_ids)
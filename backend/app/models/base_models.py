@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Table
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Table, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.core.database import Base
@@ -35,6 +35,11 @@ class MovieSimilarity(Base):
     similar_movie_id = Column(Integer, ForeignKey("movies.id"), nullable=False)
     similarity_score = Column(Float, nullable=False)
 
+    __table_args__ = (
+        # Covers "neighbors of a movie, best first" without touching the table
+        Index("ix_movie_similarities_movie_score", "movie_id", "similarity_score", "similar_movie_id"),
+    )
+
     movie = relationship("Movie", foreign_keys=[movie_id])
     similar_movie = relationship("Movie", foreign_keys=[similar_movie_id])
 
@@ -47,9 +52,22 @@ class UserSimilarity(Base):
     similar_user_id = Column(String, ForeignKey("users.id"), nullable=False)
     similarity_score = Column(Float, nullable=False)
 
+    __table_args__ = (
+        # Covers "neighbors of a user, best first" without touching the table
+        Index("ix_user_similarities_user_score", "user_id", "similarity_score", "similar_user_id"),
+    )
+
     user = relationship("User", foreign_keys=[user_id])
     similar_user = relationship("User", foreign_keys=[similar_user_id])
 
+
+class UserSimilarityUpdate(Base):
+    """Users whose user_similarities rows the incremental updater rewrote, and when."""
+    __tablename__ = "user_similarity_updates"
+
+    user_id = Column(String, ForeignKey("users.id"), primary_key=True)
+    updated_at = Column(DateTime, nullable=False)
+
 # ---------------------------
 # Core Tables
 # ---------------------------
@@ -114,6 +132,12 @@ class Rating(Base):
     rating = Column(Integer, nullable=False)  # 1-5 scale
     rated_at = Column(DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        Index("ix_ratings_user_rating", "user_id", "rating", "movie_id"),  # a user's liked movies / CF candidates
+        Index("ix_ratings_movie_rating", "movie_id", "rating"),  # per-movie aggregates
+        Index("ix_ratings_rated_at", "rated_at"),  # popularity leaderboard refresh watermark
+    )
+
     user = relationship("User", back_populates="ratings")
     movie = relationship("Movie", back_populates="ratings")
 
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from .base_models import Base
@@ -13,6 +13,10 @@ class UserFeedback(Base):
     liked = Column(Integer, nullable=True)  # 1 = liked, 0 = disliked
     strategy = Column(String, nullable=True) # New for Phase 15: Denormalized for fast analytics
     timestamp = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_user_feedback_user_timestamp", "user_id", "timestamp"),
+    )
     
     # Relationships
     user = relationship("User", back_populates="feedbacks")
@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy import Column, Integer, String, DateTime, Index
 from app.core.database import Base
 
 
@@ -13,3 +13,7 @@ class RecommendationLog(Base):
     movie_ids = Column(String, nullable=True) # New for Phase 21: Store comma-separated IDs via text
     num_recommendations = Column(Integer, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_recommendation_logs_user_created", "user_id", "created_at"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime
+from sqlalchemy import Column, Integer, String, Float, DateTime, Index
 from datetime import datetime
 from app.core.database import Base
 
@@ -12,3 +12,7 @@ class UserStrategyStats(Base):
     positive_feedback = Column(Integer, default=0)
     weight = Column(Float, default=1.0)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_user_strategy_stats_user_weight", "user_id", "weight"),
+    )
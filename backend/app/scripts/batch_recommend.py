@@ -0,0 +1,46 @@
+"""
+Batch recommendations for campaigns.
+
+    python -m app.scripts.batch_recommend --out recs.jsonl
+    python -m app.scripts.batch_recommend --users-file ids.txt --top-n 20 --out recs.parquet
+
+Without --users-file every user with at least one rating is scored.
+"""
+import argparse
+import time
+
+from app.core.database import SessionLocal
+from app.ml.batch_recommender import BatchRecommender, BLOCK_SIZE, write_jsonl, write_parquet
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch top-N recommendations")
+    parser.add_argument("--out", required=True, help="Output path (.jsonl or .parquet)")
+    parser.add_argument("--users-file", help="Newline-separated user ids (default: all rated users)")
+    parser.add_argument("--top-n", type=int, default=10)
+    parser.add_argument("--block-size", type=int, default=BLOCK_SIZE)
+    args = parser.parse_args()
+
+    session = SessionLocal()
+    try:
+        started = time.perf_counter()
+        print("Loading rating matrix, genres and popularity pool...")
+        recommender = BatchRecommender(session, top_n=args.top_n, block_size=args.block_size)
+
+        if args.users_file:
+            with open(args.users_file) as f:
+                user_ids = [line.strip() for line in f if line.strip()]
+        else:
+            user_ids = recommender.user_ids
+        print(f"Scoring {len(user_ids)} users in blocks of {args.block_size}...")
+
+        results = recommender.recommend_users(user_ids)
+        writer = write_parquet if args.out.endswith(".parquet") else write_jsonl
+        count = writer(results, args.out)
+        print(f"✅ Wrote {count} users to {args.out} in {time.perf_counter() - started:.2f}s")
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
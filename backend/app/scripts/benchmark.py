@@ -0,0 +1,179 @@
+"""
+Benchmark suite for the recommendation hot path on a synthetic dataset.
+
+    python -m app.scripts.benchmark --scale small --out bench_before.json
+    python -m app.scripts.benchmark --scale small --reuse-dataset --baseline bench_before.json
+
+Steps (the benchmark itself runs in a worker process pointed at the dataset):
+1. Generate <work-dir>/bench.db at the requested scale and precompute its
+   similarities / neighbor stores (skipped with --reuse-dataset). Each run
+   benchmarks a fresh copy, so runs against the same dataset are comparable.
+2. Time Recommender, ContentRecommender, PopularityRecommender,
+   HybridRecommender and the full get_hybrid_recommendations with warmup and
+   repetitions; report percentiles and write JSON.
+3. With --baseline, print per-case ratios and exit non-zero on regressions.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+from datetime import datetime
+
+DATASET_DB = "bench.db"
+RUN_DB = "run.db"  # fresh copy per run: get_hybrid_recommendations writes logs and strategy stats
+DATASET_FILE = "dataset.json"
+REPORT_FILE = "report.json"
+
+
+def _worker_env(work_dir: str, database: str, cache: bool) -> dict:
+    env = dict(os.environ)
+    env.update({
+        "LOAD_DOTENV": "false",
+        "DATABASE_URL": f"sqlite:///{os.path.abspath(os.path.join(work_dir, database))}",
+        "SIMILARITY_INDEX_DIR": os.path.abspath(os.path.join(work_dir, "similarity_index")),
+        "RECOMMENDATION_CACHE_PATH": "",  # never touch the live shared cache
+        "RECOMMENDATION_CACHE_TTL": env.get("RECOMMENDATION_CACHE_TTL", "300") if cache else "0",
+    })
+    return env
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def prepare_dataset(args):
+    from app.benchmarks.synthetic import SCALES, generate_dataset
+
+    scale = dict(SCALES[args.scale])
+    for key in ("users", "movies", "ratings_per_user"):
+        if getattr(args, key):
+            scale[key] = getattr(args, key)
+
+    os.makedirs(args.work_dir, exist_ok=True)
+    print(f"Generating synthetic dataset ({args.scale}: {scale})...")
+    counts = generate_dataset(os.path.join(args.work_dir, DATASET_DB), seed=args.seed, **scale)
+    with open(os.path.join(args.work_dir, DATASET_FILE), "w") as f:
+        json.dump({"scale": args.scale, **counts}, f)
+
+    print("Precomputing similarities on the synthetic dataset...")
+    subprocess.run([sys.executable, "-m", "app.scripts.precompute_matrices"], env=_worker_env(args.work_dir, DATASET_DB, False), check=True)
+
+
+def run_worker(args):
+    """Runs inside the dataset environment (see _worker_env)."""
+    from app.benchmarks.runner import run_benchmarks
+    from app.core.config import CF_SCORING, SIMILARITY_BACKEND, RECOMMENDATION_CACHE_TTL
+    from app.core.database import SessionLocal
+    from app.ml.write_behind import write_behind
+
+    session = SessionLocal()
+    try:
+        results = run_benchmarks(
+            session, cases=args.cases, samples=args.samples, warmup=args.warmup,
+            repetitions=args.repetitions, top_n=args.top_n, seed=args.seed
+        )
+    finally:
+        session.close()
+        write_behind.stop()
+
+    with open(os.path.join(args.work_dir, DATASET_FILE)) as f:
+        dataset = json.load(f)
+    report = {
+        "created_at": datetime.utcnow().isoformat(),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "dataset": dataset,
+        "settings": {
+            "samples": args.samples, "warmup": args.warmup, "repetitions": args.repetitions, "top_n": args.top_n,
+            "similarity_backend": SIMILARITY_BACKEND, "cf_scoring": CF_SCORING, "cache_ttl": RECOMMENDATION_CACHE_TTL,
+        },
+        "results": results,
+    }
+    with open(os.path.join(args.work_dir, REPORT_FILE), "w") as f:
+        json.dump(report, f, indent=2)
+
+
+def print_report(report: dict):
+    d = report["dataset"]
+    print(f"\n--- Benchmark ({d['scale']}: {d['users']} users, {d['movies']} movies, {d['ratings']} ratings) ---\n")
+    print(f"{'Case':<28} | {'p50 ms':<9} | {'p90 ms':<9} | {'p95 ms':<9} | {'p99 ms':<9} | {'max ms':<9} | {'ops/s':<8}")
+    print("-" * 98)
+    for case, r in report["results"].items():
+        print(f"{case:<28} | {r['p50_ms']:<9.3f} | {r['p90_ms']:<9.3f} | {r['p95_ms']:<9.3f} | {r['p99_ms']:<9.3f} | {r['max_ms']:<9.3f} | {r['ops_per_sec']:<8.1f}")
+
+
+def main():
+    from app.benchmarks.runner import CASES, compare_to_baseline
+    from app.benchmarks.synthetic import SCALES
+
+    parser = argparse.ArgumentParser(description="Recommendation hot-path benchmarks on synthetic data")
+    parser.add_argument("--work-dir", default="bench_run", help="Holds bench.db, the similarity index and the report")
+    parser.add_argument("--scale", choices=list(SCALES), default="small")
+    parser.add_argument("--users", type=int, help="Override the scale's user count")
+    parser.add_argument("--movies", type=int, help="Override the scale's movie count")
+    parser.add_argument("--ratings-per-user", type=int, help="Override the scale's mean ratings per user")
+    parser.add_argument("--reuse-dataset", action="store_true", help="Keep the existing dataset and precompute")
+    parser.add_argument("--cases", nargs="+", choices=CASES, default=CASES)
+    parser.add_argument("--samples", type=int, default=50, help="Distinct users/movies per case")
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--repetitions", type=int, default=5)
+    parser.add_argument("--top-n", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--cache", action="store_true", help="Keep the recommendation cache on (off by default)")
+    parser.add_argument("--baseline", help="Previous report JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative slowdown that counts as a regression")
+    parser.add_argument("--min-delta-ms", type=float, default=0.1, help="Ignore slowdowns smaller than this")
+    parser.add_argument("--out", help="Copy the report JSON here")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args)
+        return
+
+    if not args.reuse_dataset or not os.path.exists(os.path.join(args.work_dir, DATASET_FILE)):
+        prepare_dataset(args)
+
+    shutil.copyfile(os.path.join(args.work_dir, DATASET_DB), os.path.join(args.work_dir, RUN_DB))
+    worker_args = [
+        "--work-dir", args.work_dir, "--samples", str(args.samples), "--warmup", str(args.warmup),
+        "--repetitions", str(args.repetitions), "--top-n", str(args.top_n), "--seed", str(args.seed),
+        "--cases", *args.cases, "--worker"
+    ]
+    subprocess.run([sys.executable, "-m", "app.scripts.benchmark", *worker_args], env=_worker_env(args.work_dir, RUN_DB, args.cache), check=True)
+
+    with open(os.path.join(args.work_dir, REPORT_FILE)) as f:
+        report = json.load(f)
+    print_report(report)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        rows, regressions = compare_to_baseline(report, baseline, args.threshold, args.min_delta_ms)
+        print(f"\n--- Against baseline ({baseline.get('commit') or 'unknown commit'}) ---\n")
+        print(f"{'Case':<28} | {'p50 before':<10} | {'p50 after':<10} | {'ratio':<6} | {'p95 before':<10} | {'p95 after':<10} | {'ratio':<6}")
+        print("-" * 98)
+        for row in rows:
+            b50, a50, r50 = row["p50_ms"]
+            b95, a95, r95 = row["p95_ms"]
+            print(f"{row['case']:<28} | {b50:<10.3f} | {a50:<10.3f} | {r50:<6.2f} | {b95:<10.3f} | {a95:<10.3f} | {r95:<6.2f}")
+        if regressions:
+            print("\n❌ Slower than baseline:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("\n✅ No latency regressions against baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""
+Equivalence check and microbenchmark for the compiled filter parser.
+
+    python -m app.scripts.check_filter_parser
+    python -m app.scripts.check_filter_parser --cases 50000 --bench
+
+Runs app.agents.nlp_parser.parse_user_filters and the keyword-by-keyword parser
+it replaced over hand-written edge cases plus randomly assembled chat messages
+(single turns and concatenated histories), and exits non-zero on the first
+differences. Genres are compared as sets: the old parser returned them in set
+order. With --bench, both parsers are timed on the same messages.
+"""
+import argparse
+import random
+import re
+import sys
+import time
+
+from app.agents.nlp_parser import GENRE_MAP, LANGUAGE_MAP, parse_user_filters
+
+EDGE_CASES = [
+    "short Hindi thrillers after 2015 rated above 7",
+    "comedy under 2 hours",
+    "newer French action movies",
+    "comedy under 90 min",             # runtime and score bound from the same words
+    "something under 1.5 hours",
+    "under 1.5 min please",
+    "under  90 min",                   # two spaces: score bound only
+    "under\t2 hours",
+    "under 2hours and under 100min",
+    "greater than good",
+    "greater than 8 but not bad",
+    "after 2010 from 2000s",           # decade overlaps the year
+    "from 2000s or the 80s or '90s",
+    "movies from 1990s",
+    "since2005",
+    "star wars thunder 5",             # substring hits the old parser also made
+    "discover 9 great shorts",
+    "sci-fi and science fiction and scifi",
+    "romantic comedies, dramas, mysteries and documentaries",
+    "animes, westerns, music, musicals, histories",
+    "chinese or mandarin or english",
+    "mandarin then chinese",
+    "highly rated poorly rated flop",
+    "less than 6.5 worse than 3",
+    "over 7. below 9.",
+    "recently newer",
+    "",
+]
+
+FILLER = [
+    "i want", "something", "movies", "please", "with my family", "tonight", "like", "and", "or",
+    "not", "maybe", "a", "the", "film", "for", "kids", "that is", "really", "watch", "?", "!", ",",
+    "thunder", "discover", "moreover", "overall", "badly", "goodness", "shortlist", "recently",
+]
+CUES = [
+    "under {n} hours", "under {n} hour", "under {m} min", "under {m} minutes", "under {f} hours",
+    "under {s}", "under  {m} min", "below {s}", "less than {s}", "worse than {s}", "above {s}",
+    "over {s}", "more than {s}", "better than {s}", "greater than {s}", "after {y}", "since {y}",
+    "from {y}", "from {y}s", "{d}", "'{d}", "short", "newer", "recent", "good", "great",
+    "highly rated", "bad", "flop", "poorly rated",
+]
+DECADES = ["90s", "80s", "2000s", "70s", "1990s"]
+
+
+def random_message(rng: random.Random) -> str:
+    words = []
+    for _ in range(rng.randint(1, 14)):
+        kind = rng.random()
+        if kind < 0.25:
+            kw = rng.choice(list(GENRE_MAP))
+            words.append(kw + rng.choice(["", "", "s", "es", "ies", "al", "-"]))
+        elif kind < 0.35:
+            words.append(rng.choice(list(LANGUAGE_MAP)) + rng.choice(["", "", "s", "-"]))
+        elif kind < 0.6:
+            words.append(rng.choice(CUES).format(
+                n=rng.randint(1, 3), m=rng.randint(30, 180), f=f"{rng.randint(1, 2)}.{rng.randint(0, 9)}",
+                s=rng.choice([str(rng.randint(1, 9)), f"{rng.randint(1, 9)}.{rng.randint(0, 9)}"]),
+                y=rng.randint(1950, 2030), d=rng.choice(DECADES)
+            ))
+        else:
+            words.append(rng.choice(FILLER))
+    text = " ".join(words)
+    if rng.random() < 0.3:
+        text = text.upper() if rng.random() < 0.5 else text.title()
+    return text
+
+
+def corpus(cases: int, seed: int) -> list[str]:
+    rng = random.Random(seed)
+    messages = list(EDGE_CASES)
+    while len(messages) < cases:
+        if rng.random() < 0.2:
+            # Chat history: up to three user turns joined the way the agent does it
+            messages.append(" ".join(random_message(rng) for _ in range(rng.randint(2, 4))))
+        else:
+            messages.append(random_message(rng))
+    return messages
+
+
+def _comparable(filters: dict) -> dict:
+    return {**filters, "genres": sorted(filters["genres"])}
+
+
+
+# ─── Reference implementation ─────────────────────────────────
+def reference_parse_user_filters(message: str) -> dict:
+    """The keyword-by-keyword parser parse_user_filters replaced, kept verbatim as the reference."""
+    msg_lower = message.lower()
+    filters = {
+        "genres": [],
+        "max_runtime": None,
+        "min_year": None,
+        "language": None,
+        "min_score": None,
+        "max_score": None
+    }
+
+    # 1. Parse Genres
+    extracted_genres = set()
+    for kw, genre in GENRE_MAP.items():
+        # Allow optional plural s or es
+        if re.search(r'\b' + kw + r'(?:s|es|ies)?\b', msg_lower):
+            extracted_genres.add(genre)
+    if extracted_genres:
+        filters["genres"] = list(extracted_genres)
+
+    # 2. Parse Language
+    for kw, lang_code in LANGUAGE_MAP.items():
+        if re.search(r'\b' + kw + r'\b', msg_lower):
+            filters["language"] = lang_code
+            break # Just take the first one found
+
+    # 3. Parse Runtime
+    if "short" in msg_lower:
+        filters["max_runtime"] = 100
+        
+    # under X hours / mins
+    hr_match = re.search(r'under (\d+(?:\.\d+)?)\s*hour', msg_lower)
+    if hr_match:
+        filters["max_runtime"] = int(float(hr_match.group(1)) * 60)
+        
+    min_match = re.search(r'under (\d+)\s*min', msg_lower)
+    if min_match:
+        filters["max_runtime"] = int(min_match.group(1))
+
+    # 4. Parse Year
+    if "newer" in msg_lower or "recent" in msg_lower:
+        filters["min_year"] = 2015
+        
+    year_match = re.search(r'(?:after|since|from)\s*(\d{4})', msg_lower)
+    if year_match:
+        filters["min_year"] = int(year_match.group(1))
+        
+    # Decade match (e.g., 90s, 80s)
+    if re.search(r'\b90s\b', msg_lower):
+        filters["min_year"] = 1990
+    elif re.search(r'\b80s\b', msg_lower):
+        filters["min_year"] = 1980
+    elif re.search(r'\b2000s\b', msg_lower):
+        filters["min_year"] = 2000
+
+    # 5. Parse Ratings
+    # Above / Min Score
+    above_match = re.search(r'(?:above|over|more than|better than|greater than)\s*(\d+(?:\.\d+)?)', msg_lower)
+    if above_match:
+        filters["min_score"] = float(above_match.group(1))
+    elif "good" in msg_lower or "great" in msg_lower or "highly rated" in msg_lower:
+        filters["min_score"] = 7.0
+        
+    # Below / Max Score
+    below_match = re.search(r'(?:below|under|less than|worse than)\s*(\d+(?:\.\d+)?)', msg_lower)
+    if below_match:
+        filters["max_score"] = float(below_match.group(1))
+    elif "bad" in msg_lower or "flop" in msg_lower or "poorly rated" in msg_lower:
+        filters["max_score"] = 5.0
+        
+    return filters
+
+
+# ─── Check / benchmark ────────────────────────────────────────
+def check(messages: list[str], show: int = 10) -> int:
+    mismatches = 0
+    for message in messages:
+        expected = _comparable(reference_parse_user_filters(message))
+        actual = _comparable(parse_user_filters(message))
+        if expected != actual:
+            mismatches += 1
+            if mismatches <= show:
+                print(f"MISMATCH {message!r}\n  reference: {expected}\n  compiled:  {actual}")
+    return mismatches
+
+
+def bench(messages: list[str], repeat: int = 5) -> dict:
+    timings = {}
+    for name, parser in [("reference", reference_parse_user_filters), ("compiled", parse_user_filters)]:
+        best = float("inf")
+        for _ in range(repeat):
+            started = time.perf_counter()
+            for message in messages:
+                parser(message)
+            best = min(best, time.perf_counter() - started)
+        timings[name] = best / len(messages)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the compiled filter parser against the reference parser")
+    parser.add_argument("--cases", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--bench", action="store_true", help="also time both parsers")
+    args = parser.parse_args()
+
+    messages = corpus(args.cases, args.seed)
+    mismatches = check(messages)
+    print(f"{len(messages)} messages, {mismatches} mismatches")
+
+    if args.bench:
+        single = [m for m in messages if len(m) < 120][:5000]
+        history = [m for m in messages if len(m) >= 120][:5000]
+        for label, sample in [("single turn", single), ("chat history", history)]:
+            if not sample:
+                continue
+            timings = bench(sample)
+            avg_len = sum(map(len, sample)) / len(sample)
+            print(
+                f"{label:>12} ({len(sample)} msgs, avg {avg_len:.0f} chars): "
+                f"reference {timings['reference'] * 1e6:.1f} us, compiled {timings['compiled'] * 1e6:.1f} us "
+                f"({timings['reference'] / timings['compiled']:.1f}x)"
+            )
+
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Asserts that none of the hot recommender queries does a full table scan.
+Each query is compiled for the configured database and run through its planner
+(EXPLAIN QUERY PLAN on SQLite, EXPLAIN with sequential scans discouraged on
+PostgreSQL). Exits non-zero when a query scans a table, e.g. after a schema
+change drops an index:
+
+    python -m app.scripts.check_query_plans
+"""
+import sys
+from datetime import datetime, timedelta
+
+from sqlalchemy import case, exists, func, select, text
+from sqlalchemy.orm import aliased
+
+from app.core.database import engine
+from app.models.base_models import MovieSimilarity, Rating, UserSimilarity
+from app.models.feedback_models import UserFeedback
+from app.models.recommendation_log import RecommendationLog
+from app.models.user_genre_preferences import UserGenrePreferences
+from app.models.user_strategy_stats import UserStrategyStats
+
+USER_ID = "1"
+NEIGHBOR_IDS = ["2", "3", "4"]
+MOVIE_ID = 1
+SINCE = datetime(2024, 1, 1)
+
+
+def hot_queries() -> dict:
+    """Same shapes as the recommender / strategy / engagement code paths."""
+    mine = aliased(Rating)
+    weight = case({u: 1.0 for u in NEIGHBOR_IDS}, value=Rating.user_id, else_=0.0)
+    score = func.sum(Rating.rating * weight).label("score")
+
+    return {
+        "user_neighbors": (
+            select(UserSimilarity.similar_user_id, UserSimilarity.similarity_score)
+            .where(UserSimilarity.user_id == USER_ID)
+            .order_by(UserSimilarity.similarity_score.desc())
+            .limit(50)
+        ),
+        "movie_neighbors": (
+            select(MovieSimilarity.similar_movie_id, MovieSimilarity.similarity_score)
+            .where(MovieSimilarity.movie_id == MOVIE_ID)
+            .order_by(MovieSimilarity.similarity_score.desc())
+            .limit(20)
+        ),
+        "cf_candidates": (
+            select(Rating.movie_id, score)
+            .where(Rating.user_id.in_(NEIGHBOR_IDS), Rating.rating >= 4)
+            .where(~exists().where(mine.user_id == USER_ID, mine.movie_id == Rating.movie_id))
+            .group_by(Rating.movie_id)
+            .order_by(score.desc(), Rating.movie_id)
+            .limit(100)
+        ),
+        "user_liked_movies": (
+            select(Rating.movie_id).where(Rating.user_id == USER_ID, Rating.rating >= 4)
+        ),
+        "movie_ratings": (
+            select(func.avg(Rating.rating), func.count()).where(Rating.movie_id == MOVIE_ID)
+        ),
+        "leaderboard_refresh": (
+            select(Rating.movie_id, Rating.rating, Rating.rated_at).where(Rating.rated_at > SINCE)
+        ),
+        "last_feedback": (
+            select(UserFeedback.id)
+            .where(UserFeedback.user_id == USER_ID)
+            .order_by(UserFeedback.timestamp.desc())
+            .limit(1)
+        ),
+        "recent_feedback": (
+            select(func.count()).select_from(UserFeedback)
+            .where(UserFeedback.user_id == USER_ID, UserFeedback.timestamp >= SINCE)
+        ),
+        "last_strategy": (
+            select(RecommendationLog.strategy)
+            .where(RecommendationLog.user_id == USER_ID)
+            .order_by(RecommendationLog.created_at.desc())
+            .limit(1)
+        ),
+        "recent_recommendations": (
+            select(func.count()).select_from(RecommendationLog)
+            .where(RecommendationLog.user_id == USER_ID, RecommendationLog.created_at >= SINCE - timedelta(days=7))
+        ),
+        "best_strategy": (
+            select(UserStrategyStats.strategy)
+            .where(UserStrategyStats.user_id == USER_ID)
+            .order_by(UserStrategyStats.weight.desc())
+            .limit(1)
+        ),
+        "genre_preferences": (
+            select(UserGenrePreferences.genre, UserGenrePreferences.weight, UserGenrePreferences.last_updated)
+            .where(UserGenrePreferences.user_id == USER_ID)
+        ),
+    }
+
+
+def _full_scans(conn, sql: str) -> list[str]:
+    if engine.dialect.name == "sqlite":
+        plan = [row[-1] for row in conn.execute(text("EXPLAIN QUERY PLAN " + sql))]
+        # "SCAN t" / "SCAN t USING INDEX" walk every row; "SEARCH" is an index lookup
+        return [line for line in plan if line.startswith("SCAN ") and not line.startswith("SCAN CONSTANT ROW")]
+
+    plan = [row[0] for row in conn.execute(text("EXPLAIN " + sql))]
+    return [line.strip() for line in plan if "Seq Scan" in line]
+
+
+def check_query_plans() -> dict[str, list[str]]:
+    """Returns {query name: offending plan lines} for every query that scans a table."""
+    failures = {}
+    with engine.connect() as conn:
+        if engine.dialect.name == "postgresql":
+            # Tiny tables make a seq scan the cheapest plan; only flag queries with no usable index
+            conn.execute(text("SET enable_seqscan = off"))
+        for name, statement in hot_queries().items():
+            sql = str(statement.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+            scans = _full_scans(conn, sql)
+            print(f"{'❌' if scans else '✅'} {name}" + (f": {'; '.join(scans)}" if scans else ""))
+            if scans:
+                failures[name] = scans
+    return failures
+
+
+if __name__ == "__main__":
+    failures = check_query_plans()
+    if failures:
+        print(f"\n{len(failures)} hot query(ies) do a full scan. Run: python -m app.scripts.update_schema_indexes")
+        sys.exit(1)
+    print("\nNo full scans in hot queries.")
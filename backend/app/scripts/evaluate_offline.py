@@ -0,0 +1,140 @@
+"""
+Offline evaluation over a temporal split of the ratings table.
+
+    python -m app.scripts.evaluate_offline --work-dir eval_run
+    python -m app.scripts.evaluate_offline --work-dir eval_run --reuse-split --baseline eval_before.json --out eval_after.json
+
+Steps (each in its own process, pointed at the split database):
+1. Split the ratings by time and write the train side to <work-dir>/train.db.
+2. Precompute similarities and the neighbor/ANN stores on train.db only.
+3. Run every strategy for the held-out users and report precision@k, recall@k,
+   NDCG@k, coverage, novelty and latency percentiles per strategy.
+
+--reuse-split skips 1-2 so recommender-side changes can be compared on the
+same split; --baseline flags quality metrics that regressed.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+TRAIN_DB = "train.db"
+HOLDOUT_FILE = "holdout.json"
+REPORT_FILE = "report.json"
+
+
+def _worker_env(work_dir: str) -> dict:
+    env = dict(os.environ)
+    env.update({
+        "LOAD_DOTENV": "false",
+        "DATABASE_URL": f"sqlite:///{os.path.abspath(os.path.join(work_dir, TRAIN_DB))}",
+        "SIMILARITY_INDEX_DIR": os.path.abspath(os.path.join(work_dir, "similarity_index")),
+        "RECOMMENDATION_CACHE_PATH": "",  # never touch the live shared cache
+        "RECOMMENDATION_CACHE_TTL": "0",
+        "WRITE_BEHIND_ENABLED": "false",
+        "SQLITE_PROFILE": "default",
+    })
+    return env
+
+
+def prepare_split(args):
+    from app.core.database import SessionLocal
+    from app.evaluation.splits import load_ratings, save_holdout, temporal_split, write_split_database
+
+    os.makedirs(args.work_dir, exist_ok=True)
+    session = SessionLocal()
+    try:
+        split = temporal_split(load_ratings(session), mode=args.split, test_fraction=args.test_fraction)
+        print(f"Split ({split.mode}): {len(split.train)} train ratings, {sum(map(len, split.test.values()))} held out, "
+              f"{len(split.relevant())} users with relevant test items")
+        write_split_database(split, session, os.path.join(args.work_dir, TRAIN_DB))
+        save_holdout(split, os.path.join(args.work_dir, HOLDOUT_FILE))
+    finally:
+        session.close()
+
+    print("Precomputing similarities on the train split...")
+    subprocess.run([sys.executable, "-m", "app.scripts.precompute_matrices"], env=_worker_env(args.work_dir), check=True)
+
+
+def run_worker(args):
+    """Runs inside the split environment (see _worker_env)."""
+    from app.core.database import SessionLocal
+    from app.evaluation.runner import evaluate
+    from app.evaluation.splits import load_holdout
+
+    holdout = load_holdout(os.path.join(args.work_dir, HOLDOUT_FILE))
+    session = SessionLocal()
+    try:
+        report = evaluate(session, holdout["relevant"], k=args.k, strategies=args.strategies, max_users=args.max_users, seed=args.seed)
+    finally:
+        session.close()
+    report["split"] = {key: holdout[key] for key in ("mode", "test_fraction", "cutoff", "train_ratings")}
+    with open(os.path.join(args.work_dir, REPORT_FILE), "w") as f:
+        json.dump(report, f, indent=2)
+
+
+def print_report(report: dict):
+    k = report["k"]
+    print(f"\n--- Offline Evaluation ({report['split']['mode']} split, {report['users']} users, k={k}) ---\n")
+    print(f"{'Strategy':<25} | {'P@' + str(k):<7} | {'R@' + str(k):<7} | {'NDCG':<7} | {'Cover':<7} | {'Novelty':<7} | {'Empty':<6} | {'p50 ms':<8} | {'p99 ms':<8}")
+    print("-" * 107)
+    for strategy, m in report["strategies"].items():
+        print(f"{strategy:<25} | {m['precision']:<7.4f} | {m['recall']:<7.4f} | {m['ndcg']:<7.4f} | {m['coverage']:<7.4f} | "
+              f"{m['novelty']:<7.2f} | {m['empty_rate']:<6.0%} | {m['latency']['p50_ms']:<8.2f} | {m['latency']['p99_ms']:<8.2f}")
+        fallbacks = {s: n for s, n in m["served"].items() if s != strategy}
+        if fallbacks and strategy not in ("hybrid", "batch"):
+            print(f"{'':<25}   served by fallback: {fallbacks}")
+
+
+def main():
+    from app.evaluation.runner import STRATEGIES, compare_to_baseline
+
+    parser = argparse.ArgumentParser(description="Offline ranking evaluation over a temporal split")
+    parser.add_argument("--work-dir", default="eval_run", help="Holds train.db, the similarity index and the report")
+    parser.add_argument("--split", choices=["per-user", "global"], default="per-user")
+    parser.add_argument("--test-fraction", type=float, default=0.2)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--strategies", nargs="+", choices=STRATEGIES, default=STRATEGIES)
+    parser.add_argument("--max-users", type=int, default=500, help="Sample of held-out users (0 = all)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--reuse-split", action="store_true", help="Keep the existing split and precompute")
+    parser.add_argument("--baseline", help="Previous report JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.02, help="Relative drop that counts as a regression")
+    parser.add_argument("--out", help="Copy the report JSON here")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args)
+        return
+
+    if not args.reuse_split or not os.path.exists(os.path.join(args.work_dir, HOLDOUT_FILE)):
+        prepare_split(args)
+
+    worker_args = [
+        "--work-dir", args.work_dir, "--k", str(args.k), "--max-users", str(args.max_users),
+        "--seed", str(args.seed), "--strategies", *args.strategies, "--worker"
+    ]
+    subprocess.run([sys.executable, "-m", "app.scripts.evaluate_offline", *worker_args], env=_worker_env(args.work_dir), check=True)
+
+    with open(os.path.join(args.work_dir, REPORT_FILE)) as f:
+        report = json.load(f)
+    print_report(report)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare_to_baseline(report, json.load(f), args.tolerance)
+        if regressions:
+            print("\n❌ Quality regressions against baseline:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("\n✅ No quality regressions against baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 import pandas as pd
+from datetime import datetime
 import sqlite3
 from app.core.database import engine
 from app.models import base_models
@@ -64,7 +65,8 @@ def ingest_ratings(session: Session):
         rating = Rating(
             user_id=str(int(row['userId'])),
             movie_id=int(row['movieId']),
-            rating=int(row['rating'])
+            rating=int(row['rating']),
+            rated_at=datetime.utcfromtimestamp(int(row['timestamp']))  # real rating time, needed for temporal splits
         )
         session.add(rating)
     session.commit()
@@ -0,0 +1,187 @@
+"""
+Load generator for the chat endpoint (POST /api/agent/chat).
+
+    python -m app.scripts.load_test --url http://localhost:8000 --rps 20 --duration 60
+    LLM_BACKEND=stub LLM_STUB_DELAY_MS=800 LLM_STUB_DELAY_JITTER=0.5 LLM_STUB_FAILURE_RATE=0.05 \\
+        python -m app.scripts.load_test --rps 50 --duration 30 --out load.json
+
+Requests are sent open-loop: arrival times are fixed up front (evenly spaced, or
+exponential gaps with --poisson) and latency is measured from the scheduled send
+time, so a saturated server shows up as queueing delay instead of a lower send
+rate. Without --url the app is driven in-process through httpx's ASGI transport
+(--app, default app.main:app), which with LLM_BACKEND=stub needs no network or
+API key. A --follow-up share of requests continue an earlier conversation of the
+same user with its session_id.
+
+Reports throughput, latency percentiles, HTTP errors and the share of replies by
+"source" (llm, deadline_fallback, error_fallback, no_candidates, unavailable).
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import random
+import time
+from collections import Counter
+
+import httpx
+
+CHAT_PATH = "/api/agent/chat"
+
+MESSAGES = [
+    "Recommend me something good tonight",
+    "I want a funny comedy under 100 minutes",
+    "Any good sci-fi movies from the 90s?",
+    "Looking for a dark thriller with great reviews",
+    "Something romantic and short",
+    "Show me highly rated animation for the family",
+    "A horror movie from the 80s please",
+    "I'm in the mood for an action movie",
+]
+FOLLOW_UPS = [
+    "Something shorter?",
+    "Any better rated ones?",
+    "Make it a comedy",
+    "Only from the 2000s",
+]
+
+
+def _arrival_offsets(rps: float, duration: float, poisson: bool, rng: random.Random) -> list[float]:
+    offsets, t = [], 0.0
+    while True:
+        t += rng.expovariate(rps) if poisson else 1.0 / rps
+        if t > duration:
+            return offsets
+        offsets.append(t)
+
+
+def _load_app(spec: str):
+    module_name, _, attr = spec.partition(":")
+    return getattr(importlib.import_module(module_name), attr or "app")
+
+
+async def _send(client: httpx.AsyncClient, payload: dict, timeout: float) -> dict:
+    try:
+        response = await client.post(CHAT_PATH, json=payload, timeout=timeout)
+    except httpx.TimeoutException:
+        return {"status": "timeout"}
+    except httpx.HTTPError as e:
+        return {"status": "error", "error": type(e).__name__}
+    if response.status_code != 200:
+        return {"status": response.status_code}
+    body = response.json()
+    return {"status": 200, "source": body.get("source", "unknown"), "session_id": body.get("session_id")}
+
+
+async def run_load(client: httpx.AsyncClient, args) -> dict:
+    rng = random.Random(args.seed)
+    offsets = _arrival_offsets(args.rps, args.duration, args.poisson, rng)
+    sessions: dict[int, str] = {}  # user_id -> session_id of their last finished turn
+    in_flight = asyncio.Semaphore(args.max_in_flight) if args.max_in_flight else None
+    results = []
+
+    async def one(scheduled: float, user_id: int, follow_up: bool):
+        payload = {"user_id": user_id, "message": rng.choice(FOLLOW_UPS if follow_up else MESSAGES)}
+        if follow_up:
+            payload["session_id"] = sessions[user_id]
+        if in_flight is not None:
+            async with in_flight:
+                result = await _send(client, payload, args.timeout)
+        else:
+            result = await _send(client, payload, args.timeout)
+        result["latency"] = time.perf_counter() - scheduled
+        if result.get("session_id"):
+            sessions[user_id] = result["session_id"]
+        results.append(result)
+
+    print(f"Sending {len(offsets)} requests at {args.rps} rps for {args.duration}s "
+          f"({'poisson' if args.poisson else 'uniform'} arrivals)...")
+    tasks = []
+    started = time.perf_counter()
+    for offset in offsets:
+        delay = started + offset - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        user_id = rng.randint(1, args.users)
+        follow_up = user_id in sessions and rng.random() < args.follow_up
+        tasks.append(asyncio.create_task(one(started + offset, user_id, follow_up)))
+    send_seconds = time.perf_counter() - started
+    await asyncio.gather(*tasks)
+    wall_seconds = time.perf_counter() - started
+    return summarize_results(results, len(offsets), send_seconds, wall_seconds, args)
+
+
+def summarize_results(results: list[dict], sent: int, send_seconds: float, wall_seconds: float, args) -> dict:
+    from app.benchmarks.runner import summarize
+
+    ok = [r for r in results if r["status"] == 200]
+    statuses = Counter(str(r["status"]) for r in results if r["status"] != 200)
+    sources = Counter(r["source"] for r in ok)
+    return {
+        "config": {
+            "target": args.url or args.app, "rps": args.rps, "duration": args.duration,
+            "poisson": args.poisson, "users": args.users, "follow_up": args.follow_up,
+            "max_in_flight": args.max_in_flight, "seed": args.seed,
+        },
+        "sent": sent,
+        "completed": len(ok),
+        "offered_rps": round(sent / send_seconds, 2) if send_seconds > 0 else 0.0,
+        "throughput_rps": round(len(ok) / wall_seconds, 2) if wall_seconds > 0 else 0.0,
+        "wall_seconds": round(wall_seconds, 3),
+        "latency": summarize([r["latency"] for r in ok]) if ok else None,
+        "errors": dict(statuses),
+        "error_rate": round(1 - len(ok) / sent, 4) if sent else 0.0,
+        "sources": dict(sources),
+        "source_rates": {source: round(n / len(ok), 4) for source, n in sources.items()},
+        "fallback_rate": round(1 - sources.get("llm", 0) / len(ok), 4) if ok else 0.0,
+    }
+
+
+def print_report(report: dict):
+    c = report["config"]
+    print(f"\n--- Chat load test ({c['target']}: {c['rps']} rps x {c['duration']}s) ---\n")
+    print(f"Sent {report['sent']} ({report['offered_rps']} rps offered), completed {report['completed']} "
+          f"in {report['wall_seconds']}s -> {report['throughput_rps']} rps")
+    lat = report["latency"]
+    if lat:
+        print(f"Latency ms: p50 {lat['p50_ms']:.1f} | p95 {lat['p95_ms']:.1f} | p99 {lat['p99_ms']:.1f} | max {lat['max_ms']:.1f}")
+    print(f"Errors: {report['error_rate']:.2%} {report['errors'] or ''}")
+    print(f"Fallbacks: {report['fallback_rate']:.2%}")
+    for source, n in sorted(report["sources"].items(), key=lambda item: -item[1]):
+        print(f"  {source:<18} {n:>7}  {report['source_rates'][source]:.2%}")
+
+
+async def _main(args) -> dict:
+    limits = httpx.Limits(max_connections=args.max_in_flight or None, max_keepalive_connections=None)
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, limits=limits) as client:
+            return await run_load(client, args)
+    transport = httpx.ASGITransport(app=_load_app(args.app))
+    async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", limits=limits) as client:
+        return await run_load(client, args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Open-loop load test of the chat endpoint")
+    parser.add_argument("--url", help="Base URL of a running server (default: drive --app in-process)")
+    parser.add_argument("--app", default="app.main:app", help="module:attribute of the ASGI app for in-process runs")
+    parser.add_argument("--rps", type=float, default=10.0, help="Target request rate")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds of arrivals")
+    parser.add_argument("--poisson", action="store_true", help="Exponential inter-arrival gaps instead of even spacing")
+    parser.add_argument("--users", type=int, default=100, help="Requests pick user ids from 1..users")
+    parser.add_argument("--follow-up", type=float, default=0.3, help="Share of requests continuing the user's session")
+    parser.add_argument("--max-in-flight", type=int, default=0, help="Cap on concurrent requests (0 = unbounded)")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per-request client timeout in seconds")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--out", help="Write the report JSON here")
+    args = parser.parse_args()
+
+    report = asyncio.run(_main(args))
+    print_report(report)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,117 +1,116 @@
 import os
 import sys
-import pandas as pd
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from sklearn.metrics.pairwise import cosine_similarity
-from tqdm import tqdm
+import time
 
 # Add the project root to the python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.core.database import SessionLocal, engine
-from app.models.base_models import Movie, Rating, MovieSimilarity, UserSimilarity, Base
+from app.models.base_models import MovieSimilarity, UserSimilarity, UserSimilarityUpdate, Base
+from app.core.config import SIMILARITY_INDEX_DIR
+from app.ml.sparse_similarity import (
+    compute_movie_neighbors,
+    compute_user_neighbors,
+    bulk_load_pairs,
+    load_genre_matrix,
+    load_rating_matrix,
+)
+from app.ml.ann_index import RandomProjectionIndex, USER_INDEX_FILE, MOVIE_INDEX_FILE
+from app.ml.neighbor_store import write_store, USER_STORE, MOVIE_STORE
+from app.ml.recommendation_cache import recommendation_cache
+
+def save_ann_index(loaded, filename):
+    matrix, item_ids, feature_ids = loaded
+    path = os.path.join(SIMILARITY_INDEX_DIR, filename)
+    print(f"Building LSH index over {matrix.shape[0]} vectors -> {path}")
+    RandomProjectionIndex.build(matrix, item_ids, feature_ids).save(path)
+
 
 def precompute_movie_similarities(session, batch_size=50):
-    print("Fetching movies and genres...")
-    movies = session.query(Movie).all()
-    if not movies:
+    """
+    Content precompute: genre indicators are read from movie_genres into a CSR
+    matrix, top-K is extracted per row block with argpartition and bulk-loaded.
+    The same vectors back the on-disk ANN index used for arbitrary-K queries.
+    """
+    print("Building sparse Movie-Genre matrix...")
+    loaded = load_genre_matrix(session)
+    (movie_ids, similar_movie_ids, scores), report = compute_movie_neighbors(session, k=batch_size, loaded=loaded)
+    if not report["movies"]:
         print("No movies found.")
         return
 
-    print("Building Movie-Genre matrix...")
-    rows = []
-    for movie in movies:
-        genre_names = [g.name for g in movie.genres]
-        rows.append({
-            "movie_id": movie.id,
-            **{g: 1 for g in genre_names}
-        })
-        
-    df = pd.DataFrame(rows).fillna(0)
-    movie_ids = df["movie_id"].values
-    features = df.drop(columns=["movie_id"]).values
-
-    print(f"Computing cosine similarity for {len(movie_ids)} movies (Requires high RAM temporarily)...")
-    sim_matrix = cosine_similarity(features)
+    print(
+        f"Computed top {batch_size} similarities for {report['movies']} movies "
+        f"in {report['seconds']:.2f}s, peak RSS {report['peak_rss_mb']} MB"
+    )
 
     print("Clearing old movie similarities...")
     session.query(MovieSimilarity).delete()
-    session.commit()
 
-    print(f"Extracting Top {batch_size} similarities and inserting into SQLite...")
-    insert_data = []
-    
-    for idx, movie_id in enumerate(tqdm(movie_ids)):
-        # Get scores for this movie, enumerate to keep track of target indices
-        scores = list(enumerate(sim_matrix[idx]))
-        # Sort by score descending, skip index 0 (self)
-        scores = sorted(scores, key=lambda x: x[1], reverse=True)[1:batch_size+1]
-        
-        for sim_idx, score in scores:
-            if score > 0: # Only store meaningful similarities
-                insert_data.append(MovieSimilarity(
-                    movie_id=int(movie_id),
-                    similar_movie_id=int(movie_ids[sim_idx]),
-                    similarity_score=float(score)
-                ))
-
-    print(f"Bulk inserting {len(insert_data)} rows into MovieSimilarity...")
-    session.bulk_save_objects(insert_data)
+    print(f"Bulk loading {len(movie_ids)} rows into MovieSimilarity...")
+    bulk_load_pairs(
+        session,
+        MovieSimilarity.__tablename__,
+        ("movie_id", "similar_movie_id", "similarity_score"),
+        movie_ids, similar_movie_ids, scores
+    )
     session.commit()
     print("Movie similarities precomputed successfully!")
 
+    print(f"Writing memory-mapped neighbor store: {write_store(MOVIE_STORE, movie_ids, similar_movie_ids, scores)}")
+    save_ann_index(loaded, MOVIE_INDEX_FILE)
+    return report
+
 
 def precompute_user_similarities(session, batch_size=50):
-    print("Fetching ratings build User CF matrix...")
-    ratings = session.query(Rating).all()
-    if not ratings:
+    """
+    Sparse User-CF precompute: ratings are streamed into a CSR matrix and
+    cosine top-K is computed in row blocks, never materializing users x users.
+    """
+    print("Streaming ratings into sparse User-Movie matrix...")
+    started = time.perf_counter()
+    loaded = load_rating_matrix(session)
+    load_seconds = round(time.perf_counter() - started, 3)
+    (user_ids, similar_user_ids, scores), report = compute_user_neighbors(session, k=batch_size, loaded=loaded)
+    report["load_seconds"] = load_seconds
+    if not report["ratings"]:
         print("No ratings found.")
         return
 
-    print("Building User-Movie matrix...")
-    data = [{"user_id": r.user_id, "movie_id": r.movie_id, "rating": r.rating} for r in ratings]
-    ratings_df = pd.DataFrame(data)
-    user_movie_matrix = ratings_df.pivot(index='user_id', columns='movie_id', values='rating').fillna(0)
-    
-    user_ids = user_movie_matrix.index.values
-
-    print(f"Computing cosine similarity for {len(user_ids)} users...")
-    sim_matrix = cosine_similarity(user_movie_matrix.values)
+    print(
+        f"Computed top {batch_size} neighbors for {report['users']} users "
+        f"({report['ratings']} ratings) in {report['load_seconds'] + report['similarity_seconds']:.2f}s, "
+        f"peak RSS {report['peak_rss_mb']} MB"
+    )
 
     print("Clearing old user similarities...")
     session.query(UserSimilarity).delete()
-    session.commit()
-
-    print(f"Extracting Top {batch_size} similarities and inserting into SQLite...")
-    insert_data = []
-    
-    for idx, user_id in enumerate(tqdm(user_ids)):
-        scores = list(enumerate(sim_matrix[idx]))
-        scores = sorted(scores, key=lambda x: x[1], reverse=True)[1:batch_size+1]
-        
-        for sim_idx, score in scores:
-            if score > 0:
-                insert_data.append(UserSimilarity(
-                    user_id=str(user_id),
-                    similar_user_id=str(user_ids[sim_idx]),
-                    similarity_score=float(score)
-                ))
-
-    print(f"Bulk inserting {len(insert_data)} rows into UserSimilarity...")
-    session.bulk_save_objects(insert_data)
+    session.query(UserSimilarityUpdate).delete()  # the new snapshot covers every rewritten user
+
+    print(f"Bulk loading {len(user_ids)} rows into UserSimilarity...")
+    bulk_load_pairs(
+        session,
+        UserSimilarity.__tablename__,
+        ("user_id", "similar_user_id", "similarity_score"),
+        user_ids, similar_user_ids, scores
+    )
     session.commit()
     print("User similarities precomputed successfully!")
 
+    print(f"Writing memory-mapped neighbor store: {write_store(USER_STORE, user_ids, similar_user_ids, scores)}")
+    save_ann_index(loaded, USER_INDEX_FILE)
+    return report
+
 
 if __name__ == "__main__":
     print("Creating tables if they do not exist...")
     Base.metadata.create_all(bind=engine)
-    
+
     session = SessionLocal()
     try:
         precompute_movie_similarities(session, batch_size=50) # Save top 50 matches per movie
         precompute_user_similarities(session, batch_size=50)  # Save top 50 matches per user
+        recommendation_cache.invalidate_all()
         print("All machine learning matrices successfully computed and injected into SQLite!")
     finally:
         session.close()
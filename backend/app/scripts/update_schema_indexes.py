@@ -0,0 +1,51 @@
+"""
+Creates the composite indexes declared on the models for the hot query shapes
+(neighbors by score, a user's ratings/feedback/logs/strategy stats, per-movie
+ratings). create_all() only builds indexes together with new tables, so existing
+databases need this once after upgrading:
+
+    python -m app.scripts.update_schema_indexes
+
+Safe to re-run: indexes that already exist are skipped.
+"""
+from sqlalchemy import inspect, text
+
+from app.core.database import Base, engine
+import app.models.base_models
+import app.models.feedback_models
+import app.models.recommendation_log
+import app.models.strategy_stats
+import app.models.user_engagement_stats
+import app.models.user_genre_preferences
+import app.models.user_strategy_stats
+
+
+def create_missing_indexes() -> list[str]:
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    created = []
+
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing = {ix["name"] for ix in inspector.get_indexes(table.name)}
+        for index in sorted(table.indexes, key=lambda ix: ix.name):
+            if index.name in existing:
+                continue
+            print(f"Creating {index.name} on {table.name}({', '.join(c.name for c in index.columns)})...")
+            index.create(bind=engine)
+            created.append(index.name)
+
+    if created and engine.dialect.name == "sqlite":
+        # Refresh planner statistics so the new indexes are actually chosen
+        with engine.begin() as conn:
+            conn.execute(text("ANALYZE"))
+    return created
+
+
+if __name__ == "__main__":
+    try:
+        created = create_missing_indexes()
+        print(f"Created {len(created)} index(es)." if created else "All indexes already exist.")
+    except Exception as e:
+        print(f"Error updating schema: {e}")
@@ -0,0 +1,45 @@
+"""
+Micro-batch job that keeps user_similarities fresh between nightly rebuilds.
+
+    python -m app.scripts.update_similarities --since "2026-01-01 03:00" --interval 120
+
+Without --interval it runs a single batch and exits.
+"""
+import argparse
+import time
+from datetime import datetime
+
+from app.core.database import Base, SessionLocal, engine
+from app.ml.similarity_updater import IncrementalUserSimilarity, TOP_K
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incremental User-CF similarity updater")
+    parser.add_argument("--since", type=datetime.fromisoformat, default=None,
+                        help="When the stored similarities were last rebuilt (default: now)")
+    parser.add_argument("--interval", type=float, default=None,
+                        help="Seconds between micro-batches; omit to run once")
+    parser.add_argument("--top-k", type=int, default=TOP_K)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)  # user_similarity_updates on databases built before it existed
+    session = SessionLocal()
+    try:
+        print("Loading rating matrix and similarity statistics...")
+        updater = IncrementalUserSimilarity(k=args.top_k).load(session, since=args.since)
+        print(f"Tracking {len(updater.user_ids)} users, watermark {updater.watermark}")
+
+        while True:
+            report = updater.run_micro_batch(session)
+            print(f"[{datetime.utcnow().isoformat(timespec='seconds')}] {report}")
+            if args.interval is None:
+                break
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        print("Stopping similarity updater.")
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Checks the concurrent chat orchestration (CHAT_CONCURRENT_MODE) against the
+local stub LLM client, on a small synthetic dataset in a scratch directory:
+
+1. A stub slower than CHAT_LATENCY_BUDGET_SECONDS -> the deterministic answer
+   (source == "deadline_fallback") within the budget.
+2. An intent that adds a filter the regex parser missed -> the speculative
+   retrieval is discarded and the reply honours the new filter.
+3. No exact matches -> the trending half of the fallback is fetched in parallel,
+   and still arrives while the LLM pool is saturated with calls past their deadline.
+
+    python verify_concurrent_chat.py
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+WORK_DIR = tempfile.mkdtemp(prefix="filmbox_chat_")
+BUDGET_SECONDS = 1.0
+os.environ.update({
+    "LOAD_DOTENV": "false",
+    "DATABASE_URL": f"sqlite:///{os.path.join(WORK_DIR, 'verify.db')}",
+    "SIMILARITY_INDEX_DIR": os.path.join(WORK_DIR, "similarity_index"),
+    "RECOMMENDATION_CACHE_PATH": "",
+    "RECOMMENDATION_CACHE_TTL": "0",
+    "LLM_CACHE_TTL": "0",
+    "LLM_BACKEND": "stub",
+    "CHAT_CONCURRENT_MODE": "true",
+    "CHAT_LATENCY_BUDGET_SECONDS": str(BUDGET_SECONDS),
+    "CHAT_SESSION_PATH": "",
+})
+
+from app.benchmarks.synthetic import generate_dataset
+
+generate_dataset(os.path.join(WORK_DIR, "verify.db"), users=200, movies=300, ratings_per_user=30)
+
+from prometheus_client import REGISTRY
+from app.agents import conversational_agent
+from app.agents.conversational_agent import run_conversational_agent_llm, _retrieve_candidates
+from app.agents.groq_client import register_llm_backend
+from app.agents.stub_llm_client import StubLLMClient
+
+MAX_RUNTIME = 100
+
+
+class IntentStub(StubLLMClient):
+    """Stub whose intent extraction always adds max_runtime (which the regex parser cannot see)."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        create = self.chat.completions.create
+
+        def create_with_intent(messages, **params):
+            response = create(messages, **params)
+            if "intent extraction engine" in messages[-1]["content"]:
+                intent = json.loads(response.choices[0].message.content)
+                intent["max_runtime"] = MAX_RUNTIME
+                response.choices[0].message.content = json.dumps(intent)
+            return response
+
+        self.chat.completions.create = create_with_intent
+
+
+def _counter(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def verify_deadline_fallback() -> bool:
+    print(f"\n[1] Stub slower than the {BUDGET_SECONDS}s budget")
+    register_llm_backend("stub", lambda: StubLLMClient(delay_seconds=BUDGET_SECONDS * 3))
+    started = time.perf_counter()
+    reply = run_conversational_agent_llm(1, "Recommend me a comedy")
+    elapsed = time.perf_counter() - started
+    print(f"    source={reply['source']} movies={len(reply['movies'])} in {elapsed:.2f}s")
+    ok = reply["source"] == "deadline_fallback" and reply["movies"] and elapsed < BUDGET_SECONDS * 2
+    print("    ✅ deterministic answer within the budget" if ok else "    ❌ expected a deadline fallback")
+    return bool(ok)
+
+
+def verify_speculative_discard() -> bool:
+    print(f"\n[2] Intent adds max_runtime={MAX_RUNTIME}")
+    register_llm_backend("stub", lambda: IntentStub(delay_seconds=0.05))
+    discarded = _counter("filmbox_chat_speculative_retrievals_total", result="discarded")
+    reply = run_conversational_agent_llm(2, "Recommend me something good tonight")
+    runtimes = [m.get("runtime") for m in reply["movies"]]
+    discarded = _counter("filmbox_chat_speculative_retrievals_total", result="discarded") - discarded
+    print(f"    source={reply['source']} discarded={discarded:.0f} runtimes={runtimes}")
+    ok = (
+        reply["source"] == "llm" and discarded == 1 and runtimes
+        and all(r is not None and r <= MAX_RUNTIME for r in runtimes)
+    )
+    print("    ✅ speculative pool replaced" if ok else "    ❌ speculative retrieval was not redone with the intent's filter")
+    return bool(ok)
+
+
+def verify_parallel_trending() -> bool:
+    print("\n[3] No exact matches, LLM pool saturated")
+    # Calls left running past their deadline occupy every LLM worker
+    blockers = [
+        conversational_agent._submit(conversational_agent._llm_pool, time.sleep, BUDGET_SECONDS * 3)
+        for _ in range(conversational_agent._llm_pool._max_workers)
+    ]
+    started = time.perf_counter()
+    candidates, exact = _retrieve_candidates(
+        3, {"language": "xx"}, parallel=True, deadline=time.monotonic() + BUDGET_SECONDS
+    )
+    elapsed = time.perf_counter() - started
+    strategies = sorted({c.get("strategy") for c in candidates})
+    print(f"    exact={exact} candidates={len(candidates)} strategies={strategies} in {elapsed:.2f}s")
+    for blocker in blockers:
+        blocker.result()
+    ok = not exact and "popularity-based" in strategies and elapsed < BUDGET_SECONDS
+    print("    ✅ trending fetched in parallel" if ok else "    ❌ trending fallback missing or queued behind the LLM")
+    return bool(ok)
+
+
+def main():
+    print(f"--- Concurrent chat orchestration verification ({WORK_DIR}) ---")
+    results = [verify_deadline_fallback(), verify_speculative_discard(), verify_parallel_trending()]
+    if not all(results):
+        sys.exit(1)
+    print("\n✅ All concurrent chat checks passed.")
+
+
+if __name__ == "__main__":
+    main()
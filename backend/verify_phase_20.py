@@ -1,7 +1,8 @@
+from datetime import timedelta
 from app.core.database import SessionLocal
 from app.models.user_genre_preferences import UserGenrePreferences
 from app.ml.taste_updater import update_genre_preferences
-from app.ml.decay import decay_preferences
+from app.ml.decay import DECAY_PERIOD_SECONDS
 from app.ml.preference_reader import get_genre_preferences
 from app.ml.taste_bias import apply_taste_bias
 
@@ -23,9 +24,11 @@ def verify_phase_20():
     print(f"Action Score: {prefs.get('Action', 0.0):.4f}")
 
     print("\n2. Simulating Time Passing (Decay)...")
-    # Simulate 50 interactions of other stuff/time passing
-    for _ in range(50):
-        decay_preferences(db, user_id)
+    # Decay is applied on read from last_updated, so backdate it by 50 decay periods
+    backdate = timedelta(seconds=50 * DECAY_PERIOD_SECONDS)
+    for pref in db.query(UserGenrePreferences).filter_by(user_id=user_id):
+        pref.last_updated = pref.last_updated - backdate
+    db.commit()
         
     prefs = get_genre_preferences(db, user_id)
     action_score = prefs.get('Action', 0.0)
@@ -0,0 +1,118 @@
+"""
+Checks that incremental user-similarity updates reach the recommenders.
+Builds a small synthetic dataset in a scratch directory, runs the full
+precompute (SQL rows + memory-mapped neighbor store), then changes ratings and
+runs the micro-batch updater:
+
+1. Rows rewritten by a micro-batch win over the older memory-mapped snapshot
+   in Recommender._stored_neighbors.
+2. A catch-up run (load(since=...), i.e. update_similarities --since) rewrites
+   the rows of users who rated after `since`.
+
+    python verify_similarity_updates.py
+"""
+import os
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+WORK_DIR = tempfile.mkdtemp(prefix="filmbox_similarity_")
+os.environ.update({
+    "LOAD_DOTENV": "false",
+    "DATABASE_URL": f"sqlite:///{os.path.join(WORK_DIR, 'verify.db')}",
+    "SIMILARITY_INDEX_DIR": os.path.join(WORK_DIR, "similarity_index"),
+    "SIMILARITY_BACKEND": "mmap",
+    "RECOMMENDATION_CACHE_PATH": "",
+})
+
+from app.benchmarks.synthetic import generate_dataset
+
+
+def _sql_neighbors(session, user_id: str, k: int):
+    from app.models.base_models import UserSimilarity
+    rows = (
+        session.query(UserSimilarity.similar_user_id, UserSimilarity.similarity_score)
+        .filter(UserSimilarity.user_id == user_id)
+        .order_by(UserSimilarity.similarity_score.desc())
+        .limit(k)
+    )
+    return [(similar_id, round(score, 3)) for similar_id, score in rows]
+
+
+def _rounded(neighbors):
+    return [(similar_id, round(score, 3)) for similar_id, score in neighbors]
+
+
+def verify_micro_batch_visible(session) -> bool:
+    """User 2 takes over user 1's ratings; user 1 must become their top neighbor through Recommender."""
+    from app.ml.neighbor_store import get_user_store
+    from app.ml.recommender import Recommender
+    from app.ml.similarity_updater import IncrementalUserSimilarity
+    from app.models.base_models import Rating
+
+    print("\n[1] Micro-batch rows take precedence over the neighbor store")
+    updater = IncrementalUserSimilarity().load(session)
+    now = datetime.utcnow()
+    session.query(Rating).filter(Rating.user_id == "2").delete()
+    for movie_id, rating in session.query(Rating.movie_id, Rating.rating).filter(Rating.user_id == "1").all():
+        session.add(Rating(user_id="2", movie_id=movie_id, rating=rating, rated_at=now))
+    session.commit()
+
+    print(f"    micro-batch: {updater.run_micro_batch(session)}")
+    snapshot = _rounded(get_user_store().neighbors_of("2", limit=3))
+    sql = _sql_neighbors(session, "2", 3)
+    served = _rounded(Recommender(session)._stored_neighbors("2", 3))
+    print(f"    store snapshot: {snapshot}")
+    print(f"    SQL rows:       {sql}")
+    print(f"    Recommender:    {served}")
+    ok = served == sql and sql and sql[0][0] == "1"
+    print("    ✅ updated rows served" if ok else "    ❌ Recommender still serves the stale snapshot")
+    return bool(ok)
+
+
+def verify_catch_up(session) -> bool:
+    """A new user copies user 3's ratings after the last rebuild; --since must pick them up."""
+    from app.ml.recommender import Recommender
+    from app.ml.similarity_updater import IncrementalUserSimilarity
+    from app.models.base_models import Rating, User, UserSimilarity
+
+    print("\n[2] Catch-up from --since rewrites users who rated after it")
+    rebuilt_at = datetime.utcnow()
+    session.add(User(id="9001", username="catchup", email="catchup@example.com", password_hash="x"))
+    liked = session.query(Rating.movie_id, Rating.rating).filter(Rating.user_id == "3").all()
+    for movie_id, rating in liked:
+        session.add(Rating(user_id="9001", movie_id=movie_id, rating=rating, rated_at=rebuilt_at + timedelta(seconds=1)))
+    session.commit()
+
+    updater = IncrementalUserSimilarity().load(session, since=rebuilt_at)
+    report = updater.run_micro_batch(session)
+    print(f"    micro-batch: {report}")
+    stored = session.query(UserSimilarity).filter(UserSimilarity.user_id == "9001").count()
+    served = _rounded(Recommender(session)._stored_neighbors("9001", 3))
+    print(f"    stored rows for 9001: {stored}, Recommender: {served}")
+    ok = report["changed_users"] >= 1 and stored > 0 and served == _sql_neighbors(session, "9001", 3)
+    print("    ✅ new ratings replayed" if ok else "    ❌ --since replay changed nothing")
+    return ok
+
+
+def main():
+    print(f"--- Incremental similarity verification ({WORK_DIR}) ---")
+    counts = generate_dataset(os.path.join(WORK_DIR, "verify.db"), users=300, movies=400, ratings_per_user=30)
+    print(f"Generated {counts}; precomputing similarities...")
+    subprocess.run([sys.executable, "-m", "app.scripts.precompute_matrices"], env=dict(os.environ), check=True, capture_output=True)
+
+    from app.core.database import SessionLocal
+    session = SessionLocal()
+    try:
+        results = [verify_micro_batch_visible(session), verify_catch_up(session)]
+    finally:
+        session.close()
+
+    if not all(results):
+        sys.exit(1)
+    print("\n✅ All similarity update checks passed.")
+
+
+if __name__ == "__main__":
+    main()